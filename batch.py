@@ -0,0 +1,442 @@
+# -*- coding: utf-8 -*-
+# Headless batch mode: applies course operations to every image in a folder or glob pattern, spreading the images
+#  across a pool of processes and writing the results to an output folder instead of displaying them.
+# The outputs are kept in a persistent cache of derived images too, so running the job again only computes the images
+#  and the operations that changed, and copies the other outputs from the cache.
+# Each process encodes and writes its outputs on a pool of threads, so the encoding overlaps with the operations.
+# Usage: python batch.py [source] [-o output] [-p crop,reduce,flip] [-w workers] [-e .png] [-s scale] [-q]
+#                        [-f jpeg,png] [--min-width pixels] [--min-height pixels] [--no-cache] [--cache-size MB]
+#                        [--encoders threads] [--queue images] [--jpeg-quality 0-100] [--png-compression 0-9]
+#                        [--webp-quality 1-101]
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+
+# --- Python modules ---
+# argparse: parser for command-line options, arguments and sub-commands.
+import argparse
+# json: encoder and decoder of JSON (JavaScript Object Notation) data.
+import json
+# multiprocessing: supports spawning processes, to use the multiple processors on a machine.
+import multiprocessing
+# multiprocessing.util: Finalize flushes the writer of a worker process when the pool stops it before its last task.
+import multiprocessing.util
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+# sys: module which provides access to variables used or maintained by the interpreter and to functions that
+#      interact strongly with the interpreter
+import sys
+# threading: a lock counts the outputs of an operation written by the encoder threads.
+import threading
+# time: provides various time-related functions.
+import time
+
+# --- App modules ---
+from course import operations
+from course.constants import DERIVED_CACHE_SUB_FOLDER_, IMAGE_SUB_FOLDER_
+from helper import catalog_helper, derived_cache_helper, image_helper, os_helper, writer_helper
+
+# Caches of derived images opened by this process, by folder
+_caches_ = {}
+
+# Asynchronous writer of this process, created by the first task, and the number of its failed writes already reported
+_writer_ = {'writer': None, 'reported_errors': 0}
+
+# Barrier of the workers of the pool, so that each worker runs one of the final flush tasks
+_flush_barrier_ = {'barrier': None}
+
+
+def init_worker(flush_barrier_=None):
+    """
+    Initializes a worker process. Each process runs OpenCV single-threaded, so that the processes do not compete for
+      the cores with the OpenCV threads and the throughput scales with the number of processes.
+    :param flush_barrier_: barrier of the workers of the pool, see flush_worker
+    """
+    cv2.setNumThreads(1)
+    _flush_barrier_['barrier'] = flush_barrier_
+
+
+def process_file(task_: tuple) -> tuple:
+    """
+    Reads an image file, applies the operations and writes the outputs to <output folder>/<output name>/<relative path>.
+      The outputs of the operations already applied to the same content, with the same scale and extension, are copied
+      from the cache of derived images instead, and the file is not decoded if all of them are in the cache.
+      The outputs computed are queued to the asynchronous writer of the process, so they are still being written when
+      it returns.
+    :param task_: a tuple (full path, relative path, operation names, output folder, output file extension, scale,
+                  cache folder or None, cap in bytes of the cache, arguments of writer_helper.AsyncImageWriter)
+    :return: a tuple (relative path, megapixels, number of outputs, number of outputs copied from the cache,
+                      read seconds, process seconds, seconds to queue the outputs, counters of the writes done since the
+                      previous task, error message or None), the counters as returned by _writer_counters
+    """
+    (full_path_, relative_path_, operation_names_, output_folder_, extension_, scale_,
+     cache_folder_, cache_bytes_, writer_options_) = task_
+    writer_ = _open_writer(writer_options_)
+    # The outputs of other encoder parameters are other entries of the cache
+    parameters_ = {'scale': scale_,
+                   'encoder': writer_helper.encode_parameters(
+                       extension_, **{name_: value_ for name_, value_ in writer_options_.items()
+                                      if name_ in ('jpeg_quality_', 'png_compression_', 'webp_quality_')})}
+
+    start_ = time.perf_counter()
+    stem_ = os.path.splitext(relative_path_)[0]
+    megapixels_, outputs_count_, cached_count_ = 0., 0, 0
+
+    # Copy the outputs of the operations found in the cache, the manifest of each operation lists its outputs
+    pending_names_ = operation_names_
+    if cache_folder_:
+        cache_ = _caches_.get(cache_folder_)
+        if cache_ is None:
+            cache_ = _caches_[cache_folder_] = derived_cache_helper.DerivedCache(cache_folder_, cache_bytes_)
+        source_hash_ = derived_cache_helper.file_hash(full_path_)
+        if source_hash_ is None:
+            return relative_path_, 0., 0, 0, 0., 0., 0., _writer_counters(), 'the file cannot be read'
+
+        pending_names_ = []
+        for operation_name_ in operation_names_:
+            manifest_ = cache_.get(_manifest_key(source_hash_, operation_name_, parameters_))
+            if manifest_ is not None:
+                manifest_ = json.loads(manifest_)
+                output_paths_ = [_output_path(output_folder_, output_name_, stem_, extension_)
+                                 for output_name_ in manifest_['outputs']]
+                if all(cache_.export(_output_key(source_hash_, operation_name_, output_name_, parameters_,
+                                                 extension_), output_path_)
+                       for output_name_, output_path_ in zip(manifest_['outputs'], output_paths_)):
+                    megapixels_ = manifest_['megapixels']
+                    outputs_count_ += len(output_paths_)
+                    cached_count_ += len(output_paths_)
+                    continue
+            pending_names_.append(operation_name_)
+
+    read_seconds_, process_seconds_, write_seconds_ = time.perf_counter() - start_, 0., 0.
+    if pending_names_:
+        read_start_ = time.perf_counter()
+        # The file is read once per process, so it is not worth to keep it in the decoded image cache.
+        # A scaled down image is decoded at reduced resolution when the scale allows it.
+        image_ = image_helper.read_image_scaled(full_path_, scale_, cv2.IMREAD_COLOR, cache_=False)
+        if image_ is None:
+            return relative_path_, 0., 0, 0, 0., 0., 0., _writer_counters(), 'the file cannot be read'
+        megapixels_ = image_.shape[0] * image_.shape[1] / 1e6
+        read_seconds_ += time.perf_counter() - read_start_
+
+        for operation_name_ in pending_names_:
+            process_start_ = time.perf_counter()
+            outputs_ = operations.apply(image_, [operation_name_])
+            write_start_ = time.perf_counter()
+            process_seconds_ += write_start_ - process_start_
+
+            # The manifest is put in the cache after the outputs, so an operation is found only when it is complete
+            written_ = (_ManifestWriter(cache_, _manifest_key(source_hash_, operation_name_, parameters_),
+                                        {'outputs': list(outputs_), 'megapixels': megapixels_}, len(outputs_))
+                        if cache_folder_ else None)
+            for output_name_, output_ in outputs_.items():
+                # Encoded once by the writer, for the output file and the cache
+                callback_ = (written_.callback(_output_key(source_hash_, operation_name_, output_name_, parameters_,
+                                                           extension_))
+                             if written_ else None)
+                writer_.write(_output_path(output_folder_, output_name_, stem_, extension_), output_, callback_)
+            outputs_count_ += len(outputs_)
+            write_seconds_ += time.perf_counter() - write_start_
+
+    return (relative_path_, megapixels_, outputs_count_, cached_count_,
+            read_seconds_, process_seconds_, write_seconds_, _writer_counters(), None)
+
+
+def flush_worker(_=None) -> tuple:
+    """
+    Last task of a worker: writes the outputs still queued by its writer. The workers wait for each other before, so
+      that each worker of the pool runs exactly one of these tasks.
+    :return: the counters of the writes not reported yet, see _writer_counters
+    """
+    if _flush_barrier_['barrier'] is not None:
+        _flush_barrier_['barrier'].wait()
+    return _close_writer()
+
+
+class _ManifestWriter:
+    """
+    Puts the outputs of an operation in the cache as the writer encodes them, and then the manifest of the operation
+    """
+
+    def __init__(self,
+                 cache_: derived_cache_helper.DerivedCache,
+                 key_: str,
+                 manifest_: dict,
+                 outputs_: int):
+        self.cache_ = cache_
+        self.key_ = key_
+        self.manifest_ = manifest_
+        self.remaining_ = outputs_
+        self.lock_ = threading.Lock()
+        if not outputs_:
+            self._put_manifest()
+
+    def callback(self, output_key_: str):
+        """
+        :param output_key_: key of an output in the cache
+        :return: the callback of the writer for the output, which receives the encoded bytes
+        """
+        def put_(data_):
+            self.cache_.put(output_key_, data_.tobytes())
+            with self.lock_:
+                self.remaining_ -= 1
+                complete_ = self.remaining_ == 0
+            if complete_:
+                self._put_manifest()
+
+        return put_
+
+    def _put_manifest(self):
+        self.cache_.put(self.key_, json.dumps(self.manifest_).encode())
+
+
+def _open_writer(writer_options_: dict) -> writer_helper.AsyncImageWriter:
+    """
+    :param writer_options_: arguments of writer_helper.AsyncImageWriter
+    :return: the asynchronous writer of the process, created on first call
+    """
+    if _writer_['writer'] is None:
+        _writer_['writer'] = writer_helper.AsyncImageWriter(**writer_options_)
+        if multiprocessing.parent_process() is not None:
+            # A worker of the pool exits without running the atexit functions, but it runs the finalizers, so the
+            #  outputs are still written when the run is interrupted before flush_worker
+            multiprocessing.util.Finalize(None, _close_writer, exitpriority=10)
+    return _writer_['writer']
+
+
+def _writer_counters() -> tuple:
+    """
+    Takes the counters of the writer of the process, so that each write is reported once
+    :return: a tuple (stats of the writes done since the previous call, list of tuples (file path, error message) of
+             the writes that failed since the previous call)
+    """
+    writer_ = _writer_['writer']
+    if writer_ is None:
+        return {}, []
+    errors_ = writer_.errors()[_writer_['reported_errors']:]
+    _writer_['reported_errors'] += len(errors_)
+    return writer_.stats(reset_=True), errors_
+
+
+def _close_writer() -> tuple:
+    """
+    Writes the queued outputs of the process
+    :return: the counters of the writes not reported yet, see _writer_counters
+    """
+    writer_ = _writer_['writer']
+    if writer_ is None:
+        return {}, []
+    writer_.close()
+    counters_ = _writer_counters()
+    _writer_['writer'], _writer_['reported_errors'] = None, 0
+    return counters_
+
+
+def _merge_writer_counters(totals_: dict,
+                           counters_: tuple):
+    """
+    Adds the counters of the writer of a process to the totals of the run, and reports the writes that failed
+    """
+    stats_, errors_ = counters_
+    writer_helper.merge_stats(totals_['writes'], stats_)
+    totals_['write_errors'] += len(errors_)
+    for file_path_, error_ in errors_:
+        print(f'{file_path_}: {error_}')
+
+
+def _output_path(output_folder_: str,
+                 output_name_: str,
+                 stem_: str,
+                 extension_: str) -> str:
+    """
+    :return: the path of an output file, its folder is created if it does not exist
+    """
+    output_path_ = os.path.join(output_folder_, output_name_, stem_ + extension_)
+    os.makedirs(os.path.dirname(output_path_), exist_ok=True)
+    return output_path_
+
+
+def _manifest_key(source_hash_: str,
+                  operation_name_: str,
+                  parameters_: dict) -> str:
+    """
+    :return: the key of the cache entry that lists the outputs of an operation applied to a source
+    """
+    return derived_cache_helper.DerivedCache.key(source_hash_, f'batch:{operation_name_}', parameters_, '.json')
+
+
+def _output_key(source_hash_: str,
+                operation_name_: str,
+                output_name_: str,
+                parameters_: dict,
+                extension_: str) -> str:
+    """
+    :return: the key of the cache entry of an output of an operation applied to a source
+    """
+    return derived_cache_helper.DerivedCache.key(source_hash_, f'batch:{operation_name_}:{output_name_}', parameters_,
+                                                 extension_)
+
+
+def run(source_: str,
+        output_folder_: str,
+        operation_names_: [],
+        workers_: int,
+        extension_: str = '.png',
+        verbose_: bool = True,
+        scale_: float = 1.,
+        query_: dict = None,
+        cache_folder_: str = None,
+        cache_bytes_: int = derived_cache_helper.MAX_BYTES_,
+        writer_options_: dict = None) -> dict:
+    """
+    Applies the operations to every image of the source, and reports per-image and total throughput
+    :param source_: folder or glob pattern of the images to process
+    :param output_folder_: folder where the outputs are written
+    :param operation_names_: names of the operations to apply, keys of course.operations.OPERATIONS_
+    :param workers_: number of worker processes, 1 processes the images in the current process
+    :param extension_: file extension, and so format, of the outputs
+    :param verbose_: flag to print or not the per-image report
+    :param scale_: scale factor applied to the images before the operations, value between 0 and 1
+    :param query_: conditions of catalog_helper.Catalog.query to select the images of a source folder by format and
+                   dimensions, reading only the headers of the files that changed since the last run
+    :param cache_folder_: folder of the cache of derived images, None to compute all the outputs
+    :param cache_bytes_: cap of the total size of the cache of derived images
+    :param writer_options_: arguments of writer_helper.AsyncImageWriter, e.g. the number of encoder threads of each
+                            process and the JPEG quality
+    :return: a dictionary with the totals: images, errors, outputs, outputs copied from the cache, megapixels, seconds,
+             images/s, megapixels/s, the stats of the writes per format and the number of writes that failed
+    """
+    if query_:
+        catalog_ = catalog_helper.open_catalog(source_)
+        files_ = [(catalog_.full_path(relative_path_), relative_path_)
+                  for relative_path_, _ in catalog_.query(**query_)]
+    else:
+        files_ = os_helper.find_image_files(source_)
+    tasks_ = [(full_path_, relative_path_, operation_names_, output_folder_, extension_, scale_,
+               cache_folder_, cache_bytes_, writer_options_ or {})
+              for full_path_, relative_path_ in files_]
+
+    totals_ = {'images': 0, 'errors': 0, 'outputs': 0, 'cached': 0, 'megapixels': 0., 'writes': {}, 'write_errors': 0}
+    start_ = time.perf_counter()
+
+    if workers_ == 1:
+        init_worker()
+        results_ = map(process_file, tasks_)
+        pool_ = None
+    else:
+        # Several images per message amortize the inter-process communication on thousands of small files
+        chunk_size_ = max(1, len(tasks_) // (workers_ * 8))
+        pool_ = multiprocessing.Pool(workers_, initializer=init_worker, initargs=(multiprocessing.Barrier(workers_),))
+        results_ = pool_.imap_unordered(process_file, tasks_, chunksize=chunk_size_)
+
+    try:
+        for relative_path_, megapixels_, outputs_, cached_, read_, process_, write_, writes_, error_ in results_:
+            _merge_writer_counters(totals_, writes_)
+            if error_ is not None:
+                totals_['errors'] += 1
+                print(f'{relative_path_}: {error_}')
+                continue
+
+            totals_['images'] += 1
+            totals_['outputs'] += outputs_
+            totals_['cached'] += cached_
+            totals_['megapixels'] += megapixels_
+            if verbose_:
+                elapsed_ = read_ + process_ + write_
+                print(f'{relative_path_}: {elapsed_ * 1000:.1f} ms (read {read_ * 1000:.1f}, '
+                      f'process {process_ * 1000:.1f}, queue {write_ * 1000:.1f}), {megapixels_ / elapsed_:.1f} MP/s'
+                      f'{f", {cached_} of {outputs_} outputs cached" if cached_ else ""}')
+
+        if pool_ is not None:
+            # The last task of each worker writes its queued outputs, so that these writes are in the totals too
+            for counters_ in pool_.map(flush_worker, range(workers_), chunksize=1):
+                _merge_writer_counters(totals_, counters_)
+    finally:
+        if pool_ is not None:
+            pool_.close()
+            pool_.join()
+        else:
+            _merge_writer_counters(totals_, _close_writer())
+
+    totals_['seconds'] = time.perf_counter() - start_
+    totals_['images_per_second'] = totals_['images'] / totals_['seconds'] if totals_['seconds'] else 0.
+    totals_['megapixels_per_second'] = totals_['megapixels'] / totals_['seconds'] if totals_['seconds'] else 0.
+    print(f'Total: {totals_["images"]} images ({totals_["errors"]} errors), {totals_["outputs"]} outputs '
+          f'({totals_["cached"]} from the cache) in {totals_["seconds"]:.2f} s with {workers_} workers: '
+          f'{totals_["images_per_second"]:.1f} images/s, {totals_["megapixels_per_second"]:.1f} MP/s')
+    if totals_['write_errors']:
+        print(f'{totals_["write_errors"]} outputs could not be written')
+    if len(totals_['writes']) > 1:
+        print(writer_helper.stats_table(totals_['writes']))
+
+    return totals_
+
+
+if __name__ == '__main__':
+    parser_ = argparse.ArgumentParser(description='Applies course operations to every image in a folder or glob '
+                                                  'pattern, without displaying windows.')
+    parser_.add_argument('source', nargs='?', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                   *IMAGE_SUB_FOLDER_),
+                         help='folder or glob pattern of the images to process (default: the course images)')
+    parser_.add_argument('-o', '--output', default='output', help='output folder (default: output)')
+    parser_.add_argument('-p', '--operations', default=','.join(operations.OPERATIONS_),
+                         help=f'comma-separated operations (default: all): {", ".join(operations.OPERATIONS_)}')
+    parser_.add_argument('-w', '--workers', type=int, default=os.cpu_count(),
+                         help='number of worker processes (default: number of cores)')
+    parser_.add_argument('-e', '--extension', default='.png', help='file extension of the outputs (default: .png)')
+    parser_.add_argument('-s', '--scale', type=float, default=1.,
+                         help='scale factor applied to the images before the operations, between 0 and 1 (default: 1)')
+    parser_.add_argument('-q', '--quiet', action='store_true', help='report only the totals')
+    parser_.add_argument('-f', '--formats', default='',
+                         help='comma-separated formats of the images to process: jpeg, png, webp, bmp, tiff '
+                              '(default: all)')
+    parser_.add_argument('--min-width', type=int, default=0, help='minimum width of the images to process')
+    parser_.add_argument('--min-height', type=int, default=0, help='minimum height of the images to process')
+    parser_.add_argument('--no-cache', action='store_true',
+                         help='compute all the outputs, without the cache of derived images')
+    parser_.add_argument('--cache-size', type=int, default=derived_cache_helper.MAX_BYTES_ // 2 ** 20,
+                         help=f'cap in MB of the cache of derived images (default: '
+                              f'{derived_cache_helper.MAX_BYTES_ // 2 ** 20})')
+    parser_.add_argument('--encoders', type=int, default=2,
+                         help='threads of each process that encode and write the outputs (default: 2)')
+    parser_.add_argument('--queue', type=int, default=8,
+                         help='outputs of each process waiting to be written, the operations wait while there are as '
+                              'many (default: 8)')
+    parser_.add_argument('--jpeg-quality', type=int, help='quality of the JPEG outputs, from 0 to 100 (default: 95)')
+    parser_.add_argument('--png-compression', type=int,
+                         help='compression level of the PNG outputs, from 0 (fastest) to 9 (smallest) (default: the '
+                              'fast RLE strategy of OpenCV)')
+    parser_.add_argument('--webp-quality', type=int,
+                         help='quality of the WebP outputs, from 1 to 100, above 100 is lossless (default: lossless)')
+    args_ = parser_.parse_args()
+
+    if not (0 < args_.scale <= 1):
+        print('Check the scale, because it must be greater than 0 and less than or equal to 1.')
+        sys.exit(2)
+
+    operation_names_ = [name_.strip() for name_ in args_.operations.split(',') if name_.strip()]
+    unknown_names_ = [name_ for name_ in operation_names_ if name_ not in operations.OPERATIONS_]
+    if unknown_names_:
+        print(f'Unknown operations: {", ".join(unknown_names_)}')
+        sys.exit(2)
+
+    # The filters select the images from the catalog of the source folder, without decoding them
+    query_ = {}
+    if args_.formats or args_.min_width or args_.min_height:
+        if not os.path.isdir(args_.source):
+            print('Check the source, because the formats and dimensions filters need a folder.')
+            sys.exit(2)
+        query_ = {'formats_': tuple(format_.strip().lower() for format_ in args_.formats.split(',') if format_.strip()),
+                  'min_width_': args_.min_width, 'min_height_': args_.min_height}
+
+    cache_folder_ = None if args_.no_cache else os_helper.app_sub_folder(*DERIVED_CACHE_SUB_FOLDER_)
+    totals_ = run(args_.source, args_.output, operation_names_, max(1, args_.workers), args_.extension,
+                  not args_.quiet, args_.scale, query_, cache_folder_, args_.cache_size * 2 ** 20,
+                  {'workers_': max(1, args_.encoders), 'max_pending_': max(1, args_.queue),
+                   'jpeg_quality_': args_.jpeg_quality, 'png_compression_': args_.png_compression,
+                   'webp_quality_': args_.webp_quality})
+
+    # Terminate with error if no image could be processed
+    sys.exit(0 if totals_['images'] else 1)
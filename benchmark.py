@@ -0,0 +1,680 @@
+# -*- coding: utf-8 -*-
+# Benchmark of the course operations: runs each operation headless over synthetic images of configurable sizes,
+#  timing the decode, transform and output stages separately, and saves latency percentiles and peak memory to JSON.
+# The imports command measures the cold import time of the packages, each one in a new interpreter.
+# The filters command compares the filters of Module 7 applied to the whole image and in tiles on a pool of threads.
+# The parallel command measures the throughput of the operations in worker processes, passing the images pickled or
+#  through shared memory.
+# The hdr command measures the throughput and the peak resident memory of the HDR merges of Module 10, in bands that
+#  fit in a memory cap.
+# The faces command compares the face detection of Module 12 at full size, downscaled to the expected face sizes, and
+#  downscaled every few frames with tracking in between, on synthetic video and on the images of the course.
+# The compare command flags the regressions of a benchmark against a saved baseline.
+# Usage: python benchmark.py run [-s 640x480,1920x1080] [-p crop,flip] [-r 20] [-o benchmark.json] [-b baseline.json]
+#        python benchmark.py imports [-m course,helper] [-r 10] [-o imports.json] [-b baseline.json]
+#        python benchmark.py filters [-s 1920x1080,7680x4320] [-f box,canny] [-k 9] [--tile-size 1024] [-r 10]
+#        python benchmark.py parallel [-s 3840x2160] [-p hue_sweep] [-w 4] [-n 32] [-r 3] [-o parallel.json]
+#        python benchmark.py hdr [-s 7680x5200] [-n 9] [-m debevec,mertens] [-c 512] [-r 1] [-o hdr.json]
+#        python benchmark.py faces [-s 640x480,1920x1080] [-n 150] [-d 10] [-o faces.json] [-b baseline.json]
+#        python benchmark.py compare baseline.json benchmark.json [-t 0.10] [--min-difference 0.05]
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# argparse: parser for command-line options, arguments and sub-commands.
+import argparse
+# json: encoder and decoder of JSON (JavaScript Object Notation) data.
+import json
+# multiprocessing: supports spawning processes, to use the multiple processors on a machine.
+import multiprocessing
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+# platform: access to underlying platform's identifying data.
+import platform
+# subprocess: runs new processes, to import the packages in a new interpreter each time.
+import subprocess
+# sys: module which provides access to variables used or maintained by the interpreter and to functions that
+#      interact strongly with the interpreter
+import sys
+# time: provides various time-related functions.
+import time
+# tracemalloc: traces the memory blocks allocated by Python, numpy arrays included.
+import tracemalloc
+
+# --- App modules ---
+from course import operations
+from course.constants import IMAGE_SUB_FOLDER_
+from helper import face_helper, filter_helper, hdr_helper, os_helper, shm_helper, tracking_helper
+
+STAGES_ = ('decode', 'transform', 'output', 'total')
+PERCENTILES_ = (50, 90, 99)
+
+# Smallest change of a latency, in milliseconds, that compare flags: the stages that take almost no time change by a
+#  large ratio from the timer resolution and the noise alone
+MIN_DIFFERENCE_MS_ = 0.05
+
+# Modules whose cold import time is measured by the imports command
+IMPORT_MODULES_ = ('numpy', 'cv2', 'helper', 'course', 'helper.image_helper', 'helper.show_helper',
+                   'course.module_01', 'course.operations', 'matplotlib.pyplot')
+
+# Script run in a new interpreter to measure the import time of a module, and whether it loads matplotlib
+_IMPORT_SCRIPT_ = ('import sys, time\n'
+                   'start_ = time.perf_counter()\n'
+                   'import {module}\n'
+                   'print(time.perf_counter() - start_, int("matplotlib" in sys.modules))\n')
+
+
+def parse_sizes(sizes_: str) -> []:
+    """
+    Parses image sizes
+    :param sizes_: comma-separated sizes with format <width>x<height>, e.g. 640x480,1920x1080
+    :return: list of tuples (width, height)
+    """
+    return [tuple(int(value_) for value_ in size_.lower().split('x')) for size_ in sizes_.split(',') if size_]
+
+
+def synthesize_image(width_: int,
+                     height_: int,
+                     seed_: int = 0) -> np.ndarray:
+    """
+    Synthesizes a BGR image with smooth gradients and noise, so it compresses like a photograph
+    :param width_: image width
+    :param height_: image height
+    :param seed_: seed of the noise generator, for repeatable benchmarks
+    :return: the BGR image
+    """
+    rows_ = np.linspace(0, 255, height_, dtype=np.float32)[:, None]
+    cols_ = np.linspace(0, 255, width_, dtype=np.float32)[None, :]
+    noise_ = np.random.default_rng(seed_).normal(0, 12, (height_, width_, 3)).astype(np.float32)
+    image_ = np.dstack((np.broadcast_to(cols_, (height_, width_)),
+                        np.broadcast_to(rows_, (height_, width_)),
+                        (rows_ + cols_) / 2)) + noise_
+    return np.uint8(np.clip(image_, 0, 255))
+
+
+def summarize(seconds_: []) -> dict:
+    """
+    Summarizes latencies
+    :param seconds_: measured latencies in seconds
+    :return: a dictionary with mean, min, max and percentiles, in milliseconds
+    """
+    milliseconds_ = np.asarray(seconds_) * 1000
+    summary_ = {'mean': float(milliseconds_.mean()), 'min': float(milliseconds_.min()),
+                'max': float(milliseconds_.max())}
+    for percentile_ in PERCENTILES_:
+        summary_[f'p{percentile_}'] = float(np.percentile(milliseconds_, percentile_))
+    return summary_
+
+
+def run_operation(operation_name_: str,
+                  encoded_image_: np.ndarray,
+                  output_extension_: str) -> dict:
+    """
+    Runs once an operation over an encoded image
+    :param operation_name_: key of course.operations.OPERATIONS_
+    :param encoded_image_: image file content, as a uint8 array
+    :param output_extension_: file extension, and so format, to encode the outputs
+    :return: a dictionary with the seconds of each stage
+    """
+    start_ = time.perf_counter()
+    image_ = cv2.imdecode(encoded_image_, cv2.IMREAD_COLOR)
+    decoded_ = time.perf_counter()
+    outputs_ = operations.OPERATIONS_[operation_name_](image_)
+    transformed_ = time.perf_counter()
+    for output_ in outputs_.values():
+        cv2.imencode(output_extension_, output_)
+    encoded_ = time.perf_counter()
+    return {'decode': decoded_ - start_, 'transform': transformed_ - decoded_, 'output': encoded_ - transformed_,
+            'total': encoded_ - start_}
+
+
+def run(sizes_: [],
+        operation_names_: [],
+        repeat_: int,
+        input_extension_: str = '.jpg',
+        output_extension_: str = '.jpg') -> dict:
+    """
+    Benchmarks the operations over synthetic images of each size
+    :param sizes_: list of tuples (width, height)
+    :param operation_names_: keys of course.operations.OPERATIONS_
+    :param repeat_: number of timed runs of each operation and size
+    :param input_extension_: file extension, and so format, of the synthetic images to decode
+    :param output_extension_: file extension, and so format, to encode the outputs
+    :return: the benchmark, a dictionary with the environment and the results by <operation>@<width>x<height>
+    """
+    results_ = {}
+    for width_, height_ in sizes_:
+        encoded_image_ = cv2.imencode(input_extension_, synthesize_image(width_, height_))[1]
+
+        for operation_name_ in operation_names_:
+            # Warm up, then measure the peak memory in a run of its own because tracing slows down the allocations
+            run_operation(operation_name_, encoded_image_, output_extension_)
+            tracemalloc.start()
+            run_operation(operation_name_, encoded_image_, output_extension_)
+            peak_bytes_ = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            runs_ = [run_operation(operation_name_, encoded_image_, output_extension_) for _ in range(repeat_)]
+
+            key_ = f'{operation_name_}@{width_}x{height_}'
+            results_[key_] = {stage_: summarize([run_[stage_] for run_ in runs_]) for stage_ in STAGES_}
+            results_[key_]['peak_bytes'] = peak_bytes_
+            print(f'{key_:<32} total p50 {results_[key_]["total"]["p50"]:9.2f} ms  '
+                  f'(decode {results_[key_]["decode"]["p50"]:.2f}, transform {results_[key_]["transform"]["p50"]:.2f}, '
+                  f'output {results_[key_]["output"]["p50"]:.2f})  peak {peak_bytes_ / 2 ** 20:.1f} MB')
+
+    return {'environment': environment(),
+            'settings': {'repeat': repeat_, 'input_extension': input_extension_,
+                         'output_extension': output_extension_},
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results_}
+
+
+def run_imports(module_names_: [],
+                repeat_: int) -> dict:
+    """
+    Benchmarks the cold import time of modules, importing each one in a new interpreter every time, as a short-lived
+      worker process does. The interpreter startup time is reported as 'import:(interpreter)'.
+    :param module_names_: modules to import, e.g. course or helper.show_helper
+    :param repeat_: number of new interpreters per module
+    :return: the benchmark, a dictionary with the environment and the results by import:<module>
+    """
+    app_folder_ = os.path.dirname(os.path.abspath(__file__))
+    results_ = {}
+
+    # Startup of the interpreter alone, measured from outside
+    seconds_ = []
+    for _ in range(repeat_):
+        start_ = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], cwd=app_folder_, check=True)
+        seconds_.append(time.perf_counter() - start_)
+    results_['import:(interpreter)'] = {'total': summarize(seconds_)}
+    print(f'{"import:(interpreter)":<32} p50 {results_["import:(interpreter)"]["total"]["p50"]:9.2f} ms')
+
+    for module_name_ in module_names_:
+        seconds_ = []
+        loads_matplotlib_ = False
+        for _ in range(repeat_):
+            completed_ = subprocess.run([sys.executable, '-c', _IMPORT_SCRIPT_.format(module=module_name_)],
+                                        cwd=app_folder_, capture_output=True, text=True)
+            if completed_.returncode != 0:
+                print(f'{module_name_} cannot be imported: {completed_.stderr.strip().splitlines()[-1]}')
+                break
+            import_seconds_, matplotlib_loaded_ = completed_.stdout.split()
+            seconds_.append(float(import_seconds_))
+            loads_matplotlib_ = matplotlib_loaded_ == '1'
+
+        if seconds_:
+            key_ = f'import:{module_name_}'
+            results_[key_] = {'total': summarize(seconds_), 'loads_matplotlib': loads_matplotlib_}
+            print(f'{key_:<32} p50 {results_[key_]["total"]["p50"]:9.2f} ms'
+                  f'{"  (loads matplotlib)" if loads_matplotlib_ else ""}')
+
+    return {'environment': environment(),
+            'settings': {'repeat': repeat_},
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results_}
+
+
+def run_filters(sizes_: [],
+                filter_names_: [],
+                repeat_: int,
+                ksize_: int = 0,
+                tile_size_: int = filter_helper.TILE_SIZE_) -> dict:
+    """
+    Benchmarks the filters applied to the whole image and in tiles on the thread pool of filter_helper
+    :param sizes_: list of tuples (width, height)
+    :param filter_names_: keys of filter_helper.FILTERS_
+    :param repeat_: number of timed runs of each filter, size and mode
+    :param ksize_: kernel size of the filters that have one, 0 for their default
+    :param tile_size_: width and height of the tiles
+    :return: the benchmark, a dictionary with the environment and the results by filter:<mode>:<filter>@<size>
+    """
+    results_ = {}
+    for width_, height_ in sizes_:
+        image_ = synthesize_image(width_, height_)
+
+        for filter_name_ in filter_names_:
+            parameters_ = {'ksize_': ksize_} if ksize_ and filter_name_ != 'canny' else {}
+            p50_ = {}
+            for mode_, tiled_ in (('whole', False), ('tiled', True)):
+                # Warm up, e.g. the thread pool, then measure
+                filter_helper.apply(filter_name_, image_, tiled_, tile_size_, **parameters_)
+                seconds_ = []
+                for _ in range(repeat_):
+                    start_ = time.perf_counter()
+                    filter_helper.apply(filter_name_, image_, tiled_, tile_size_, **parameters_)
+                    seconds_.append(time.perf_counter() - start_)
+
+                key_ = f'filter:{mode_}:{filter_name_}@{width_}x{height_}'
+                results_[key_] = {'total': summarize(seconds_)}
+                p50_[mode_] = results_[key_]['total']['p50']
+            print(f'{filter_name_ + f"@{width_}x{height_}":<32} whole p50 {p50_["whole"]:9.2f} ms  '
+                  f'tiled p50 {p50_["tiled"]:9.2f} ms  speedup {p50_["whole"] / p50_["tiled"]:5.2f}x')
+
+    return {'environment': environment(),
+            'settings': {'repeat': repeat_, 'ksize': ksize_, 'tile_size': tile_size_,
+                         'threads': cv2.getNumThreads()},
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results_}
+
+
+def init_worker():
+    """
+    Initializes a worker process of the parallel benchmark, with OpenCV single-threaded like batch.py
+    """
+    cv2.setNumThreads(1)
+
+
+def run_parallel(sizes_: [],
+                 operation_names_: [],
+                 images_: int,
+                 workers_: int,
+                 repeat_: int) -> dict:
+    """
+    Benchmarks the throughput of the operations in worker processes, passing the images and the outputs pickled
+      through a multiprocessing.Pool, or through the shared memory blocks of shm_helper.SharedMemoryExecutor
+    :param sizes_: list of tuples (width, height)
+    :param operation_names_: keys of course.operations.OPERATIONS_
+    :param images_: number of images processed in each timed run
+    :param workers_: number of worker processes
+    :param repeat_: number of timed runs of each operation, size and mode
+    :return: the benchmark, a dictionary with the environment and the results by parallel:<mode>:<operation>@<size>,
+             with the latency per image
+    """
+    results_ = {}
+    with multiprocessing.Pool(workers_, initializer=init_worker) as pool_, \
+            shm_helper.SharedMemoryExecutor(workers_, initializer_=init_worker) as executor_:
+        modes_ = {'pickle': lambda batch_, names_: pool_.starmap(operations.apply,
+                                                                 [(image_, names_) for image_ in batch_]),
+                  'shm': lambda batch_, names_: list(executor_.map(operations.apply, batch_, names_))}
+
+        for width_, height_ in sizes_:
+            batch_ = [synthesize_image(width_, height_, seed_) for seed_ in range(min(images_, 4))]
+            batch_ = [batch_[i_ % len(batch_)] for i_ in range(images_)]
+
+            for operation_name_ in operation_names_:
+                for mode_, map_ in modes_.items():
+                    # Warm up the workers, then measure
+                    map_(batch_[:workers_], [operation_name_])
+                    seconds_ = []
+                    for _ in range(repeat_):
+                        start_ = time.perf_counter()
+                        map_(batch_, [operation_name_])
+                        seconds_.append((time.perf_counter() - start_) / images_)
+
+                    key_ = f'parallel:{mode_}:{operation_name_}@{width_}x{height_}'
+                    results_[key_] = {'total': summarize(seconds_)}
+                    print(f'{key_:<44} p50 {results_[key_]["total"]["p50"]:9.2f} ms/image  '
+                          f'{1000 / results_[key_]["total"]["p50"]:8.1f} images/s')
+
+    return {'environment': environment(),
+            'settings': {'images': images_, 'workers': workers_, 'repeat': repeat_},
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results_}
+
+
+def run_hdr(sizes_: [],
+            exposures_: int,
+            methods_: [],
+            memory_cap_: int,
+            repeat_: int) -> dict:
+    """
+    Benchmarks the HDR merges of hdr_helper over synthetic exposure stacks, one stop apart
+    :param sizes_: list of tuples (width, height)
+    :param exposures_: number of exposures of each stack
+    :param methods_: 'debevec', which includes the tone mapping, and/or 'mertens'
+    :param memory_cap_: cap of the working memory of the merges, in bytes
+    :param repeat_: number of timed runs of each method and size
+    :return: the benchmark, a dictionary with the environment and the results by hdr:<method>@<size>, with the latency
+             per merge and the peak resident memory of the process, the exposures included
+    """
+    results_ = {}
+    times_ = [2. ** (i_ - exposures_ // 2) for i_ in range(exposures_)]
+    for width_, height_ in sizes_:
+        images_ = [hdr_helper.synthesize_exposures(synthesize_image(width_, height_), [time_])[0] for time_ in times_]
+        response_ = hdr_helper.calibrate_debevec(images_, times_)
+
+        for method_ in methods_:
+            seconds_, peak_bytes_ = [], 0
+            for _ in range(repeat_):
+                start_ = time.perf_counter()
+                if method_ == 'debevec':
+                    radiance_, report_ = hdr_helper.merge_debevec(images_, times_, response_, memory_cap_)
+                    hdr_helper.tonemap_gamma(radiance_, 2.2, memory_cap_)
+                    del radiance_
+                else:
+                    report_ = hdr_helper.merge_mertens(images_, memory_cap_=memory_cap_)[1]
+                # Timed here, because the report of Debevec does not include the tone mapping
+                seconds_.append(time.perf_counter() - start_)
+                peak_bytes_ = max(peak_bytes_, hdr_helper.peak_rss())
+
+            key_ = f'hdr:{method_}@{width_}x{height_}'
+            results_[key_] = {'total': summarize(seconds_), 'peak_bytes': peak_bytes_,
+                              'band_rows': report_['band_rows']}
+            print(f'{key_:<32} p50 {results_[key_]["total"]["p50"]:9.2f} ms  '
+                  f'{report_["megapixels"] * 1000 / results_[key_]["total"]["p50"]:7.1f} MP/s  '
+                  f'bands of {report_["band_rows"]} rows  peak {peak_bytes_ / 2 ** 20:.0f} MB')
+
+    return {'environment': environment(),
+            'settings': {'exposures': exposures_, 'memory_cap': memory_cap_, 'repeat': repeat_},
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results_}
+
+
+def run_faces(sizes_: [],
+              frames_: int,
+              detect_every_: int,
+              image_folder_: str = None) -> dict:
+    """
+    Benchmarks the face detection of face_helper over the frames of a synthetic camera with faces, and over a folder of
+      images. The frames are processed by a detector at full size, by a detector on a downscaled image that scans only
+      the scales of the expected faces, and by that detector every few frames with tracking in between.
+    :param sizes_: list of tuples (width, height) of the frames
+    :param frames_: number of frames of each size
+    :param detect_every_: frames between full detections of the detect-then-track mode
+    :param image_folder_: folder of the images, by default the images of the course
+    :return: the benchmark, a dictionary with the environment and the results by faces:<mode>@<size> with the latency
+             per frame, and by faces:images:<mode> with the latency per image
+    """
+    results_ = {}
+    for width_, height_ in sizes_:
+        # The faces are a fifth of the height, the frames are drawn before timing
+        source_ = face_helper.FacesSource(width_, height_, frames_=frames_, size_=height_ // 5)
+        frames_list_ = [source_.draw(index_) for index_ in range(frames_)]
+        detector_ = face_helper.FaceDetector(min_face_=source_.size_ * 3 // 4, max_face_=source_.size_ * 3 // 2)
+        modes_ = {'full': face_helper.FaceDetector(detection_width_=0).detect,
+                  'pyramid': detector_.detect,
+                  'tracked': face_helper.DetectTracker(detector_, detect_every_).update}
+
+        full_mean_ = None
+        for mode_, detect_ in modes_.items():
+            seconds_, found_, hits_, expected_ = [], 0, 0, 0
+            for index_, frame_ in enumerate(frames_list_):
+                start_ = time.perf_counter()
+                boxes_ = detect_(frame_)
+                seconds_.append(time.perf_counter() - start_)
+
+                # A face is found whether a box overlaps its true box by a half
+                true_boxes_ = source_.boxes(index_).values()
+                found_ += len(boxes_)
+                hits_ += sum(any(tracking_helper.iou(box_, true_box_) >= 0.5 for box_ in boxes_)
+                             for true_box_ in true_boxes_)
+                expected_ += len(true_boxes_)
+
+            key_ = f'faces:{mode_}@{width_}x{height_}'
+            results_[key_] = {'total': summarize(seconds_), 'faces_per_second': found_ / sum(seconds_),
+                              'recall': hits_ / expected_ if expected_ else 0.}
+            full_mean_ = full_mean_ or results_[key_]['total']['mean']
+            mean_ = results_[key_]['total']['mean']
+            print(f'{key_:<32} mean {mean_:8.2f} ms  {frames_ / sum(seconds_):7.1f} frames/s  '
+                  f'{results_[key_]["faces_per_second"]:7.1f} faces/s  recall {results_[key_]["recall"]:.2f}  '
+                  f'speedup {full_mean_ / mean_:5.2f}x')
+
+    # The faces of the images are unknown, so they are only downscaled
+    image_folder_ = image_folder_ or os_helper.app_sub_folder(*IMAGE_SUB_FOLDER_)
+    images_ = [cv2.imread(path_) for path_, _ in os_helper.find_image_files(image_folder_)]
+    images_ = [image_ for image_ in images_ if image_ is not None]
+    full_mean_ = None
+    for mode_, detector_ in (('full', face_helper.FaceDetector(detection_width_=0)),
+                             ('downscaled', face_helper.FaceDetector())):
+        seconds_, found_ = [], 0
+        for image_ in images_:
+            start_ = time.perf_counter()
+            found_ += len(detector_.detect(image_))
+            seconds_.append(time.perf_counter() - start_)
+        if not seconds_:
+            break
+
+        key_ = f'faces:images:{mode_}'
+        results_[key_] = {'total': summarize(seconds_), 'faces_per_second': found_ / sum(seconds_)}
+        full_mean_ = full_mean_ or results_[key_]['total']['mean']
+        print(f'{key_:<32} mean {results_[key_]["total"]["mean"]:8.2f} ms  '
+              f'{len(images_) / sum(seconds_):7.1f} images/s  {results_[key_]["faces_per_second"]:7.1f} faces/s  '
+              f'speedup {full_mean_ / results_[key_]["total"]["mean"]:5.2f}x')
+
+    return {'environment': environment(),
+            'settings': {'frames': frames_, 'detect_every': detect_every_, 'images': len(images_),
+                         'cascade': face_helper.CASCADE_, 'detection_width': face_helper.DETECTION_WIDTH_},
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results_}
+
+
+def environment() -> dict:
+    """
+    :return: a dictionary with the versions and the platform where the benchmark runs
+    """
+    return {'python': platform.python_version(), 'opencv': cv2.__version__, 'numpy': np.__version__,
+            'platform': platform.platform(), 'processor': platform.processor(), 'opencv_threads': cv2.getNumThreads()}
+
+
+def compare(baseline_: dict,
+            benchmark_: dict,
+            threshold_: float = 0.10,
+            statistic_: str = 'p50',
+            min_difference_ms_: float = MIN_DIFFERENCE_MS_) -> []:
+    """
+    Compares a benchmark against a baseline, printing the ratio of each stage
+    :param baseline_: saved benchmark used as reference
+    :param benchmark_: benchmark to evaluate
+    :param threshold_: relative slowdown considered a regression, e.g. 0.10 is 10% slower
+    :param statistic_: latency statistic to compare, e.g. p50, p90, mean
+    :param min_difference_ms_: smallest difference in milliseconds flagged as a regression or as faster, whatever
+                               the ratio
+    :return: list of the regressions, as tuples (result key, stage, baseline ms, benchmark ms)
+    """
+    regressions_ = []
+    print(f'{"operation@size":<32} {"stage":<10} {"baseline":>10} {"current":>10} {"ratio":>7}')
+    for key_, result_ in benchmark_['results'].items():
+        baseline_result_ = baseline_['results'].get(key_)
+        if baseline_result_ is None:
+            print(f'{key_:<32} not in the baseline')
+            continue
+
+        for stage_ in STAGES_:
+            if stage_ not in result_ or stage_ not in baseline_result_:
+                continue
+            before_ = baseline_result_[stage_][statistic_]
+            after_ = result_[stage_][statistic_]
+            ratio_ = after_ / before_ if before_ else 1.
+            if abs(after_ - before_) < min_difference_ms_:
+                verdict_ = ''
+            elif ratio_ > 1 + threshold_:
+                verdict_ = 'REGRESSION'
+                regressions_.append((key_, stage_, before_, after_))
+            elif ratio_ < 1 - threshold_:
+                verdict_ = 'faster'
+            else:
+                verdict_ = ''
+            print(f'{key_:<32} {stage_:<10} {before_:10.2f} {after_:10.2f} {ratio_:7.2f} {verdict_}')
+
+        before_ = baseline_result_.get('peak_bytes', 0)
+        after_ = result_.get('peak_bytes', 0)
+        if before_ and after_ > before_ * (1 + threshold_):
+            print(f'{key_:<32} {"memory":<10} {before_ / 2 ** 20:9.1f}M {after_ / 2 ** 20:9.1f}M '
+                  f'{after_ / before_:7.2f} REGRESSION')
+            regressions_.append((key_, 'peak_bytes', before_, after_))
+
+    print(f'{len(regressions_)} regressions with a threshold of {threshold_:.0%} and {min_difference_ms_} ms on '
+          f'{statistic_}')
+    return regressions_
+
+
+def load(file_path_: str) -> dict:
+    """
+    Loads a saved benchmark
+    :param file_path_: JSON file of the benchmark
+    :return: the benchmark
+    """
+    with open(file_path_, encoding='utf-8') as file_:
+        return json.load(file_)
+
+
+def save(benchmark_: dict,
+         file_path_: str):
+    """
+    Saves a benchmark
+    :param benchmark_: the benchmark
+    :param file_path_: JSON file of the benchmark
+    """
+    with open(file_path_, 'w', encoding='utf-8') as file_:
+        json.dump(benchmark_, file_, indent=2)
+
+
+if __name__ == '__main__':
+    parser_ = argparse.ArgumentParser(description='Benchmark of the course operations.')
+    subparsers_ = parser_.add_subparsers(dest='command', required=True)
+
+    run_parser_ = subparsers_.add_parser('run', help='runs the benchmark and saves it to JSON')
+    run_parser_.add_argument('-s', '--sizes', default='640x480,1920x1080,3840x2160',
+                             help='comma-separated image sizes <width>x<height> (default: 640x480,1920x1080,3840x2160)')
+    run_parser_.add_argument('-p', '--operations', default=','.join(operations.OPERATIONS_),
+                             help=f'comma-separated operations (default: all): {", ".join(operations.OPERATIONS_)}')
+    run_parser_.add_argument('-r', '--repeat', type=int, default=20, help='timed runs per operation and size')
+    run_parser_.add_argument('-i', '--input-extension', default='.jpg', help='format of the images to decode')
+    run_parser_.add_argument('-e', '--output-extension', default='.jpg', help='format to encode the outputs')
+    run_parser_.add_argument('-o', '--output', default='benchmark.json', help='JSON file to save the benchmark')
+    run_parser_.add_argument('-b', '--baseline', help='JSON file of a saved benchmark to compare against')
+    run_parser_.add_argument('-t', '--threshold', type=float, default=0.10, help='relative slowdown to flag')
+
+    imports_parser_ = subparsers_.add_parser('imports', help='measures the cold import time of the packages')
+    imports_parser_.add_argument('-m', '--modules', default=','.join(IMPORT_MODULES_),
+                                 help=f'comma-separated modules (default: {",".join(IMPORT_MODULES_)})')
+    imports_parser_.add_argument('-r', '--repeat', type=int, default=10, help='new interpreters per module')
+    imports_parser_.add_argument('-o', '--output', default='benchmark_imports.json',
+                                 help='JSON file to save the benchmark')
+    imports_parser_.add_argument('-b', '--baseline', help='JSON file of a saved benchmark to compare against')
+    imports_parser_.add_argument('-t', '--threshold', type=float, default=0.10, help='relative slowdown to flag')
+
+    filters_parser_ = subparsers_.add_parser('filters', help='compares the filters applied to the whole image and in '
+                                                             'tiles on a pool of threads')
+    filters_parser_.add_argument('-s', '--sizes', default='1920x1080,7680x4320',
+                                 help='comma-separated image sizes <width>x<height> (default: 1920x1080,7680x4320)')
+    filters_parser_.add_argument('-f', '--filters', default=','.join(filter_helper.FILTERS_),
+                                 help=f'comma-separated filters (default: all): {", ".join(filter_helper.FILTERS_)}')
+    filters_parser_.add_argument('-k', '--ksize', type=int, default=0,
+                                 help='kernel size of the filters that have one (default: the default of each filter)')
+    filters_parser_.add_argument('--tile-size', type=int, default=filter_helper.TILE_SIZE_,
+                                 help=f'width and height of the tiles (default: {filter_helper.TILE_SIZE_})')
+    filters_parser_.add_argument('-r', '--repeat', type=int, default=10, help='timed runs per filter, size and mode')
+    filters_parser_.add_argument('-o', '--output', default='benchmark_filters.json',
+                                 help='JSON file to save the benchmark')
+    filters_parser_.add_argument('-b', '--baseline', help='JSON file of a saved benchmark to compare against')
+    filters_parser_.add_argument('-t', '--threshold', type=float, default=0.10, help='relative slowdown to flag')
+
+    parallel_parser_ = subparsers_.add_parser('parallel', help='measures the throughput in worker processes, passing '
+                                                               'the images pickled or through shared memory')
+    parallel_parser_.add_argument('-s', '--sizes', default='1920x1080,3840x2160',
+                                  help='comma-separated image sizes <width>x<height> (default: 1920x1080,3840x2160)')
+    parallel_parser_.add_argument('-p', '--operations', default='flip,hue_sweep',
+                                  help='comma-separated operations (default: flip,hue_sweep)')
+    parallel_parser_.add_argument('-w', '--workers', type=int, default=os.cpu_count(),
+                                  help='number of worker processes (default: number of cores)')
+    parallel_parser_.add_argument('-n', '--images', type=int, default=32, help='images per timed run')
+    parallel_parser_.add_argument('-r', '--repeat', type=int, default=3, help='timed runs per operation and size')
+    parallel_parser_.add_argument('-o', '--output', default='benchmark_parallel.json',
+                                  help='JSON file to save the benchmark')
+    parallel_parser_.add_argument('-b', '--baseline', help='JSON file of a saved benchmark to compare against')
+    parallel_parser_.add_argument('-t', '--threshold', type=float, default=0.10, help='relative slowdown to flag')
+
+    hdr_parser_ = subparsers_.add_parser('hdr', help='measures the throughput and the peak memory of the HDR merges')
+    hdr_parser_.add_argument('-s', '--sizes', default='1920x1080,7680x5200',
+                             help='comma-separated image sizes <width>x<height> (default: 1920x1080,7680x5200)')
+    hdr_parser_.add_argument('-n', '--exposures', type=int, default=9, help='exposures of each stack (default: 9)')
+    hdr_parser_.add_argument('-m', '--methods', default='debevec,mertens',
+                             help='comma-separated methods (default: debevec,mertens)')
+    hdr_parser_.add_argument('-c', '--memory-cap', type=int, default=hdr_helper.MEMORY_CAP_ // 2 ** 20,
+                             help=f'cap of the working memory of the merges in MB '
+                                  f'(default: {hdr_helper.MEMORY_CAP_ // 2 ** 20})')
+    hdr_parser_.add_argument('-r', '--repeat', type=int, default=1, help='timed runs per method and size')
+    hdr_parser_.add_argument('-o', '--output', default='benchmark_hdr.json', help='JSON file to save the benchmark')
+    hdr_parser_.add_argument('-b', '--baseline', help='JSON file of a saved benchmark to compare against')
+    hdr_parser_.add_argument('-t', '--threshold', type=float, default=0.10, help='relative slowdown to flag')
+
+    faces_parser_ = subparsers_.add_parser('faces', help='compares the face detection at full size, downscaled, and '
+                                                         'downscaled with tracking between detections')
+    faces_parser_.add_argument('-s', '--sizes', default='640x480,1920x1080',
+                               help='comma-separated frame sizes <width>x<height> (default: 640x480,1920x1080)')
+    faces_parser_.add_argument('-n', '--frames', type=int, default=150, help='frames per size (default: 150)')
+    faces_parser_.add_argument('-d', '--detect-every', type=int, default=10,
+                               help='frames between full detections when tracking (default: 10)')
+    faces_parser_.add_argument('-i', '--images', help='folder of the images (default: the images of the course)')
+    faces_parser_.add_argument('-o', '--output', default='benchmark_faces.json', help='JSON file to save the benchmark')
+    faces_parser_.add_argument('-b', '--baseline', help='JSON file of a saved benchmark to compare against')
+    faces_parser_.add_argument('-t', '--threshold', type=float, default=0.10, help='relative slowdown to flag')
+
+    compare_parser_ = subparsers_.add_parser('compare', help='compares a saved benchmark against a baseline')
+    compare_parser_.add_argument('baseline', help='JSON file of the baseline benchmark')
+    compare_parser_.add_argument('benchmark', help='JSON file of the benchmark to evaluate')
+    compare_parser_.add_argument('-t', '--threshold', type=float, default=0.10, help='relative slowdown to flag')
+    compare_parser_.add_argument('--statistic', default='p50', help='latency statistic to compare (default: p50)')
+    compare_parser_.add_argument('--min-difference', type=float, default=MIN_DIFFERENCE_MS_,
+                                 help=f'smallest slowdown in milliseconds to flag (default: {MIN_DIFFERENCE_MS_})')
+
+    args_ = parser_.parse_args()
+
+    if args_.command in ('run', 'parallel'):
+        operation_names_ = [name_.strip() for name_ in args_.operations.split(',') if name_.strip()]
+        unknown_names_ = [name_ for name_ in operation_names_ if name_ not in operations.OPERATIONS_]
+        if unknown_names_:
+            print(f'Unknown operations: {", ".join(unknown_names_)}')
+            sys.exit(2)
+
+    if args_.command == 'run':
+        benchmark_ = run(parse_sizes(args_.sizes), operation_names_, max(1, args_.repeat), args_.input_extension,
+                         args_.output_extension)
+        save(benchmark_, args_.output)
+        print(f'Benchmark saved to {args_.output}')
+        regressions_ = compare(load(args_.baseline), benchmark_, args_.threshold) if args_.baseline else []
+    elif args_.command == 'filters':
+        filter_names_ = [name_.strip() for name_ in args_.filters.split(',') if name_.strip()]
+        unknown_names_ = [name_ for name_ in filter_names_ if name_ not in filter_helper.FILTERS_]
+        if unknown_names_:
+            print(f'Unknown filters: {", ".join(unknown_names_)}')
+            sys.exit(2)
+
+        benchmark_ = run_filters(parse_sizes(args_.sizes), filter_names_, max(1, args_.repeat), args_.ksize,
+                                 args_.tile_size)
+        save(benchmark_, args_.output)
+        print(f'Benchmark saved to {args_.output}')
+        regressions_ = compare(load(args_.baseline), benchmark_, args_.threshold) if args_.baseline else []
+    elif args_.command == 'parallel':
+        benchmark_ = run_parallel(parse_sizes(args_.sizes), operation_names_, max(1, args_.images),
+                                  max(1, args_.workers), max(1, args_.repeat))
+        save(benchmark_, args_.output)
+        print(f'Benchmark saved to {args_.output}')
+        regressions_ = compare(load(args_.baseline), benchmark_, args_.threshold) if args_.baseline else []
+    elif args_.command == 'hdr':
+        methods_ = [name_.strip() for name_ in args_.methods.split(',') if name_.strip()]
+        unknown_names_ = [name_ for name_ in methods_ if name_ not in ('debevec', 'mertens')]
+        if unknown_names_:
+            print(f'Unknown methods: {", ".join(unknown_names_)}')
+            sys.exit(2)
+
+        benchmark_ = run_hdr(parse_sizes(args_.sizes), max(2, args_.exposures), methods_, args_.memory_cap * 2 ** 20,
+                             max(1, args_.repeat))
+        save(benchmark_, args_.output)
+        print(f'Benchmark saved to {args_.output}')
+        regressions_ = compare(load(args_.baseline), benchmark_, args_.threshold) if args_.baseline else []
+    elif args_.command == 'faces':
+        benchmark_ = run_faces(parse_sizes(args_.sizes), max(1, args_.frames), max(1, args_.detect_every), args_.images)
+        save(benchmark_, args_.output)
+        print(f'Benchmark saved to {args_.output}')
+        regressions_ = compare(load(args_.baseline), benchmark_, args_.threshold) if args_.baseline else []
+    elif args_.command == 'imports':
+        module_names_ = [name_.strip() for name_ in args_.modules.split(',') if name_.strip()]
+        benchmark_ = run_imports(module_names_, max(1, args_.repeat))
+        save(benchmark_, args_.output)
+        print(f'Benchmark saved to {args_.output}')
+        regressions_ = compare(load(args_.baseline), benchmark_, args_.threshold) if args_.baseline else []
+    else:
+        regressions_ = compare(load(args_.baseline), load(args_.benchmark), args_.threshold, args_.statistic,
+                               args_.min_difference)
+
+    # Terminate with error if there are regressions
+    sys.exit(1 if regressions_ else 0)
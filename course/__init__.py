@@ -1,6 +1,23 @@
 # -*- coding: utf-8 -*-
+# The course modules are imported lazily, on first access (e.g. course.module_01), so that a process only pays the
+#  import time of the modules it uses.
 
-from . import module_01
-from . import module_02
-from . import module_03
-from . import module_04
+# --- Python modules ---
+# importlib: implementation of import, import_module imports a module by name.
+import importlib
+
+_MODULES_ = ('module_01', 'module_02', 'module_03', 'module_04', 'module_05', 'module_06', 'module_07', 'module_08',
+             'module_09', 'module_10', 'module_11', 'module_12', 'operations')
+
+__all__ = list(_MODULES_)
+
+
+def __getattr__(name_: str):
+    # Import the module on first access, then it is an attribute of the package and this function is not called again
+    if name_ in _MODULES_:
+        return importlib.import_module(f'.{name_}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name_!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,3 +1,6 @@
 # -*- coding: utf-8 -*-
 
 IMAGE_SUB_FOLDER_ = ['images', 'tinified']
+VIDEO_SUB_FOLDER_ = ['videos']
+FEATURE_CACHE_SUB_FOLDER_ = ['cache', 'features']
+DERIVED_CACHE_SUB_FOLDER_ = ['cache', 'derived']
@@ -5,12 +5,30 @@
 # cv2: OpenCV library for computer vision, machine learning, and image processing.
 #      It can process images and videos to identify objects, faces, or even the handwriting of a human.
 import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
 
 # --- App modules ---
-from .constants import IMAGE_SUB_FOLDER_
-from helper import show_helper, os_helper
+from .constants import DERIVED_CACHE_SUB_FOLDER_, IMAGE_SUB_FOLDER_
+from helper import buffer_helper, channel_helper, derived_cache_helper, image_helper, lut_helper
+from helper import show_helper, os_helper, trace_helper, writer_helper
+
+# Cache of the derived images, created on first use, since it scans its folder
+_derived_cache_ = {'cache': None}
+
+
+def _derived_cache() -> derived_cache_helper.DerivedCache:
+    if _derived_cache_['cache'] is None:
+        folder_ = os_helper.app_sub_folder(*DERIVED_CACHE_SUB_FOLDER_)
+        _derived_cache_['cache'] = derived_cache_helper.DerivedCache(folder_)
+    return _derived_cache_['cache']
 
 
+@trace_helper.traced
 def plot_image(image_file_: str,
                cv2_flag_: int,
                plot_color_map_: str = "",
@@ -26,7 +44,7 @@ def plot_image(image_file_: str,
 
     if file_exists_:
         # Load image with OpenCV
-        image_ = cv2.imread(full_image_path_, cv2_flag_)
+        image_ = image_helper.read_image(full_image_path_, cv2_flag_)
 
         # Display image attributes
         print('Image dimensions:', image_.shape)
@@ -50,10 +68,12 @@ def plot_image(image_file_: str,
         if cv2_flag_ == cv2.IMREAD_COLOR:
             # matplotlib expects the image in RGB format while OpenCV stores images in BGR format.
             # Therefore, for a correct display, it will be necessary to invert the image channels.
-            # image_ = image_[:, :, ::-1]  # ..-1 is used to revert / invert  order
+            # image_ = image_[:, :, ::-1]  # ..-1 is used to revert / invert  order, but it is a negative-stride view
+            #                                 that is copied implicitly every time it is displayed
 
-            # Another way could be
-            image_ = cv2.cvtColor(image_, cv2.COLOR_BGR2RGB)
+            # Another way could be cv2.cvtColor(image_, cv2.COLOR_BGR2RGB), which is what channel_helper does once, as
+            #  a contiguous image that is reused while the read-only image is cached
+            image_ = channel_helper.swap_rb(image_)
 
         # Show image
         show_helper.plt_show([image_], [image_file_], [plot_color_map_])
@@ -62,6 +82,7 @@ def plot_image(image_file_: str,
         print(f'There is not file {full_image_path_}')
 
 
+@trace_helper.traced
 def split_image(image_file_: str):
     """
     Splits the image into the B,G,R components
@@ -71,13 +92,11 @@ def split_image(image_file_: str):
 
     if file_exists_:
         # Load image with OpenCV in default mode
-        image_ = cv2.imread(full_image_path_)
+        image_ = image_helper.read_image(full_image_path_)
 
-        # Split the image into the B,G,R components
-        b_channel_, g_channel_, r_channel_ = cv2.split(image_)
-
-        # Merge the individual channels into a BGR image
-        image_ = cv2.merge((b_channel_, g_channel_, r_channel_))
+        # Split the image into the B,G,R components, as views on its pixels. cv2.split would copy each channel, and
+        #  cv2.merge((b_channel_, g_channel_, r_channel_)) would rebuild the image we already have.
+        b_channel_, g_channel_, r_channel_ = channel_helper.channels(image_)
 
         # Prepare display the image and channels
         images_titles_ = ['Red channel', 'Green channel', 'Blue channel', 'Full Merged Image']
@@ -85,7 +104,7 @@ def split_image(image_file_: str):
 
         # Show images with matplotlib
         # Invert the image channels for a correct display with matplotlib
-        images_ = [b_channel_, g_channel_, r_channel_, image_[:, :, ::-1]]
+        images_ = [b_channel_, g_channel_, r_channel_, channel_helper.swap_rb(image_)]
         show_helper.plt_show(images_, images_titles_, color_maps_)
 
         # Show images with OpenCV
@@ -96,6 +115,7 @@ def split_image(image_file_: str):
         print(f'There is not file {full_image_path_}')
 
 
+@trace_helper.traced
 def convert_color_space(image_file_: str):
     """
     Converts color space of the image to HSV and split it into the Hue,Saturation,Value components
@@ -105,16 +125,18 @@ def convert_color_space(image_file_: str):
 
     if file_exists_:
         # Load image with OpenCV in default mode
-        image_ = cv2.imread(full_image_path_)
+        image_ = image_helper.read_image(full_image_path_)
 
         # Convert an image from one color space (BGR) to another (HSV)
-        hsv_image_ = cv2.cvtColor(image_, cv2.COLOR_BGR2HSV)
+        with trace_helper.span(trace_helper.COLOR_):
+            hsv_image_ = cv2.cvtColor(image_, cv2.COLOR_BGR2HSV)
 
         # Split the image into the H,S,V components
         # hue (matiz): represents the color of the image
         # saturation: represents the intensity of the color, it can be thought as pure red versus dull (apagado) red
         # value: represents the bright (brillo/luminosidad), how light or dark is irrespective of the color itself
-        hue_channel_, saturation_channel_, value_channel_ = cv2.split(hsv_image_)
+        # The channels are views on the pixels of the HSV image, without copies
+        hue_channel_, saturation_channel_, value_channel_ = channel_helper.channels(hsv_image_)
 
         # Prepare display the images
         images_titles_ = ['Hue channel', 'Saturation channel', 'Value channel', 'HSV Image', 'Original Image']
@@ -122,13 +144,15 @@ def convert_color_space(image_file_: str):
 
         # Show images with matplotlib
         # Invert the image channels for a correct display with matplotlib
-        images_ = [hue_channel_, saturation_channel_, value_channel_, hsv_image_[:, :, ::-1], image_[:, :, ::-1]]
+        images_ = [hue_channel_, saturation_channel_, value_channel_, channel_helper.swap_rb(hsv_image_),
+                   channel_helper.swap_rb(image_)]
         show_helper.plt_show(images_, images_titles_, color_maps_)
 
     else:
         print(f'There is not file {full_image_path_}')
 
 
+@trace_helper.traced
 def modify_hue_channel(image_file_: str,
                        increment_: int,
                        save_: bool = False):
@@ -142,23 +166,25 @@ def modify_hue_channel(image_file_: str,
 
     if file_exists_:
         # Load image with OpenCV in default mode
-        image_ = cv2.imread(full_image_path_)
+        image_ = image_helper.read_image(full_image_path_)
 
         # Convert an image from one color space (BGR) to another (HSV)
-        hsv_image_ = cv2.cvtColor(image_, cv2.COLOR_BGR2HSV)
+        with trace_helper.span(trace_helper.COLOR_):
+            hsv_image_ = cv2.cvtColor(image_, cv2.COLOR_BGR2HSV)
 
-        # Split the image into the H,S,V components
-        hue_channel_, saturation_channel_, value_channel_ = cv2.split(hsv_image_)
+        # Modify hue channel shifting the color spectrum, in a single pass with a lookup table that only changes the
+        #  hue channel, without splitting and merging channel copies.
+        # The hue values of OpenCV are in the range [0, 179], so they wrap around modulo 180.
+        new_hsv_image_ = lut_helper.apply_lut(hsv_image_, lut_helper.hue_lut(increment_))
 
-        # Modify hue channel shifting the color spectrum
-        new_hue_channel_ = hue_channel_ + increment_
+        # Get the H components, as views on the HSV images
+        hue_channel_ = channel_helper.channel(hsv_image_, 0)
+        new_hue_channel_ = channel_helper.channel(new_hsv_image_, 0)
         print(hue_channel_[:1, :10], '\t', new_hue_channel_[:1, :10])
 
-        # Merge new HSV image
-        new_hsv_image_ = cv2.merge((new_hue_channel_, saturation_channel_, value_channel_))
-
         # Convert to BGR color space
-        new_image_ = cv2.cvtColor(new_hsv_image_, cv2.COLOR_HSV2BGR)
+        with trace_helper.span(trace_helper.COLOR_):
+            new_image_ = cv2.cvtColor(new_hsv_image_, cv2.COLOR_HSV2BGR)
 
         # Prepare display the images
         images_titles_ = ['Hue channel', 'New Hue channel', 'HSV Image', 'New HSV Image', 'Original Image', 'New image']
@@ -167,8 +193,8 @@ def modify_hue_channel(image_file_: str,
         # Show images with matplotlib
         # Invert the image channels for a correct display with matplotlib
         images_ = [hue_channel_, new_hue_channel_,
-                   hsv_image_[:, :, ::-1], new_hsv_image_[:, :, ::-1],
-                   image_[:, :, ::-1], new_image_[:, :, ::-1]]
+                   channel_helper.swap_rb(hsv_image_), channel_helper.swap_rb(new_hsv_image_),
+                   channel_helper.swap_rb(image_), channel_helper.swap_rb(new_image_)]
         show_helper.plt_show(images_, images_titles_, color_maps_)
 
         # Show images with OpenCV
@@ -177,7 +203,64 @@ def modify_hue_channel(image_file_: str,
 
         # Save the image, but not save
         if save_:
-            cv2.imwrite(full_image_path_.replace(image_file_, f'new_{image_file_}'), new_image_)
+            # The new image is kept in the cache of derived images, by the content of the source and the increment, so
+            #  saving it again copies the encoded image instead of encoding it again
+            new_image_path_ = full_image_path_.replace(image_file_, f'new_{image_file_}')
+            extension_ = os.path.splitext(image_file_)[1]
+            cache_ = _derived_cache()
+            key_ = cache_.key(derived_cache_helper.file_hash(full_image_path_), 'modify_hue_channel',
+                              {'increment': increment_,
+                               'encoder': writer_helper.encode_parameters(extension_)}, extension_)
+            with trace_helper.span(trace_helper.OUTPUT_):
+                if not cache_.export(key_, new_image_path_):
+                    # Encoded and written by the threads of the shared writer, which are flushed at exit
+                    writer_helper.shared_writer().write(new_image_path_, new_image_,
+                                                        lambda data_: cache_.put(key_, data_.tobytes()))
 
     else:
         print(f'There is not file {full_image_path_}')
+
+
+@trace_helper.traced
+def shift_hue(image_,
+              increment_: int,
+              dst_=None,
+              hsv_dst_=None):
+    """
+    Shifts the color spectrum of a BGR image modifying its Hue channel
+    :param image_: BGR image to modify
+    :param increment_: to modify hue channel, in OpenCV hue units (2 degrees)
+    :param dst_: optional destination array with the same shape as the image
+    :param hsv_dst_: optional buffer with the same shape as the image, for the intermediate HSV image
+    :return: the new BGR image, or dst_ if it was given
+    """
+    # Convert an image from one color space (BGR) to another (HSV), shift its hue in place and convert it back
+    with trace_helper.span(trace_helper.COLOR_):
+        hsv_image_ = cv2.cvtColor(image_, cv2.COLOR_BGR2HSV,
+                                  dst=buffer_helper.check_destination(hsv_dst_, image_.shape, image_.dtype))
+    lut_helper.apply_lut(hsv_image_, lut_helper.hue_lut(increment_), dst_=hsv_image_)
+    with trace_helper.span(trace_helper.COLOR_):
+        return cv2.cvtColor(hsv_image_, cv2.COLOR_HSV2BGR,
+                            dst=buffer_helper.check_destination(dst_, image_.shape, image_.dtype))
+
+
+@trace_helper.traced
+def shift_hue_variants(image_,
+                       increments_: []) -> []:
+    """
+    Shifts the color spectrum of a BGR image by several increments, converting it to HSV only once
+    :param image_: BGR image to modify
+    :param increments_: increments to modify hue channel, in OpenCV hue units (2 degrees)
+    :return: list with a new BGR image for each increment
+    """
+    with trace_helper.span(trace_helper.COLOR_):
+        hsv_image_ = cv2.cvtColor(image_, cv2.COLOR_BGR2HSV)
+    # Buffer reused by all the variants for their shifted HSV image
+    new_hsv_image_ = np.empty_like(hsv_image_)
+
+    new_images_ = []
+    for increment_ in increments_:
+        lut_helper.apply_lut(hsv_image_, lut_helper.hue_lut(increment_), dst_=new_hsv_image_)
+        with trace_helper.span(trace_helper.COLOR_):
+            new_images_.append(cv2.cvtColor(new_hsv_image_, cv2.COLOR_HSV2BGR))
+    return new_images_
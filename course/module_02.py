@@ -8,9 +8,10 @@ import cv2
 
 # --- App modules ---
 from .constants import IMAGE_SUB_FOLDER_
-from helper import show_helper, os_helper
+from helper import buffer_helper, image_helper, show_helper, os_helper, trace_helper
 
 
+@trace_helper.traced
 def modify_pixels(image_file_: str):
     """
     Accesses a pixel in a numpy matrix, using
@@ -22,13 +23,10 @@ def modify_pixels(image_file_: str):
 
     if file_exists_:
         # Load image with OpenCV
-        image_ = cv2.imread(full_image_path_, cv2.IMREAD_GRAYSCALE)
+        image_ = image_helper.read_image(full_image_path_, cv2.IMREAD_GRAYSCALE)
 
-        # Copy image
-        image_copy_ = image_.copy()
-
-        # Modify cells [2,2], [2,3], [3,2], [3,3]
-        image_copy_[2:4, 2:4] = 200
+        # Copy image, and modify cells [2,2], [2,3], [3,2], [3,3]
+        image_copy_ = set_pixels(image_, 200)
         print(image_copy_)
 
         # Prepare display the images
@@ -41,6 +39,7 @@ def modify_pixels(image_file_: str):
         print(f'There is not file {full_image_path_}')
 
 
+@trace_helper.traced
 def crop_image(image_file_: str,
                top_cut_percentage_: float,
                bottom_cut_percentage_: float,
@@ -68,19 +67,11 @@ def crop_image(image_file_: str,
             return
 
         # Load image with OpenCV
-        image_ = cv2.imread(full_image_path_, cv2.IMREAD_COLOR)
-
-        # Identify dimensions
-        height_, width_, _ = image_.shape
-
-        # Set cutting edges
-        top = int(height_ * top_cut_percentage_)
-        bottom = int(height_ * (1 - bottom_cut_percentage_))
-        left_ = int(width_ * left_cut_percentage_)
-        right_ = int(width_ * (1 - cut_right_percentage_))
+        image_ = image_helper.read_image(full_image_path_, cv2.IMREAD_COLOR)
 
         # Crop
-        cropped_image_ = image_[top:bottom, left_:right_]
+        cropped_image_ = crop(image_, top_cut_percentage_, bottom_cut_percentage_, left_cut_percentage_,
+                              cut_right_percentage_)
 
         # Prepare display the images
         images_titles_ = ['Original Image', 'Cropped Image']
@@ -92,6 +83,7 @@ def crop_image(image_file_: str,
         print(f'There is not file {full_image_path_}')
 
 
+@trace_helper.traced
 def resize_image(image_file_: str,
                  resize_factor_:  float):
     """
@@ -108,23 +100,11 @@ def resize_image(image_file_: str,
             return
 
         # Load image with OpenCV
-        image_ = cv2.imread(full_image_path_, cv2.IMREAD_COLOR)
-
-        # Resize image reducing it, maintaining aspect ratio and using the scale factors parameters
-        #   x (horizontal) and y (vertical)
-        # To shrink an image, it will generally look best with INTER_AREA interpolation
-        reduced_image_ = cv2.resize(image_, dsize=None, fx=resize_factor_, fy=resize_factor_,
-                                    interpolation=cv2.INTER_AREA)
-
-        # Get a new bigger size maintaining aspect ratio
-        aspect_ratio_factor_ = 1 + resize_factor_
-        desired_height_ = int(image_.shape[0] * aspect_ratio_factor_)
-        desired_width_ = int(image_.shape[1] * aspect_ratio_factor_)
-        desired_size_ = (desired_width_, desired_height_)
-        # Resize image increasing it. maintaining aspect ratio and using desired size parameter (dsize)
-        # To enlarge an image, it will generally look best with INTER_CUBIC interpolation
-        #  (slow) or #INTER_LINEAR (faster but still looks OK)
-        increased_image_ = cv2.resize(image_, dsize=desired_size_, interpolation=cv2.INTER_CUBIC)
+        image_ = image_helper.read_image(full_image_path_, cv2.IMREAD_COLOR)
+
+        # Resize image reducing and increasing it
+        reduced_image_ = reduce(image_, resize_factor_)
+        increased_image_ = enlarge(image_, resize_factor_)
 
         # Prepare display the images
         images_titles_ = ['Original Image', 'Reduced Image', 'Increased Image']
@@ -136,6 +116,7 @@ def resize_image(image_file_: str,
         print(f'There is not file {full_image_path_}')
 
 
+@trace_helper.traced
 def flip_image(image_file_: str):
     """
     Flips image in the three directions
@@ -145,16 +126,16 @@ def flip_image(image_file_: str):
 
     if file_exists_:
         # Load image with OpenCV
-        image_ = cv2.imread(full_image_path_, cv2.IMREAD_COLOR)
+        image_ = image_helper.read_image(full_image_path_, cv2.IMREAD_COLOR)
 
         # flipCode`: a flag to specify how to flip the array:
         #   0 means flipping around the x-axis,
         #   1 or positive value  means flipping around y-axis,
         #  -1 or negative value means flipping around both axes.
 
-        image_flipped_horizontally_ = cv2.flip(image_, 1)
-        image_flipped_vertically_ = cv2.flip(image_, 0)
-        image_flipped_both = cv2.flip(image_, -1)
+        image_flipped_horizontally_ = flip(image_, 1)
+        image_flipped_vertically_ = flip(image_, 0)
+        image_flipped_both = flip(image_, -1)
 
         # Prepare display the images
         images_titles_ = ['Original Image', 'Image Flipped Horizontally', 'Image Flipped Vertically',
@@ -166,3 +147,115 @@ def flip_image(image_file_: str):
 
     else:
         print(f'There is not file {full_image_path_}')
+
+
+@trace_helper.traced
+def crop(image_,
+         top_cut_percentage_: float,
+         bottom_cut_percentage_: float,
+         left_cut_percentage_: float,
+         cut_right_percentage_: float):
+    """
+    Crops an image selecting a specific (pixel) region of it, without copying pixels
+    :param image_: image to crop
+    :param top_cut_percentage_: top side cut percentage, value between 0 and 1
+    :param bottom_cut_percentage_: bottom side cut percentage, value between 0 and 1
+    :param left_cut_percentage_: left side cut percentage, value between 0 and 1
+    :param cut_right_percentage_: right side cut percentage, value between 0 and 1
+    :return: the cropped image, a view on the pixels of the original image
+    """
+    # Identify dimensions
+    height_, width_ = image_.shape[:2]
+
+    # Set cutting edges
+    top_ = int(height_ * top_cut_percentage_)
+    bottom_ = int(height_ * (1 - bottom_cut_percentage_))
+    left_ = int(width_ * left_cut_percentage_)
+    right_ = int(width_ * (1 - cut_right_percentage_))
+
+    # Crop
+    return image_[top_:bottom_, left_:right_]
+
+
+@trace_helper.traced
+def reduce(image_,
+           resize_factor_: float,
+           dst_=None):
+    """
+    Reduces an image maintaining aspect ratio
+    :param image_: image to reduce
+    :param resize_factor_: scale factor of the reduced image, its value must be between 0 and 1
+    :param dst_: optional destination array with the shape of the reduced image
+    :return: the reduced image, or dst_ if it was given
+    """
+    # Resize image reducing it, maintaining aspect ratio and using the scale factors parameters
+    #   x (horizontal) and y (vertical)
+    # To shrink an image, it will generally look best with INTER_AREA interpolation
+    if dst_ is None:
+        with trace_helper.span(trace_helper.GEOMETRY_):
+            return cv2.resize(image_, dsize=None, fx=resize_factor_, fy=resize_factor_, interpolation=cv2.INTER_AREA)
+
+    # The size OpenCV computes from the scale factors, which the destination must have
+    height_, width_ = image_.shape[:2]
+    reduced_size_ = (round(width_ * resize_factor_), round(height_ * resize_factor_))
+    buffer_helper.check_destination(dst_, (reduced_size_[1], reduced_size_[0]) + image_.shape[2:], image_.dtype)
+    # The scale factors are passed again, since OpenCV interpolates differently when it is given the size instead
+    with trace_helper.span(trace_helper.GEOMETRY_):
+        return cv2.resize(image_, dsize=None, dst=dst_, fx=resize_factor_, fy=resize_factor_,
+                          interpolation=cv2.INTER_AREA)
+
+
+@trace_helper.traced
+def enlarge(image_,
+            resize_factor_: float,
+            dst_=None):
+    """
+    Enlarges an image maintaining aspect ratio
+    :param image_: image to enlarge
+    :param resize_factor_: percentage to increase the size of the image, its value must be between 0 and 1
+    :param dst_: optional destination array with the shape of the enlarged image
+    :return: the enlarged image, or dst_ if it was given
+    """
+    # Get a new bigger size maintaining aspect ratio
+    aspect_ratio_factor_ = 1 + resize_factor_
+    desired_height_ = int(image_.shape[0] * aspect_ratio_factor_)
+    desired_width_ = int(image_.shape[1] * aspect_ratio_factor_)
+    desired_size_ = (desired_width_, desired_height_)
+    buffer_helper.check_destination(dst_, (desired_height_, desired_width_) + image_.shape[2:], image_.dtype)
+    # Resize image increasing it. maintaining aspect ratio and using desired size parameter (dsize)
+    # To enlarge an image, it will generally look best with INTER_CUBIC interpolation
+    #  (slow) or #INTER_LINEAR (faster but still looks OK)
+    with trace_helper.span(trace_helper.GEOMETRY_):
+        return cv2.resize(image_, dsize=desired_size_, dst=dst_, interpolation=cv2.INTER_CUBIC)
+
+
+@trace_helper.traced
+def flip(image_,
+         flip_code_: int,
+         dst_=None):
+    """
+    Flips an image
+    :param image_: image to flip
+    :param flip_code_: 0 flips around the x-axis, a positive value around the y-axis, a negative value around both
+    :param dst_: optional destination array with the same shape as the image, it can be the image itself
+    :return: the flipped image, or dst_ if it was given
+    """
+    with trace_helper.span(trace_helper.GEOMETRY_):
+        return cv2.flip(image_, flip_code_, dst=buffer_helper.check_destination(dst_, image_.shape, image_.dtype))
+
+
+@trace_helper.traced
+def set_pixels(image_,
+               value_: int,
+               dst_=None):
+    """
+    Copies an image, and sets the cells [2,2], [2,3], [3,2], [3,3] of the copy to a value
+    :param image_: image to copy
+    :param value_: new value of the cells
+    :param dst_: optional destination array for the copy, with the same shape as the image
+    :return: the modified copy, dst_ if it was given
+    """
+    image_copy_ = buffer_helper.copy(image_, dst_)
+    image_copy_[2:4, 2:4] = value_
+    return image_copy_
+
@@ -8,9 +8,10 @@ import cv2
 
 # --- App modules ---
 from .constants import IMAGE_SUB_FOLDER_
-from helper import show_helper, os_helper
+from helper import annotation_helper, buffer_helper, image_helper, show_helper, os_helper, text_helper, trace_helper
 
 
+@trace_helper.traced
 def draw_line(image_file_: str):
     """
     Annotates an image drawing a line on it
@@ -20,22 +21,10 @@ def draw_line(image_file_: str):
 
     if file_exists_:
         # Load image with OpenCV. Image is grayscale, but is read in color because it will be annotated in color.
-        image_ = cv2.imread(full_image_path_, cv2.IMREAD_COLOR)
-
-        # clone image to work on it
-        image_line_ = image_.copy()
-        
-        # Draw a line on the image which starts from (200,100) and ends at (400,100), its attributes will be
-        #   Color ...: YELLOW (recall: OpenCV uses BGR format)
-        #   Thickness: 5px
-        #   Line type: cv2.LINE_AA. Antialiasing is a sophisticated technique for rendering a line involves using
-        #              partially transparent pixels along with opaque pixels, resulting in lines that the human eye
-        #              perceives as more smooth.
-        #              Visit https://hacksd.wordpress.com/2020/03/20/exploring-line-types-in-opencv/
-        point_01_ = (200, 100)
-        point_02_ = (400, 100)
-        yellow_bgr_ = (0, 255, 255)
-        cv2.line(image_line_, point_01_, point_02_, color=yellow_bgr_, thickness=5, lineType=cv2.LINE_AA)
+        image_ = image_helper.read_image(full_image_path_, cv2.IMREAD_COLOR)
+
+        # Draw on a copy of the image
+        image_line_ = annotate_line(image_)
 
         # Prepare display the images
         images_titles_ = ['Original Image', 'Annotated Image']
@@ -48,6 +37,7 @@ def draw_line(image_file_: str):
         print(f'There is not file {full_image_path_}')
 
 
+@trace_helper.traced
 def draw_circle(image_file_: str):
     """
     Annotates an image drawing a circle on it
@@ -57,21 +47,10 @@ def draw_circle(image_file_: str):
 
     if file_exists_:
         # Load image with OpenCV. Image is grayscale, but is read in color because it will be annotated in color.
-        image_ = cv2.imread(full_image_path_, cv2.IMREAD_COLOR)
-
-        # clone image to work on it
-        image_circle_ = image_.copy()
-
-        # Draw a circle on the image centered on (900,500) with radius 100, its attributes will be
-        #   Color ...: RED (recall: OpenCV uses BGR format)
-        #   Thickness: 5px
-        #   Line type: cv2.LINE_AA. Antialiasing is a sophisticated technique for rendering a line involves using
-        #              partially transparent pixels along with opaque pixels, resulting in lines that the human eye
-        #              perceives as more smooth.
-        #              Visit https://hacksd.wordpress.com/2020/03/20/exploring-line-types-in-opencv/
-        #   Thickness: of the outline if positive, but if it is negative value it will result in a filled figure.
-        red_bgr_ = (0, 0, 255)
-        cv2.circle(image_circle_, center=(900, 500), radius=100, color=red_bgr_, thickness=5, lineType=cv2.LINE_AA)
+        image_ = image_helper.read_image(full_image_path_, cv2.IMREAD_COLOR)
+
+        # Draw on a copy of the image
+        image_circle_ = annotate_circle(image_)
 
         # Prepare display the images
         images_titles_ = ['Original Image', 'Annotated Image']
@@ -84,6 +63,7 @@ def draw_circle(image_file_: str):
         print(f'There is not file {full_image_path_}')
 
 
+@trace_helper.traced
 def draw_rectangle(image_file_: str):
     """
     Annotates an image drawing a rectangle on it
@@ -93,20 +73,10 @@ def draw_rectangle(image_file_: str):
 
     if file_exists_:
         # Load image with OpenCV. Image is grayscale, but is read in color because it will be annotated in color.
-        image_ = cv2.imread(full_image_path_, cv2.IMREAD_COLOR)
-
-        # clone image to work on it
-        image_rectangle_ = image_.copy()
-
-        # Draw a rectangle on the image which starts from (500,100) and ends at (700,600), its attributes will be
-        #   Color ...: RED (recall: OpenCV uses BGR format)
-        #   Thickness: 5px
-        #   Line type: cv2.LINE_8. 8-connected pixel connectivity
-        #              Visit https://hacksd.wordpress.com/2020/03/20/exploring-line-types-in-opencv/
-        #   Thickness: of the outline if positive, but if it is negative value it will result in a filled figure.
-        rose_bgr_ = (106, 58, 243)      # https://htmlcolorcodes.com/colors/rose/ rgb(243, 58, 106)
-        cv2.rectangle(image_rectangle_, pt1=(500, 100), pt2=(700, 600), color=rose_bgr_, thickness=5,
-                      lineType=cv2.LINE_8)
+        image_ = image_helper.read_image(full_image_path_, cv2.IMREAD_COLOR)
+
+        # Draw on a copy of the image
+        image_rectangle_ = annotate_rectangle(image_)
 
         # Prepare display the images
         images_titles_ = ['Original Image', 'Annotated Image']
@@ -119,6 +89,7 @@ def draw_rectangle(image_file_: str):
         print(f'There is not file {full_image_path_}')
 
 
+@trace_helper.traced
 def put_text(image_file_: str):
     """
     Annotates an image adding text on it
@@ -128,29 +99,10 @@ def put_text(image_file_: str):
 
     if file_exists_:
         # Load image with OpenCV. Image is grayscale, but is read in color because it will be annotated in color.
-        image_ = cv2.imread(full_image_path_, cv2.IMREAD_COLOR)
-
-        # clone image to work on it
-        image_text_ = image_.copy()
-
-        # Write some text on the image, its attributes will be
-        #   Text: string to be written.
-        #   Origin ...: (50,700) bottom-left corner of the text string in the image
-        #   Font Face : is the font type
-        #   Color ....: (255, 0, 0)
-        #   Font Scale: 2.1 factor that is multiplied by the font-specific base
-        #   Thickness : 2
-        #   Line type : cv2.LINE_AA. Antialiasing is a sophisticated technique for rendering a line involves using
-        #              partially transparent pixels along with opaque pixels, resulting in lines that the human eye
-        #              perceives as more smooth.
-        #              Visit https://hacksd.wordpress.com/2020/03/20/exploring-line-types-in-opencv/
-        #   Thickness: of the outline if positive, but if it is negative value it will result in a filled figure.
-        text_ = 'Apollo 11 Saturn V Launch, July 16, 1969'
-        font_face_ = cv2.FONT_HERSHEY_DUPLEX
-        font_scale_ = 1.1
-        white_bgr_ = (255, 255, 255)
-        cv2.putText(image_text_, text_, org=(50, 700), fontFace=font_face_, fontScale=font_scale_,
-                    color=white_bgr_, thickness=2, lineType=cv2.LINE_AA)
+        image_ = image_helper.read_image(full_image_path_, cv2.IMREAD_COLOR)
+
+        # Draw on a copy of the image
+        image_text_ = annotate_text(image_)
 
         # Prepare display the images
         images_titles_ = ['Original Image', 'Annotated Image']
@@ -161,3 +113,183 @@ def put_text(image_file_: str):
 
     else:
         print(f'There is not file {full_image_path_}')
+
+
+@trace_helper.traced
+def draw_annotations(image_file_: str):
+    """
+    Annotates an image drawing a line, a circle, a rectangle and a text on it, in a single pass over one copy
+    :param image_file_: filename of the image file to process
+    """
+    file_exists_, full_image_path_ = os_helper.file_exists(image_file_, *IMAGE_SUB_FOLDER_)
+
+    if file_exists_:
+        # Load image with OpenCV. Image is grayscale, but is read in color because it will be annotated in color.
+        image_ = image_helper.read_image(full_image_path_, cv2.IMREAD_COLOR)
+
+        # Draw all the annotations on a single copy of the image
+        image_annotated_ = annotate_all(image_)
+
+        # Prepare display the images
+        images_titles_ = ['Original Image', 'Annotated Image']
+
+        # Show images with OpenCV
+        images_ = [image_, image_annotated_]
+        show_helper.cv2_show(images_, images_titles_)
+
+    else:
+        print(f'There is not file {full_image_path_}')
+
+
+@trace_helper.traced
+def annotate_line(image_,
+                  in_place_: bool = False,
+                  dst_=None):
+    """
+    Draws a yellow line on the image
+    :param image_: image to annotate
+    :param in_place_: flag to draw on the image itself, otherwise on a copy of it
+    :param dst_: optional destination array for the copy, with the same shape as the image
+    :return: the annotated image
+    """
+    # clone image to work on it, unless a copy is not needed
+    image_line_ = image_ if in_place_ else buffer_helper.copy(image_, dst_)
+
+    # Draw a line on the image which starts from (200,100) and ends at (400,100), its attributes will be
+    #   Color ...: YELLOW (recall: OpenCV uses BGR format)
+    #   Thickness: 5px
+    #   Line type: cv2.LINE_AA. Antialiasing is a sophisticated technique for rendering a line involves using
+    #              partially transparent pixels along with opaque pixels, resulting in lines that the human eye
+    #              perceives as more smooth.
+    #              Visit https://hacksd.wordpress.com/2020/03/20/exploring-line-types-in-opencv/
+    point_01_ = (200, 100)
+    point_02_ = (400, 100)
+    yellow_bgr_ = (0, 255, 255)
+    with trace_helper.span(trace_helper.DRAWING_):
+        cv2.line(image_line_, point_01_, point_02_, color=yellow_bgr_, thickness=5, lineType=cv2.LINE_AA)
+
+    return image_line_
+
+
+@trace_helper.traced
+def annotate_circle(image_,
+                    in_place_: bool = False,
+                    dst_=None):
+    """
+    Draws a red circle on the image
+    :param image_: image to annotate
+    :param in_place_: flag to draw on the image itself, otherwise on a copy of it
+    :param dst_: optional destination array for the copy, with the same shape as the image
+    :return: the annotated image
+    """
+    # clone image to work on it, unless a copy is not needed
+    image_circle_ = image_ if in_place_ else buffer_helper.copy(image_, dst_)
+
+    # Draw a circle on the image centered on (900,500) with radius 100, its attributes will be
+    #   Color ...: RED (recall: OpenCV uses BGR format)
+    #   Thickness: 5px
+    #   Line type: cv2.LINE_AA. Antialiasing is a sophisticated technique for rendering a line involves using
+    #              partially transparent pixels along with opaque pixels, resulting in lines that the human eye
+    #              perceives as more smooth.
+    #              Visit https://hacksd.wordpress.com/2020/03/20/exploring-line-types-in-opencv/
+    #   Thickness: of the outline if positive, but if it is negative value it will result in a filled figure.
+    red_bgr_ = (0, 0, 255)
+    with trace_helper.span(trace_helper.DRAWING_):
+        cv2.circle(image_circle_, center=(900, 500), radius=100, color=red_bgr_, thickness=5, lineType=cv2.LINE_AA)
+
+    return image_circle_
+
+
+@trace_helper.traced
+def annotate_rectangle(image_,
+                       in_place_: bool = False,
+                       dst_=None):
+    """
+    Draws a rose rectangle on the image
+    :param image_: image to annotate
+    :param in_place_: flag to draw on the image itself, otherwise on a copy of it
+    :param dst_: optional destination array for the copy, with the same shape as the image
+    :return: the annotated image
+    """
+    # clone image to work on it, unless a copy is not needed
+    image_rectangle_ = image_ if in_place_ else buffer_helper.copy(image_, dst_)
+
+    # Draw a rectangle on the image which starts from (500,100) and ends at (700,600), its attributes will be
+    #   Color ...: RED (recall: OpenCV uses BGR format)
+    #   Thickness: 5px
+    #   Line type: cv2.LINE_8. 8-connected pixel connectivity
+    #              Visit https://hacksd.wordpress.com/2020/03/20/exploring-line-types-in-opencv/
+    #   Thickness: of the outline if positive, but if it is negative value it will result in a filled figure.
+    rose_bgr_ = (106, 58, 243)      # https://htmlcolorcodes.com/colors/rose/ rgb(243, 58, 106)
+    with trace_helper.span(trace_helper.DRAWING_):
+        cv2.rectangle(image_rectangle_, pt1=(500, 100), pt2=(700, 600), color=rose_bgr_, thickness=5,
+                      lineType=cv2.LINE_8)
+
+    return image_rectangle_
+
+
+@trace_helper.traced
+def annotate_text(image_,
+                  in_place_: bool = False,
+                  dst_=None):
+    """
+    Writes a white caption on the image
+    :param image_: image to annotate
+    :param in_place_: flag to draw on the image itself, otherwise on a copy of it
+    :param dst_: optional destination array for the copy, with the same shape as the image
+    :return: the annotated image
+    """
+    # clone image to work on it, unless a copy is not needed
+    image_text_ = image_ if in_place_ else buffer_helper.copy(image_, dst_)
+
+    # Write some text on the image, its attributes will be
+    #   Text: string to be written.
+    #   Origin ...: (50,700) bottom-left corner of the text string in the image
+    #   Font Face : is the font type
+    #   Color ....: (255, 0, 0)
+    #   Font Scale: 2.1 factor that is multiplied by the font-specific base
+    #   Thickness : 2
+    #   Line type : cv2.LINE_AA. Antialiasing is a sophisticated technique for rendering a line involves using
+    #              partially transparent pixels along with opaque pixels, resulting in lines that the human eye
+    #              perceives as more smooth.
+    #              Visit https://hacksd.wordpress.com/2020/03/20/exploring-line-types-in-opencv/
+    #   Thickness: of the outline if positive, but if it is negative value it will result in a filled figure.
+    text_ = 'Apollo 11 Saturn V Launch, July 16, 1969'
+    font_face_ = cv2.FONT_HERSHEY_DUPLEX
+    font_scale_ = 1.1
+    white_bgr_ = (255, 255, 255)
+    # The text is rasterized once, like cv2.putText does, and kept as a sprite in a cache, so later calls with the
+    #  same text and attributes only blend it onto the image.
+    text_helper.put_text(image_text_, text_, (50, 700), font_face_, font_scale_, white_bgr_, thickness_=2,
+                         line_type_=cv2.LINE_AA)
+
+    return image_text_
+
+
+@trace_helper.traced
+def annotation_layer() -> annotation_helper.AnnotationLayer:
+    """
+    Builds the annotation layer with the line, the circle, the rectangle and the text of the demos above
+    :return: the annotation layer
+    """
+    layer_ = annotation_helper.AnnotationLayer()
+    layer_.add_line((200, 100), (400, 100), color_=(0, 255, 255), thickness_=5, line_type_=cv2.LINE_AA)
+    layer_.add_circle((900, 500), 100, color_=(0, 0, 255), thickness_=5, line_type_=cv2.LINE_AA)
+    layer_.add_rectangle((500, 100), (700, 600), color_=(106, 58, 243), thickness_=5, line_type_=cv2.LINE_8)
+    layer_.add_text('Apollo 11 Saturn V Launch, July 16, 1969', (50, 700), cv2.FONT_HERSHEY_DUPLEX, 1.1,
+                    color_=(255, 255, 255), thickness_=2, line_type_=cv2.LINE_AA)
+    return layer_
+
+
+@trace_helper.traced
+def annotate_all(image_,
+                 in_place_: bool = False,
+                 dst_=None):
+    """
+    Draws the line, the circle, the rectangle and the text of the demos on the image, in a single pass
+    :param image_: image to annotate
+    :param in_place_: flag to draw on the image itself, otherwise on a copy of it
+    :param dst_: optional destination array for the copy, with the same shape as the image
+    :return: the annotated image
+    """
+    return annotation_layer().render(image_, in_place_, dst_)
@@ -5,18 +5,13 @@
 # cv2: OpenCV library for computer vision, machine learning, and image processing.
 #      It can process images and videos to identify objects, faces, or even the handwriting of a human.
 import cv2
-# numpy: library for array processing for numbers, strings, records, and objects.
-import numpy as np
-
-# --- Python modules ---
-# textwrap: provides formatting of text by adjusting the line breaks in the input paragraph.
-import textwrap
 
 # --- App modules ---
 from .constants import IMAGE_SUB_FOLDER_
-from helper import show_helper, os_helper
+from helper import image_helper, lut_helper, show_helper, os_helper, text_helper, trace_helper
 
 
+@trace_helper.traced
 def multiply_contrast(image_file_: str):
     """
     Multiply the intensity values with a constant to in/decrease the Contrast of the image, which is the difference in
@@ -29,44 +24,32 @@ def multiply_contrast(image_file_: str):
 
     if file_exists_:
         # Load image with OpenCV. Image is grayscale, but is read in color because it will be annotated in color.
-        image_ = cv2.imread(full_image_path_, cv2.IMREAD_COLOR)
+        image_ = image_helper.read_image(full_image_path_, cv2.IMREAD_COLOR)
 
         # In/Decreasing the difference in the intensity values of the pixels of an image will result
-        #  in a global in/decrease in the contrast
-        dark_matrix_ = np.ones(image_.shape) * 0.5          # to decrease contrast
-        bright_matrix_ = np.ones(image_.shape) * 1.2        # to increase contrast
-
-        # Use multiply functions, to in/decrease contrast the matrix from de original image,
-        image_darker_ = np.uint8(cv2.multiply(np.float64(image_), dark_matrix_))
-        image_brighter_ = np.uint8(cv2.multiply(np.float64(image_), bright_matrix_))            # with overflow issue
+        #  in a global in/decrease in the contrast.
+        # The multiplication of each possible pixel value is precomputed in a lookup table, applied in a single pass.
+        image_darker_ = lut_helper.apply_lut(image_, lut_helper.contrast_lut(0.5))                  # lower contrast
+        image_brighter_ = lut_helper.apply_lut(image_, lut_helper.contrast_lut(1.2, saturate_=False))  # with overflow
 
-        # Add multiline observation about overflow issue. Wraps the text with textwrap.wrap
+        # Add multiline observation about overflow issue. Wraps the text with textwrap.wrap, through a cache
         text_ = 'The values which are already high, are becoming greater than 255. Thus, the overflow issue.'
-        wrapped_text_ = textwrap.wrap(text_, width=int(len(text_) * 0.60))
+        wrapped_text_ = text_helper.wrap_text(text_, int(len(text_) * 0.60))
         font_face_ = cv2.FONT_HERSHEY_DUPLEX
         font_scale_ = 0.8
         font_thickness_ = 1
         bgr_color_ = (0, 255, 255)            # Yellow rgb(255, 255, 0)
-        # Calculate the interlinear gap
-        text_size_ = cv2.getTextSize(wrapped_text_[0], font_face_, font_scale_, font_thickness_)[0]
-        gap_ = text_size_[1] + 5
-        # Initialize the position of the text in the image
-        left_margin_, top_margin_ = 180, 280
-        # Add lines of text
-        for line_ in wrapped_text_:
-            # Add a line of text
-            cv2.putText(image_brighter_, line_, org=(left_margin_, top_margin_), fontFace=font_face_,
-                        fontScale=font_scale_, color=bgr_color_, thickness=font_thickness_,
-                        lineType=cv2.LINE_AA)
-            # Calculate top margin for the next line
-            top_margin_ += gap_
+        # Add lines of text, separated by the height of a line plus 5 pixels. Each line is rasterized once and kept
+        #  as a sprite in a cache, so later calls only blend it onto the image.
+        text_helper.put_text_lines(image_brighter_, wrapped_text_, (180, 280), font_face_, font_scale_, bgr_color_,
+                                   font_thickness_, cv2.LINE_AA, gap_=5)
 
         # Prepare display the images
         images_titles_ = ['Original Image', 'Lower Contrast', 'Higher Contrast with Overflow',
                           'Higher Contrast with Adjusted Overflow']
 
-        # Handling Overflow using np.clip
-        image_brighter_handled = np.uint8(np.clip(cv2.multiply(np.float64(image_), bright_matrix_), 0, 255))
+        # Handling Overflow clipping the values of the table to [0, 255]
+        image_brighter_handled = lut_helper.apply_lut(image_, lut_helper.contrast_lut(1.2))
 
         # Show images with OpenCV
         images_ = [image_, image_darker_, image_brighter_, image_brighter_handled]
@@ -75,6 +58,7 @@ def multiply_contrast(image_file_: str):
         print(f'There is not file {full_image_path_}')
 
 
+@trace_helper.traced
 def add_subtract_brightness(image_file_: str):
     """
     Add/Subtract the intensity values of each pixel by the same amount to in/decreasing Brightness
@@ -84,15 +68,14 @@ def add_subtract_brightness(image_file_: str):
 
     if file_exists_:
         # Load image with OpenCV. Image is grayscale, but is read in color because it will be annotated in color.
-        image_ = cv2.imread(full_image_path_, cv2.IMREAD_COLOR)
+        image_ = image_helper.read_image(full_image_path_, cv2.IMREAD_COLOR)
 
         # In/Decreasing the intensity values of each pixel by the same amount will result
         #  in a global in/decrease in the brightness.
-        matrix = np.ones(image_.shape, dtype="uint8") * 50
-
-        # Use add & subtract functions, to add & subtract the matrix from de original image, to in/decrease brightness.
-        image_brighter_ = cv2.add(image_, matrix)
-        image_darker_ = cv2.subtract(image_, matrix)
+        # The saturated addition & subtraction of each possible pixel value are precomputed in lookup tables, like
+        #  cv2.add & cv2.subtract would do, but without allocating a full-size matrix with the amount.
+        image_brighter_ = lut_helper.apply_lut(image_, lut_helper.brightness_lut(50))
+        image_darker_ = lut_helper.apply_lut(image_, lut_helper.brightness_lut(-50))
 
         # Prepare display the images
         images_titles_ = ['Original Image', 'Image Brighter', 'Image Darker']
@@ -102,3 +85,51 @@ def add_subtract_brightness(image_file_: str):
         show_helper.cv2_show(images_, images_titles_)
     else:
         print(f'There is not file {full_image_path_}')
+
+
+@trace_helper.traced
+def change_contrast(image_,
+                    factor_: float,
+                    dst_=None):
+    """
+    Multiplies the intensity values of the image by a constant, handling the overflow
+    :param image_: image to modify
+    :param factor_: if factor > 1 the contrast is increased, but if factor < 1 it is decreased
+    :param dst_: optional destination array with the same shape as the image, it can be the image itself
+    :return: the new image, or dst_ if it was given
+    """
+    return lut_helper.apply_lut(image_, lut_helper.contrast_lut(factor_), dst_)
+
+
+@trace_helper.traced
+def change_brightness(image_,
+                      amount_: int,
+                      dst_=None):
+    """
+    Adds the same amount to the intensity values of each pixel, saturating at 0 and 255
+    :param image_: image to modify
+    :param amount_: positive value to increase the brightness, negative value to decrease it
+    :param dst_: optional destination array with the same shape as the image, it can be the image itself
+    :return: the new image, or dst_ if it was given
+    """
+    return lut_helper.apply_lut(image_, lut_helper.brightness_lut(amount_), dst_)
+
+
+@trace_helper.traced
+def adjust(image_,
+           brightness_: int = 0,
+           contrast_: float = 1.,
+           gamma_: float = 1.,
+           dst_=None):
+    """
+    Changes contrast, brightness and gamma of the image, in this order, in a single pass
+    :param image_: image to modify
+    :param brightness_: amount to add to the intensity values, positive to increase brightness or negative to decrease
+    :param contrast_: factor to multiply the intensity values, > 1 to increase contrast or < 1 to decrease it
+    :param gamma_: gamma correction, > 1 to get a brighter image or < 1 to get a darker one
+    :param dst_: optional destination array with the same shape as the image, it can be the image itself
+    :return: the new image, or dst_ if it was given
+    """
+    lut_ = lut_helper.chain_luts(lut_helper.contrast_lut(contrast_), lut_helper.brightness_lut(brightness_),
+                                 lut_helper.gamma_lut(gamma_))
+    return lut_helper.apply_lut(image_, lut_, dst_)
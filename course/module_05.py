@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Module 5: Accessing the Camera
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+
+# --- App modules ---
+from . import module_02
+from helper import buffer_helper, capture_helper, trace_helper
+
+
+@trace_helper.traced
+def show_camera(camera_index_: int = 0,
+                max_frames_: int = 300,
+                display_: bool = True) -> dict:
+    """
+    Shows the camera preview mirrored, always processing the newest frame. If the camera cannot be opened, a synthetic
+      source is used. Press q or Esc to stop.
+    The frames are read into the recycled buffers of a pool, and mirrored into the same buffer frame after frame, so
+      once the first frames are processed the loop allocates no more frames.
+    :param camera_index_: index of the camera, 0 is the default camera
+    :param max_frames_: number of frames to process before stopping
+    :param display_: flag to display or not the frames in a window
+    :return: the report of the grabber, with the frames captured, delivered and dropped, the latency, and the
+             statistics of the frame buffers
+    """
+    win_name_ = 'Camera Preview'
+    pool_ = buffer_helper.BufferPool()
+    grabber_ = capture_helper.LatestFrameGrabber(capture_helper.open_source(camera_index_), pool_=pool_)
+
+    mirrored_frame_ = None
+    for i_, frame_ in enumerate(grabber_.frames()):
+        # Mirror the frame, as a selfie preview
+        mirrored_frame_ = module_02.flip(frame_, 1, dst_=mirrored_frame_)
+
+        if display_:
+            cv2.imshow(win_name_, mirrored_frame_)
+            key_ = cv2.waitKey(1) & 0xFF
+            if key_ in (ord('q'), ord('Q'), 27):
+                break
+
+        if i_ + 1 >= max_frames_:
+            break
+
+    grabber_.stop()
+    if display_:
+        cv2.destroyWindow(win_name_)
+
+    report_ = grabber_.report()
+    report_['buffers'] = pool_.stats()
+    print('Camera frames:', {key_: value_ for key_, value_ in report_.items() if key_ not in ('latency', 'buffers')})
+    print('Capture-to-process latency (ms):', report_['latency'])
+    print('Frame buffers:', report_['buffers'])
+    return report_
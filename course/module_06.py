@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# Module 6: Read and Write Videos
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+
+# --- Python modules ---
+# collections: provides specialized container datatypes, a deque with maxlen keeps only the newest items.
+from collections import deque
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+
+# --- App modules ---
+from .constants import VIDEO_SUB_FOLDER_
+from helper import pipeline_helper, show_helper, os_helper, trace_helper, video_helper
+
+# Video synthesized when it does not exist, because the course does not include video files
+SYNTHETIC_VIDEO_FILE_ = 'synthetic.avi'
+
+
+@trace_helper.traced
+def caption_frame(frame_):
+    """
+    Writes a caption on a frame, in place
+    :param frame_: frame to annotate
+    :return: the annotated frame
+    """
+    with trace_helper.span(trace_helper.DRAWING_):
+        cv2.putText(frame_, 'Processed', org=(10, 30), fontFace=cv2.FONT_HERSHEY_DUPLEX, fontScale=0.8,
+                    color=(0, 255, 255), thickness=1, lineType=cv2.LINE_AA)
+    return frame_
+
+
+@trace_helper.traced
+def read_write_video(video_file_: str = SYNTHETIC_VIDEO_FILE_,
+                     queue_size_: int = 8):
+    """
+    Reads a video, and crops, reduces, flips, brightens and captions each frame, writing the processed video as
+      processed_<video file>. The frames are streamed through bounded queues, so the memory does not depend on the
+      length of the video.
+    :param video_file_: filename of the video file to process, the synthetic video is created if it does not exist
+    :param queue_size_: capacity of the decode and the encode queues
+    """
+    file_exists_, full_video_path_ = os_helper.file_exists(video_file_, *VIDEO_SUB_FOLDER_)
+
+    if not file_exists_ and video_file_ == SYNTHETIC_VIDEO_FILE_:
+        # Synthesize a video with moving shapes
+        os.makedirs(os.path.dirname(full_video_path_), exist_ok=True)
+        video_helper.synthesize_video(full_video_path_)
+        file_exists_ = True
+
+    if file_exists_:
+        # Transforms applied to each frame, in order. The pipeline is planned once for the size of the frames: the crop
+        #  is a view, the reduction makes the only new frame, and the brightness and the flip are applied in place on
+        #  it, so the caption is written in place without modifying the previous frames.
+        pipeline_ = pipeline_helper.Pipeline().crop(0.05, 0.05, 0.05, 0.05).reduce(0.75).flip(1).brightness(30)
+        transforms_ = [pipeline_.run, caption_frame]
+
+        # Keep only the last processed frame, to display it
+        last_frame_ = deque(maxlen=1)
+        output_path_ = full_video_path_.replace(video_file_, f'processed_{video_file_}')
+        stats_ = video_helper.stream_video(full_video_path_, output_path_, transforms_, queue_size_,
+                                           on_frame_=last_frame_.append)
+
+        if stats_['frames']:
+            print(f'{stats_["frames"]} frames in {stats_["seconds"]:.2f} s, sustained {stats_["fps"]:.1f} fps')
+            print('Decode queue occupancy:', stats_['decode_queue'])
+            print('Encode queue occupancy:', stats_['encode_queue'])
+
+            # Show the last processed frame with OpenCV
+            show_helper.cv2_show(list(last_frame_), ['Last Processed Frame'], False)
+
+    else:
+        print(f'There is not file {full_video_path_}')
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Module 7: Image Filtering and Edge Detection
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+
+# --- App modules ---
+from .constants import IMAGE_SUB_FOLDER_
+from helper import filter_helper, image_helper, show_helper, os_helper, trace_helper
+
+
+@trace_helper.traced
+def filter_image(image_file_: str,
+                 ksize_: int = 9):
+    """
+    Blurs an image with box, Gaussian and median filters. Large images are filtered in tiles on a pool of threads.
+    :param image_file_: filename of the image file to process
+    :param ksize_: width and height of the kernels, an odd number
+    """
+    file_exists_, full_image_path_ = os_helper.file_exists(image_file_, *IMAGE_SUB_FOLDER_)
+
+    if file_exists_:
+        # Load image with OpenCV in default mode
+        image_ = image_helper.read_image(full_image_path_)
+
+        # Box filter: each pixel is replaced with the average of the pixels in the kernel
+        image_box_ = filter_helper.apply('box', image_, tiled_=True, ksize_=ksize_)
+        # The same average added up on the integral image, whose cost does not depend on the kernel size
+        image_integral_box_ = filter_helper.apply('integral_box', image_, tiled_=True, ksize_=ksize_)
+        # Gaussian filter: the pixels near the center of the kernel weigh more, so it blurs more naturally
+        image_gaussian_ = filter_helper.apply('gaussian', image_, tiled_=True, ksize_=ksize_)
+        # Median filter: each pixel is replaced with the median of the kernel, it removes noise keeping the edges
+        image_median_ = filter_helper.apply('median', image_, tiled_=True, ksize_=ksize_)
+
+        # Prepare display the images
+        images_titles_ = ['Original Image', 'Box Filter', 'Integral Box Filter', 'Gaussian Filter', 'Median Filter']
+
+        # Show images with OpenCV
+        images_ = [image_, image_box_, image_integral_box_, image_gaussian_, image_median_]
+        show_helper.cv2_show(images_, images_titles_)
+
+    else:
+        print(f'There is not file {full_image_path_}')
+
+
+@trace_helper.traced
+def detect_edges(image_file_: str):
+    """
+    Detects the edges of an image with Sobel, Laplacian and Canny. Large images are filtered in tiles on a pool of
+      threads.
+    :param image_file_: filename of the image file to process
+    """
+    file_exists_, full_image_path_ = os_helper.file_exists(image_file_, *IMAGE_SUB_FOLDER_)
+
+    if file_exists_:
+        # Load image with OpenCV in grayscale, the edges are changes of intensity
+        image_ = image_helper.read_image(full_image_path_, cv2.IMREAD_GRAYSCALE)
+
+        # Smooth the noise first, so it is not detected as edges
+        image_blurred_ = filter_helper.apply('gaussian', image_, tiled_=True, ksize_=5)
+
+        # First derivatives (Sobel), second derivatives (Laplacian) and Canny, which thins the Sobel edges and keeps
+        #  the strong ones and the weak ones connected to them
+        image_sobel_ = filter_helper.apply('sobel', image_blurred_, tiled_=True)
+        image_laplacian_ = filter_helper.apply('laplacian', image_blurred_, tiled_=True)
+        # Canny is not tiled, since its hysteresis follows the edges across the tiles
+        image_canny_ = filter_helper.apply('canny', image_blurred_, threshold1_=50, threshold2_=150)
+
+        # Prepare display the images
+        images_titles_ = ['Original Image', 'Sobel Edges', 'Laplacian Edges', 'Canny Edges']
+
+        # Show images with OpenCV
+        images_ = [image_, image_sobel_, image_laplacian_, image_canny_]
+        show_helper.cv2_show(images_, images_titles_)
+
+    else:
+        print(f'There is not file {full_image_path_}')
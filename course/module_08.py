@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Module 8: Image Features and Image Alignment
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- App modules ---
+from .constants import FEATURE_CACHE_SUB_FOLDER_, IMAGE_SUB_FOLDER_
+from helper import feature_helper, image_helper, show_helper, os_helper, trace_helper
+
+
+@trace_helper.traced
+def align_image(image_file_: str,
+                detector_name_: str = 'orb'):
+    """
+    Aligns a photo of an image taken from another point of view back onto the image: detects the keypoints of both,
+      matches their descriptors and warps the photo with the homography between them
+    :param image_file_: filename of the image file to process, the template
+    :param detector_name_: 'orb' or 'akaze'
+    """
+    file_exists_, full_image_path_ = os_helper.file_exists(image_file_, *IMAGE_SUB_FOLDER_)
+
+    if file_exists_:
+        # Load image with OpenCV in default mode, it is the template
+        image_ = image_helper.read_image(full_image_path_)
+        height_, width_ = image_.shape[:2]
+
+        # Simulate a photo of the template: seen in perspective, rotated and darker
+        corners_ = np.float32([[0, 0], [width_, 0], [width_, height_], [0, height_]])
+        moved_ = np.float32([[0.10 * width_, 0.05 * height_], [0.95 * width_, 0.12 * height_],
+                             [0.88 * width_, 0.90 * height_], [0.02 * width_, 0.97 * height_]])
+        image_photo_ = cv2.warpPerspective(image_, cv2.getPerspectiveTransform(corners_, moved_), (width_, height_))
+        image_photo_ = cv2.convertScaleAbs(image_photo_, alpha=0.8)
+
+        # Keypoints and descriptors, computed once per image and parameters, then read from the cache
+        cache_ = feature_helper.FeatureCache(os_helper.app_sub_folder(*FEATURE_CACHE_SUB_FOLDER_), detector_name_,
+                                             **({'nfeatures': 2000} if detector_name_ == 'orb' else {}))
+        features_ = cache_.compute(image_)
+        features_photo_ = cache_.compute(image_photo_)
+
+        # Draw the best matches
+        matches_ = feature_helper.match(features_, features_photo_)
+        image_matches_ = cv2.drawMatches(image_, feature_helper.to_keypoints(features_[0]),
+                                         image_photo_, feature_helper.to_keypoints(features_photo_[0]),
+                                         matches_[:50], None)
+
+        # Homography that maps the photo onto the template, found with MAGSAC++ to discard the wrong matches
+        homography_, inliers_ = feature_helper.find_homography(features_, features_photo_)
+        if homography_ is None:
+            print(f'Only {inliers_} matches agree, the photo cannot be aligned')
+            return
+        image_aligned_ = cv2.warpPerspective(image_photo_, homography_, (width_, height_))
+        print(f'{len(matches_)} matches, {inliers_} inliers. Feature cache: {cache_.stats_}')
+
+        # Prepare display the images
+        images_titles_ = ['Template', 'Photo', f'{detector_name_.upper()} Matches', 'Aligned Photo']
+
+        # Show images with OpenCV
+        images_ = [image_, image_photo_, image_matches_, image_aligned_]
+        show_helper.cv2_show(images_, images_titles_)
+
+    else:
+        print(f'There is not file {full_image_path_}')
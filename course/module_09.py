@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Module 9: Image Stitching and Creating Panoramas
+
+# --- App modules ---
+from .constants import FEATURE_CACHE_SUB_FOLDER_, IMAGE_SUB_FOLDER_
+from helper import feature_helper, image_helper, show_helper, os_helper, trace_helper
+
+
+@trace_helper.traced
+def create_panorama(image_file_: str,
+                    photos_: int = 4,
+                    overlap_: float = 0.40,
+                    detector_name_: str = 'orb'):
+    """
+    Stitches overlapping photos into a panorama. The photos are overlapping crops of an image, shuffled, so the order
+      is found from their features. The features of each photo are cached, so stitching again after adding a photo
+      only computes the features of the new one.
+    :param image_file_: filename of the image file to process
+    :param photos_: number of photos cut from the image
+    :param overlap_: fraction of each photo that overlaps with the next one
+    :param detector_name_: 'orb' or 'akaze'
+    """
+    if photos_ < 2:
+        print('Check the number of photos, because a panorama needs at least 2.')
+        return
+    if not (0 < overlap_ < 1):
+        print('Check the overlap, because it must be between 0 and 1.')
+        return
+
+    file_exists_, full_image_path_ = os_helper.file_exists(image_file_, *IMAGE_SUB_FOLDER_)
+
+    if file_exists_:
+        # Load image with OpenCV in default mode
+        image_ = image_helper.read_image(full_image_path_)
+        height_, width_ = image_.shape[:2]
+
+        # Cut the photos from left to right, then shuffle them
+        photo_width_ = int(width_ / (photos_ - (photos_ - 1) * overlap_))
+        step_ = (width_ - photo_width_) / (photos_ - 1)
+        crops_ = [image_[:, round(i_ * step_):round(i_ * step_) + photo_width_] for i_ in range(photos_)]
+        images_photos_ = crops_[1::2] + crops_[::2]
+
+        # Keypoints and descriptors, computed once per photo and parameters, then read from the cache
+        cache_ = feature_helper.FeatureCache(os_helper.app_sub_folder(*FEATURE_CACHE_SUB_FOLDER_), detector_name_,
+                                             **({'nfeatures': 2000} if detector_name_ == 'orb' else {}))
+        features_ = [cache_.compute(photo_) for photo_ in images_photos_]
+
+        image_panorama_, order_ = feature_helper.stitch(images_photos_, features_)
+        if image_panorama_ is None:
+            print('The photos do not overlap, the panorama cannot be created')
+            return
+        print(f'Stitched photos {order_}. Feature cache: {cache_.stats_}')
+
+        # Prepare display the images
+        images_titles_ = [f'Photo {i_}' for i_ in range(len(images_photos_))] + ['Panorama']
+
+        # Show images with OpenCV
+        images_ = images_photos_ + [image_panorama_]
+        show_helper.cv2_show(images_, images_titles_)
+
+    else:
+        print(f'There is not file {full_image_path_}')
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Module 10: High Dynamic Range Imaging (HDR)
+
+# --- App modules ---
+from .constants import IMAGE_SUB_FOLDER_
+from helper import hdr_helper, image_helper, show_helper, os_helper, trace_helper
+
+
+@trace_helper.traced
+def merge_exposures(image_file_: str,
+                    times_: tuple = (1 / 30, 1 / 8, 1 / 2, 2.),
+                    memory_cap_: int = hdr_helper.MEMORY_CAP_):
+    """
+    Merges a stack of exposures into an HDR radiance map with Debevec and tone maps it, and fuses the same stack with
+      Mertens. The exposures are simulated from an image, and both merges are processed in bands of rows that fit in
+      a memory cap.
+    :param image_file_: filename of the image file to process
+    :param times_: exposure times of the simulated stack, in seconds
+    :param memory_cap_: cap of the working memory of the merges, in bytes
+    """
+    file_exists_, full_image_path_ = os_helper.file_exists(image_file_, *IMAGE_SUB_FOLDER_)
+
+    if file_exists_:
+        # Load image with OpenCV in default mode
+        image_ = image_helper.read_image(full_image_path_)
+
+        # Simulate the exposures of a scene brighter to the right than the camera can capture in one shot
+        images_exposures_ = hdr_helper.synthesize_exposures(image_, times_)
+
+        # Debevec: estimate the response curve of the camera, merge the radiance and map it back to 8 bits
+        response_ = hdr_helper.calibrate_debevec(images_exposures_, times_)
+        radiance_, debevec_report_ = hdr_helper.merge_debevec(images_exposures_, times_, response_, memory_cap_)
+        image_debevec_ = hdr_helper.tonemap_gamma(radiance_, 2.2, memory_cap_)
+
+        # Mertens: blend the best exposed parts of each exposure, without times or tone mapping
+        image_mertens_, mertens_report_ = hdr_helper.merge_mertens(images_exposures_, memory_cap_=memory_cap_)
+
+        for report_ in (debevec_report_, mertens_report_):
+            print(f'{report_["method"]}: {report_["exposures"]} exposures of {report_["megapixels"]:.1f} MP in '
+                  f'bands of {report_["band_rows"]} rows, {report_["seconds"] * 1000:.0f} ms, '
+                  f'{report_["megapixels_per_second"]:.1f} MP/s, peak resident memory '
+                  f'{report_["peak_rss_bytes"] / 2 ** 20:.0f} MB')
+
+        # Prepare display the images
+        images_titles_ = [f'Exposure {time_:.3g} s' for time_ in times_] + ['Debevec + Gamma', 'Mertens']
+
+        # Show images with OpenCV
+        images_ = images_exposures_ + [image_debevec_, image_mertens_]
+        show_helper.cv2_show(images_, images_titles_)
+
+    else:
+        print(f'There is not file {full_image_path_}')
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Module 11: Object Tracking
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- App modules ---
+from helper import capture_helper, trace_helper, tracking_helper
+
+
+@trace_helper.traced
+def track_objects(max_frames_: int = 300,
+                  shapes_: int = 8,
+                  fps_budget_: float = 30.,
+                  display_: bool = True) -> dict:
+    """
+    Tracks many moving shapes of a synthetic camera, always processing the newest frame. The odd shapes are high
+      priority, the even ones low priority, whose updates are throttled when the frames fall behind the fps budget.
+      The last shape vanishes halfway, so its track becomes stale and is dropped. Press q or Esc to stop.
+    :param max_frames_: number of frames to process before stopping
+    :param shapes_: number of shapes to track
+    :param fps_budget_: target frames per second of the budget mode, None disables it
+    :param display_: flag to display or not the frames in a window
+    :return: the report of the tracker, with the tracks, the updates and the latency per frame
+    """
+    win_name_ = 'Object Tracking'
+    source_ = tracking_helper.ShapesSource(frames_=max_frames_, shapes_=shapes_,
+                                           vanish_={shapes_ - 1: max_frames_ // 2})
+    grabber_ = capture_helper.LatestFrameGrabber(source_)
+    grabber_.start()
+    tracker_ = tracking_helper.MultiTracker(fps_budget_=fps_budget_)
+
+    # Start the tracks on the boxes of the first frame, as a detector or a user selecting them would
+    grabbed_ = grabber_.read()
+    if grabbed_ is not None:
+        for shape_, box_ in source_.boxes(grabbed_[0]).items():
+            tracker_.add(grabbed_[2], box_, priority_=shape_ % 2)
+
+    ious_ = []
+    while grabbed_ is not None:
+        grabbed_ = grabber_.read()
+        if grabbed_ is None:
+            break
+        sequence_, timestamp_, frame_ = grabbed_
+        tracks_ = tracker_.update(frame_)
+
+        # Compare the tracks with the true boxes of the shapes
+        boxes_ = source_.boxes(sequence_)
+        ious_.extend(tracking_helper.iou(box_, boxes_[track_id_]) for track_id_, (box_, _) in tracks_.items()
+                     if track_id_ in boxes_)
+
+        if display_:
+            for track_id_, ((x_, y_, width_, height_), _) in tracks_.items():
+                # High-priority tracks in green, low-priority ones in orange
+                color_ = (0, 255, 0) if tracker_.tracks_[track_id_].priority_ else (0, 165, 255)
+                cv2.rectangle(frame_, (x_, y_), (x_ + width_, y_ + height_), color_, 2)
+                cv2.putText(frame_, str(track_id_), (x_, y_ - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color_, 1)
+            cv2.imshow(win_name_, frame_)
+            key_ = cv2.waitKey(1) & 0xFF
+            if key_ in (ord('q'), ord('Q'), 27):
+                break
+
+        grabber_.processed(timestamp_)
+
+    grabber_.stop()
+    if display_:
+        cv2.destroyWindow(win_name_)
+
+    report_ = tracker_.report()
+    print('Tracking:', {key_: value_ for key_, value_ in report_.items() if key_ not in ('latency', 'histogram')},
+          f'mean IoU {np.mean(ious_) if ious_ else 0.:.3f}')
+    print('Tracking latency per frame (ms):', report_['latency'])
+    print('Tracking latency histogram:', report_['histogram'])
+    return report_
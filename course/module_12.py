@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Module 12: Face Detection
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# time: provides various time-related functions.
+import time
+
+# --- App modules ---
+from .constants import IMAGE_SUB_FOLDER_
+from helper import capture_helper, face_helper, image_helper, show_helper, os_helper, trace_helper, tracking_helper
+
+
+@trace_helper.traced
+def detect_faces(image_file_: str,
+                 face_sizes_: tuple = (60, 100, 160)):
+    """
+    Detects faces with a Haar cascade at full size, and on a downscaled image scanning only the expected face sizes.
+      The faces are synthetic, pasted on the image.
+    :param image_file_: filename of the image file to process
+    :param face_sizes_: widths of the pasted faces, in pixels
+    """
+    file_exists_, full_image_path_ = os_helper.file_exists(image_file_, *IMAGE_SUB_FOLDER_)
+
+    if file_exists_:
+        # Load image with OpenCV in default mode, and paste the faces along the diagonal
+        image_ = image_helper.read_image(full_image_path_).copy()
+        height_, width_ = image_.shape[:2]
+        for i_, size_ in enumerate(face_sizes_):
+            x_ = int((width_ - size_) * (i_ + 0.5) / len(face_sizes_))
+            y_ = int((height_ - size_) * (i_ + 0.5) / len(face_sizes_))
+            image_[y_:y_ + size_, x_:x_ + size_] = face_helper.synthetic_face(size_)
+
+        # Full size: the cascade scans every scale from its window up to the whole image
+        start_ = time.perf_counter()
+        faces_full_ = face_helper.FaceDetector(detection_width_=0).detect(image_)
+        full_ms_ = (time.perf_counter() - start_) * 1000
+
+        # Downscaled, and only the scales of the expected faces
+        detector_ = face_helper.FaceDetector(min_face_=min(face_sizes_) * 3 // 4, max_face_=max(face_sizes_) * 3 // 2)
+        start_ = time.perf_counter()
+        faces_ = detector_.detect(image_)
+        pyramid_ms_ = (time.perf_counter() - start_) * 1000
+        print(f'Full size: {len(faces_full_)} faces in {full_ms_:.1f} ms. '
+              f'Downscaled by {detector_.scale(width_):.2f} and limited scales: {len(faces_)} faces in '
+              f'{pyramid_ms_:.1f} ms, {full_ms_ / pyramid_ms_:.1f}x faster')
+
+        # Prepare display the images
+        images_titles_ = ['Faces at Full Size', 'Faces Downscaled']
+
+        # Show images with OpenCV
+        images_ = [face_helper.draw_faces(image_, faces_full_), face_helper.draw_faces(image_, faces_)]
+        show_helper.cv2_show(images_, images_titles_)
+
+    else:
+        print(f'There is not file {full_image_path_}')
+
+
+@trace_helper.traced
+def track_faces(max_frames_: int = 300,
+                detect_every_: int = 10,
+                display_: bool = True) -> dict:
+    """
+    Follows the synthetic faces of a synthetic camera, detecting them every few frames and tracking them in between,
+      always processing the newest frame. Press q or Esc to stop.
+    :param max_frames_: number of frames to process before stopping
+    :param detect_every_: frames between full detections
+    :param display_: flag to display or not the frames in a window
+    :return: the report of the detect-then-track scheduler
+    """
+    win_name_ = 'Face Tracking'
+    source_ = face_helper.FacesSource(frames_=max_frames_)
+    grabber_ = capture_helper.LatestFrameGrabber(source_)
+    grabber_.start()
+    detect_tracker_ = face_helper.DetectTracker(face_helper.FaceDetector(min_face_=source_.size_ * 3 // 4,
+                                                                         max_face_=source_.size_ * 3 // 2),
+                                                detect_every_)
+
+    ious_ = []
+    while True:
+        grabbed_ = grabber_.read()
+        if grabbed_ is None:
+            break
+        sequence_, timestamp_, frame_ = grabbed_
+        boxes_ = detect_tracker_.update(frame_)
+
+        # Compare the faces found with the true boxes of the faces
+        ious_.extend(max((tracking_helper.iou(box_, true_box_) for box_ in boxes_), default=0.)
+                     for true_box_ in source_.boxes(sequence_).values())
+
+        if display_:
+            cv2.imshow(win_name_, face_helper.draw_faces(frame_, boxes_))
+            key_ = cv2.waitKey(1) & 0xFF
+            if key_ in (ord('q'), ord('Q'), 27):
+                break
+
+        grabber_.processed(timestamp_)
+
+    grabber_.stop()
+    if display_:
+        cv2.destroyWindow(win_name_)
+
+    report_ = detect_tracker_.report()
+    print('Face tracking:', report_, f'mean IoU {np.mean(ious_) if ious_ else 0.:.3f}')
+    return report_
+
+
+@trace_helper.traced
+def detect_faces_folder(folder_: str = None) -> dict:
+    """
+    Detects the faces of every image in a folder, decoding each one at the reduced resolution of the detection
+    :param folder_: folder of the images, by default the images of the course
+    :return: the report, with the images, the faces and the images and faces per second
+    """
+    folder_ = folder_ or os_helper.app_sub_folder(*IMAGE_SUB_FOLDER_)
+    faces_, report_ = face_helper.detect_directory(folder_)
+    for relative_path_, boxes_ in faces_.items():
+        print(f'{relative_path_}: {len(boxes_)} faces')
+    print('Face detection:', report_)
+    return report_
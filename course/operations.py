@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# Headless course operations: the transforms of the course modules, without displaying windows
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+
+# --- App modules ---
+from . import module_01, module_02, module_03, module_04
+from helper import channel_helper, face_helper, filter_helper, pipeline_helper
+
+
+def _split(image_) -> dict:
+    blue_channel_, green_channel_, red_channel_ = channel_helper.channels(image_)
+    return {'blue_channel': blue_channel_, 'green_channel': green_channel_, 'red_channel': red_channel_}
+
+
+def _hsv(image_) -> dict:
+    hue_channel_, saturation_channel_, value_channel_ = channel_helper.channels(cv2.cvtColor(image_,
+                                                                                             cv2.COLOR_BGR2HSV))
+    return {'hue_channel': hue_channel_, 'saturation_channel': saturation_channel_, 'value_channel': value_channel_}
+
+
+def _flip(image_) -> dict:
+    return {'flipped_horizontally': module_02.flip(image_, 1),
+            'flipped_vertically': module_02.flip(image_, 0),
+            'flipped_fully': module_02.flip(image_, -1)}
+
+
+# Crop, reduce, flip, brightness and contrast chained, planned into a view, a resize and an in-place table and flip
+CHAIN_ = pipeline_helper.Pipeline().crop(0.30, 0.30, 0.05, 0.02).reduce(0.50).flip(1).brightness(50).contrast(1.2)
+
+# Hue increments of the colour augmentation set, in OpenCV hue units (2 degrees)
+HUE_SWEEP_ = (30, 60, 90, 120, 150)
+
+# Operations by name, each one receives a BGR image and returns a dictionary {output name: output image}.
+# The parameters are the ones used by the demos in main.py
+OPERATIONS_ = {
+    # Module 1: Getting Started with Images
+    'rgb': lambda image_: {'rgb': channel_helper.swap_rb(image_)},
+    'gray': lambda image_: {'gray': cv2.cvtColor(image_, cv2.COLOR_BGR2GRAY)},
+    'split': _split,
+    'hsv': _hsv,
+    'hue': lambda image_: {'hue': module_01.shift_hue(image_, 10)},
+    'hue_sweep': lambda image_: {f'hue_{increment_}': new_image_ for increment_, new_image_
+                                 in zip(HUE_SWEEP_, module_01.shift_hue_variants(image_, HUE_SWEEP_))},
+    # Module 2: Basic Image Manipulation
+    'pixels': lambda image_: {'pixels': module_02.set_pixels(image_, 200)},
+    'crop': lambda image_: {'cropped': module_02.crop(image_, 0.30, 0.30, 0.05, 0.02)},
+    'reduce': lambda image_: {'reduced': module_02.reduce(image_, 0.50)},
+    'enlarge': lambda image_: {'enlarged': module_02.enlarge(image_, 0.50)},
+    'flip': _flip,
+    # Module 3: Image Annotation
+    'line': lambda image_: {'line': module_03.annotate_line(image_)},
+    'circle': lambda image_: {'circle': module_03.annotate_circle(image_)},
+    'rectangle': lambda image_: {'rectangle': module_03.annotate_rectangle(image_)},
+    'text': lambda image_: {'text': module_03.annotate_text(image_)},
+    'annotations': lambda image_: {'annotations': module_03.annotate_all(image_)},
+    # Module 4: Image Enhancement
+    'brightness': lambda image_: {'brighter': module_04.change_brightness(image_, 50),
+                                  'darker': module_04.change_brightness(image_, -50)},
+    'contrast': lambda image_: {'lower_contrast': module_04.change_contrast(image_, 0.5),
+                                'higher_contrast': module_04.change_contrast(image_, 1.2)},
+    # Module 7: Image Filtering and Edge Detection
+    'filters': lambda image_: {'box': filter_helper.apply('box', image_, tiled_=True, ksize_=9),
+                               'gaussian': filter_helper.apply('gaussian', image_, tiled_=True, ksize_=9),
+                               'median': filter_helper.apply('median', image_, tiled_=True, ksize_=9)},
+    'edges': lambda image_: {'sobel': filter_helper.apply('sobel', image_, tiled_=True),
+                             'laplacian': filter_helper.apply('laplacian', image_, tiled_=True),
+                             'canny': filter_helper.apply('canny', image_)},
+    # Module 12: Face Detection
+    'faces': lambda image_: {'faces': face_helper.draw_faces(image_, face_helper.FaceDetector().detect(image_))},
+    # Operations chained in a pipeline
+    'chain': lambda image_: {'chained': CHAIN_.run(image_)},
+}
+
+
+def apply(image_,
+          operation_names_: []) -> dict:
+    """
+    Applies course operations to an image
+    :param image_: BGR image to process
+    :param operation_names_: names of the operations to apply, keys of OPERATIONS_
+    :return: a dictionary {output name: output image} with the outputs of all the operations
+    """
+    outputs_ = {}
+    for operation_name_ in operation_names_:
+        outputs_.update(OPERATIONS_[operation_name_](image_))
+    return outputs_
@@ -1,5 +1,25 @@
 # -*- coding: utf-8 -*-
+# The helper modules are imported lazily, on first access (e.g. helper.show_helper), so that a process only pays the
+#  import time of the modules it uses.
 
-from . import os_helper
-from . import show_helper
-from . import string_helper
+# --- Python modules ---
+# importlib: implementation of import, import_module imports a module by name.
+import importlib
+
+_MODULES_ = ('annotation_helper', 'buffer_helper', 'capture_helper', 'catalog_helper', 'channel_helper',
+             'derived_cache_helper', 'face_helper', 'feature_helper', 'filter_helper', 'hdr_helper', 'image_helper',
+             'lut_helper', 'os_helper', 'pipeline_helper', 'show_helper', 'shm_helper', 'string_helper', 'text_helper',
+             'trace_helper', 'tracking_helper', 'video_helper', 'writer_helper')
+
+__all__ = list(_MODULES_)
+
+
+def __getattr__(name_: str):
+    # Import the module on first access, then it is an attribute of the package and this function is not called again
+    if name_ in _MODULES_:
+        return importlib.import_module(f'.{name_}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name_!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
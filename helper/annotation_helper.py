@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+# Annotation layer: a display list of lines, circles, rectangles and texts that are rendered onto one target buffer in
+#  a single pass. For overlays on a persistent canvas it keeps track of the regions that changed (dirty rectangles),
+#  so only those regions are restored from the background and redrawn.
+# The annotations are always drawn in full-frame coordinates, since OpenCV rasterizes a shape clipped to a view with
+#  shifted coordinates differently, so a dirty render is identical, pixel by pixel, to a full render.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+
+# --- App modules ---
+from helper import buffer_helper, text_helper, trace_helper
+
+
+class AnnotationLayer:
+    """
+    Display list of annotations, each one identified by the number returned when it is added
+    """
+
+    def __init__(self):
+        # Annotations by id: (drawing function, keyword arguments, bounding box (x0, y0, x1, y1))
+        self.primitives_ = {}
+        self.next_id_ = 0
+        # Regions changed since the last render, None means the whole image
+        self.dirty_ = None
+        # Full-frame buffer where the dirty regions are redrawn, kept between renders
+        self.scratch_ = None
+
+    def __len__(self) -> int:
+        return len(self.primitives_)
+
+    def add_line(self,
+                 pt1_: tuple,
+                 pt2_: tuple,
+                 color_: tuple,
+                 thickness_: int = 1,
+                 line_type_: int = cv2.LINE_8) -> int:
+        """
+        Adds a line
+        :return: id of the annotation
+        """
+        box_ = _box(min(pt1_[0], pt2_[0]), min(pt1_[1], pt2_[1]), max(pt1_[0], pt2_[0]), max(pt1_[1], pt2_[1]),
+                    _margin(thickness_))
+        return self._add(cv2.line, box_, pt1=pt1_, pt2=pt2_, color=color_, thickness=thickness_, lineType=line_type_)
+
+    def add_circle(self,
+                   center_: tuple,
+                   radius_: int,
+                   color_: tuple,
+                   thickness_: int = 1,
+                   line_type_: int = cv2.LINE_8) -> int:
+        """
+        Adds a circle, filled if the thickness is negative
+        :return: id of the annotation
+        """
+        margin_ = radius_ + _margin(thickness_)
+        box_ = _box(center_[0], center_[1], center_[0], center_[1], margin_)
+        return self._add(cv2.circle, box_, center=center_, radius=radius_, color=color_, thickness=thickness_,
+                         lineType=line_type_)
+
+    def add_rectangle(self,
+                      pt1_: tuple,
+                      pt2_: tuple,
+                      color_: tuple,
+                      thickness_: int = 1,
+                      line_type_: int = cv2.LINE_8) -> int:
+        """
+        Adds a rectangle, filled if the thickness is negative
+        :return: id of the annotation
+        """
+        box_ = _box(min(pt1_[0], pt2_[0]), min(pt1_[1], pt2_[1]), max(pt1_[0], pt2_[0]), max(pt1_[1], pt2_[1]),
+                    _margin(thickness_))
+        return self._add(cv2.rectangle, box_, pt1=pt1_, pt2=pt2_, color=color_, thickness=thickness_,
+                         lineType=line_type_)
+
+    def add_text(self,
+                 text_: str,
+                 org_: tuple,
+                 font_face_: int,
+                 font_scale_: float,
+                 color_: tuple,
+                 thickness_: int = 1,
+                 line_type_: int = cv2.LINE_8) -> int:
+        """
+        Adds a text, whose origin is the bottom-left corner of the text string
+        :return: id of the annotation
+        """
+        (width_, height_), baseline_ = text_helper.measure_text(text_, font_face_, font_scale_, thickness_)
+        box_ = _box(org_[0], org_[1] - height_, org_[0] + width_, org_[1] + baseline_, _margin(thickness_))
+        # Texts are blitted from cached sprites, so redrawing them does not rasterize them again
+        return self._add(text_helper.put_text, box_, text_=text_, org_=org_, font_face_=font_face_,
+                         font_scale_=font_scale_, color_=color_, thickness_=thickness_, line_type_=line_type_)
+
+    def remove(self, id_: int):
+        """
+        Removes an annotation, its region gets dirty
+        :param id_: id of the annotation
+        """
+        primitive_ = self.primitives_.pop(id_, None)
+        if primitive_ is not None:
+            self._mark_dirty(primitive_[2])
+
+    def clear(self):
+        """
+        Removes all the annotations
+        """
+        for id_ in list(self.primitives_):
+            self.remove(id_)
+
+    def render(self,
+               image_,
+               in_place_: bool = True,
+               dst_=None):
+        """
+        Draws all the annotations onto the image in a single pass
+        :param image_: image to annotate
+        :param in_place_: flag to draw on the image itself, otherwise on a single copy of it
+        :param dst_: optional destination array for the copy, with the same shape as the image
+        :return: the annotated image
+        """
+        target_ = image_ if in_place_ else buffer_helper.copy(image_, dst_)
+        with trace_helper.span(trace_helper.DRAWING_):
+            for function_, arguments_, _ in self.primitives_.values():
+                function_(target_, **arguments_)
+        self.dirty_ = []
+        return target_
+
+    def render_dirty(self,
+                     target_,
+                     background_) -> []:
+        """
+        Updates a target already annotated by a previous render: restores from the background only the regions that
+          changed since then, redraws the annotations that overlap them, and copies only those regions to the target.
+          The result is identical to a full render of the background.
+        :param target_: image annotated by a previous render, it is updated in place
+        :param background_: image without annotations, with the same shape as the target
+        :return: list of the updated regions (x0, y0, x1, y1)
+        """
+        height_, width_ = target_.shape[:2]
+        if self.dirty_ is None:
+            regions_ = [(0, 0, width_, height_)]
+        else:
+            regions_ = [region_ for region_ in (_clip(box_, width_, height_) for box_ in self.dirty_) if region_]
+        if not regions_:
+            return regions_
+
+        # The annotations are drawn in full-frame coordinates on the scratch buffer, whose pixels outside the regions
+        #  are never copied, so they do not need to be restored
+        if (self.scratch_ is None or self.scratch_.shape != background_.shape
+                or self.scratch_.dtype != background_.dtype):
+            self.scratch_ = background_.copy()
+        for x0_, y0_, x1_, y1_ in regions_:
+            self.scratch_[y0_:y1_, x0_:x1_] = background_[y0_:y1_, x0_:x1_]
+
+        with trace_helper.span(trace_helper.DRAWING_):
+            for function_, arguments_, box_ in self.primitives_.values():
+                if any(_intersects(box_, region_) for region_ in regions_):
+                    function_(self.scratch_, **arguments_)
+
+        for x0_, y0_, x1_, y1_ in regions_:
+            target_[y0_:y1_, x0_:x1_] = self.scratch_[y0_:y1_, x0_:x1_]
+
+        self.dirty_ = []
+        return regions_
+
+    def _add(self,
+             function_,
+             box_: tuple,
+             **arguments_) -> int:
+        id_ = self.next_id_
+        self.next_id_ += 1
+        self.primitives_[id_] = (function_, arguments_, box_)
+        self._mark_dirty(box_)
+        return id_
+
+    def _mark_dirty(self, box_: tuple):
+        if self.dirty_ is None:
+            return
+        # Merge the overlapping regions, so no pixel is restored and drawn twice. A merged region can overlap regions
+        #  already checked, so repeat until nothing else merges.
+        merged_ = box_
+        merging_ = True
+        while merging_:
+            merging_ = False
+            remaining_ = []
+            for dirty_box_ in self.dirty_:
+                if _intersects(dirty_box_, merged_):
+                    merged_ = (min(merged_[0], dirty_box_[0]), min(merged_[1], dirty_box_[1]),
+                               max(merged_[2], dirty_box_[2]), max(merged_[3], dirty_box_[3]))
+                    merging_ = True
+                else:
+                    remaining_.append(dirty_box_)
+            self.dirty_ = remaining_
+        self.dirty_.append(merged_)
+
+
+def _margin(thickness_: int) -> int:
+    # Half the thickness of the stroke, plus the pixels that the antialiasing blends around it
+    return max(thickness_, 1) // 2 + 3
+
+
+def _box(x0_: int,
+         y0_: int,
+         x1_: int,
+         y1_: int,
+         margin_: int) -> tuple:
+    # Bounding box (x0, y0, x1, y1) of the pixels from (x0, y0) to (x1, y1) included, grown by the margin, with x1 and
+    #  y1 excluded like the regions
+    return x0_ - margin_, y0_ - margin_, x1_ + margin_ + 1, y1_ + margin_ + 1
+
+
+def _intersects(box_a_: tuple,
+                box_b_: tuple) -> bool:
+    return box_a_[0] < box_b_[2] and box_b_[0] < box_a_[2] and box_a_[1] < box_b_[3] and box_b_[1] < box_a_[3]
+
+
+def _clip(box_: tuple,
+          width_: int,
+          height_: int):
+    x0_, y0_ = max(0, box_[0]), max(0, box_[1])
+    x1_, y1_ = min(width_, box_[2]), min(height_, box_[3])
+    return (x0_, y0_, x1_, y1_) if x0_ < x1_ and y0_ < y1_ else None
+
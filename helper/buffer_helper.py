@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# Reusable image buffers.
+# The transforms of the course accept an optional destination array (dst_), so a loop that processes frame after frame
+#  can write each output into the same buffer instead of allocating a new full-size array per frame.
+# A BufferPool hands out buffers by shape and data type and takes them back when they are no longer used, e.g. the
+#  frames of a capture thread, and counts the allocations, so a loop can check that it reached a steady state with no
+#  new allocations.
+
+# --- Third Party Libraries ---
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# collections: provides specialized container datatypes, defaultdict creates the free lists on first access.
+from collections import defaultdict
+# threading: constructs higher-level threading interfaces, a lock protects the free lists.
+import threading
+
+
+def check_destination(dst_,
+                      shape_: tuple,
+                      dtype_=np.uint8):
+    """
+    Checks that a destination array fits an output. OpenCV would silently allocate a new array for a destination that
+      does not fit, and the caller would keep writing into a buffer that is not the output.
+    :param dst_: destination array, or None
+    :param shape_: shape of the output
+    :param dtype_: data type of the output
+    :return: the destination array, or None if it is None
+    """
+    if dst_ is not None and (dst_.shape != tuple(shape_) or dst_.dtype != np.dtype(dtype_)):
+        raise ValueError(f'The destination {dst_.shape} {dst_.dtype} does not fit the output {tuple(shape_)} '
+                         f'{np.dtype(dtype_)}')
+    return dst_
+
+
+def copy(image_,
+         dst_=None):
+    """
+    Copies an image
+    :param image_: image to copy
+    :param dst_: optional destination array with the same shape and data type as the image
+    :return: the copy, dst_ if it was given
+    """
+    if dst_ is None:
+        return image_.copy()
+    np.copyto(check_destination(dst_, image_.shape, image_.dtype), image_)
+    return dst_
+
+
+class BufferPool:
+    """
+    Pool of arrays by shape and data type. acquire() hands out a free buffer or allocates a new one, release() takes it
+      back for a later acquire(). Thread safe, so a producer thread can acquire the buffers that a consumer releases.
+    """
+
+    def __init__(self,
+                 max_free_: int = 4):
+        """
+        :param max_free_: free buffers kept for each shape and data type, the ones released beyond it are discarded
+        """
+        self.max_free_ = max_free_
+        self.free_ = defaultdict(list)
+        self.lock_ = threading.Lock()
+        self.allocations_ = 0
+        self.allocated_bytes_ = 0
+        self.reuses_ = 0
+        self.releases_ = 0
+        self.discarded_ = 0
+
+    def acquire(self,
+                shape_: tuple,
+                dtype_=np.uint8) -> np.ndarray:
+        """
+        Hands out a buffer, its content is undefined
+        :param shape_: shape of the buffer
+        :param dtype_: data type of the buffer
+        :return: a free buffer of the pool, or a new one if there is none
+        """
+        key_ = (tuple(shape_), np.dtype(dtype_))
+        with self.lock_:
+            free_ = self.free_.get(key_)
+            if free_:
+                self.reuses_ += 1
+                return free_.pop()
+            self.allocations_ += 1
+        buffer_ = np.empty(key_[0], dtype=key_[1])
+        with self.lock_:
+            self.allocated_bytes_ += buffer_.nbytes
+        return buffer_
+
+    def like(self, image_) -> np.ndarray:
+        """
+        Hands out a buffer with the shape and the data type of an image
+        :param image_: image to match
+        :return: the buffer
+        """
+        return self.acquire(image_.shape, image_.dtype)
+
+    def release(self, buffer_):
+        """
+        Takes back a buffer that is no longer used. Views are not taken, since they share the pixels of another array.
+        :param buffer_: buffer handed out by acquire(), or any other array of the same kind, or None
+        """
+        if buffer_ is None or buffer_.base is not None or not buffer_.flags.c_contiguous:
+            return
+        key_ = (buffer_.shape, buffer_.dtype)
+        with self.lock_:
+            self.releases_ += 1
+            free_ = self.free_[key_]
+            if len(free_) < self.max_free_ and not any(other_ is buffer_ for other_ in free_):
+                free_.append(buffer_)
+            else:
+                self.discarded_ += 1
+
+    def clear(self):
+        """
+        Discards the free buffers
+        """
+        with self.lock_:
+            self.free_.clear()
+
+    def stats(self) -> dict:
+        """
+        :return: a dictionary with the buffers allocated, the bytes allocated, the acquisitions served by a free buffer,
+                 the releases, the released buffers discarded, and the free buffers and their bytes
+        """
+        with self.lock_:
+            free_ = [buffer_ for buffers_ in self.free_.values() for buffer_ in buffers_]
+            return {'allocations': self.allocations_, 'allocated_bytes': self.allocated_bytes_,
+                    'reuses': self.reuses_, 'releases': self.releases_, 'discarded': self.discarded_,
+                    'free': len(free_), 'free_bytes': sum(buffer_.nbytes for buffer_ in free_)}
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+# Low-latency capture: a grabber thread reads a camera continuously and keeps only the newest frames in a small ring
+#  buffer, so a slow consumer drops stale frames instead of accumulating latency.
+# Any object with the read(), isOpened(), get() and release() methods of cv2.VideoCapture can be the source, e.g. the
+#  synthetic source, to run without a physical camera.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# collections: provides specialized container datatypes, a deque with maxlen is a ring buffer.
+from collections import deque
+# threading: runs the grabbing of the frames in a background thread.
+import threading
+# time: provides various time-related functions.
+import time
+
+# --- App modules ---
+from . import buffer_helper, video_helper
+
+
+class SyntheticSource:
+    """
+    Synthetic camera, with moving shapes delivered at a fixed frame rate and the interface of cv2.VideoCapture
+    """
+
+    def __init__(self,
+                 width_: int = 640,
+                 height_: int = 480,
+                 fps_: float = 30.,
+                 frames_: int = None):
+        """
+        :param width_: frame width
+        :param height_: frame height
+        :param fps_: frames per second delivered by read()
+        :param frames_: number of frames before the source ends, None never ends
+        """
+        self.background_ = video_helper.synthetic_background(width_, height_)
+        self.fps_ = fps_
+        self.frames_ = frames_
+        self.index_ = 0
+        self.opened_ = True
+        self.next_time_ = time.perf_counter()
+
+    def isOpened(self) -> bool:
+        return self.opened_
+
+    def read(self,
+             image_=None) -> tuple:
+        """
+        Waits for the next frame, like a camera does
+        :param image_: optional destination array for the frame, as in cv2.VideoCapture.read
+        :return: a tuple (True whether a frame was read, otherwise False,
+                          BGR frame, image_ if it was given)
+        """
+        if not self.opened_ or (self.frames_ is not None and self.index_ >= self.frames_):
+            return False, None
+
+        delay_ = self.next_time_ - time.perf_counter()
+        if delay_ > 0:
+            time.sleep(delay_)
+        self.next_time_ = max(self.next_time_ + 1 / self.fps_, time.perf_counter())
+
+        frame_ = self.draw(self.index_, image_)
+        self.index_ += 1
+        return True, frame_
+
+    def draw(self,
+             index_: int,
+             dst_=None):
+        """
+        Draws a frame, override it to draw other scenes
+        :param index_: frame number
+        :param dst_: optional destination array with the shape of the frames
+        :return: the BGR frame, dst_ if it was given
+        """
+        return video_helper.synthetic_frame(self.background_, index_, dst_=dst_)
+
+    def get(self, property_id_: int) -> float:
+        if property_id_ == cv2.CAP_PROP_FPS:
+            return self.fps_
+        if property_id_ == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.background_.shape[1])
+        if property_id_ == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.background_.shape[0])
+        return 0.
+
+    def release(self):
+        self.opened_ = False
+
+
+def open_source(source_=0,
+                fallback_: bool = True):
+    """
+    Opens a capture source
+    :param source_: camera index, video file or stream URL as accepted by cv2.VideoCapture, or an object with its
+                    interface, e.g. a SyntheticSource
+    :param fallback_: flag to use a synthetic source if the camera cannot be opened
+    :return: the opened source, or None if it cannot be opened and fallback_ is False
+    """
+    if not isinstance(source_, (int, str)):
+        return source_
+
+    capture_ = cv2.VideoCapture(source_)
+    if capture_.isOpened():
+        return capture_
+
+    capture_.release()
+    if not fallback_:
+        return None
+    print(f'The camera {source_} cannot be opened, a synthetic source is used instead')
+    return SyntheticSource()
+
+
+class LatencyStats:
+    """
+    Latencies of the most recent frames
+    """
+
+    def __init__(self, window_: int = 1000):
+        """
+        :param window_: number of most recent latencies to keep
+        """
+        self.seconds_ = deque(maxlen=window_)
+
+    def record(self, seconds_: float):
+        self.seconds_.append(seconds_)
+
+    def report(self) -> dict:
+        """
+        :return: a dictionary with the count, mean, p50, p95 and max latencies in milliseconds
+        """
+        if not self.seconds_:
+            return {'count': 0}
+        milliseconds_ = np.asarray(self.seconds_) * 1000
+        return {'count': len(milliseconds_), 'mean': float(milliseconds_.mean()),
+                'p50': float(np.percentile(milliseconds_, 50)), 'p95': float(np.percentile(milliseconds_, 95)),
+                'max': float(milliseconds_.max())}
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies in buckets of fixed upper edges, it keeps counting however many latencies are recorded
+    """
+
+    # Upper edges of the buckets in milliseconds, the last bucket has no upper edge
+    EDGES_ = (1, 2, 4, 8, 16, 33, 66, 133)
+
+    def __init__(self, edges_: tuple = EDGES_):
+        """
+        :param edges_: upper edges of the buckets in milliseconds, in ascending order
+        """
+        self.edges_ = edges_
+        self.counts_ = [0] * (len(edges_) + 1)
+
+    def record(self, seconds_: float):
+        milliseconds_ = seconds_ * 1000
+        for i_, edge_ in enumerate(self.edges_):
+            if milliseconds_ <= edge_:
+                self.counts_[i_] += 1
+                return
+        self.counts_[-1] += 1
+
+    def report(self) -> dict:
+        """
+        :return: a dictionary with the count of each bucket, by its upper edge, e.g. {'<=1ms': 10, ..., '>133ms': 0}
+        """
+        labels_ = [f'<={edge_}ms' for edge_ in self.edges_] + [f'>{self.edges_[-1]}ms']
+        return dict(zip(labels_, self.counts_))
+
+
+class LatestFrameGrabber(threading.Thread):
+    """
+    Grabs frames from a source in a background thread, keeping only the newest ones, so that the consumer always gets
+      the most recent frame and the frames it is too slow to process are dropped
+    """
+
+    def __init__(self,
+                 source_,
+                 buffer_size_: int = 2,
+                 pool_: buffer_helper.BufferPool = None):
+        """
+        :param source_: opened capture source, see open_source()
+        :param buffer_size_: capacity of the ring buffer of frames
+        :param pool_: optional pool of the frame buffers. The source reads each frame into a recycled buffer, and the
+                      dropped frames and the delivered ones are recycled, so a frame delivered by read() is valid only
+                      until the next read()
+        """
+        super().__init__(name='LatestFrameGrabber', daemon=True)
+        self.source_ = source_
+        self.pool_ = pool_
+        self.buffer_ = deque(maxlen=buffer_size_)
+        self.delivered_frame_ = None
+        self.condition_ = threading.Condition()
+        self.stopped_ = threading.Event()
+        self.ended_ = False
+        self.captured_ = 0
+        self.delivered_ = 0
+        self.dropped_ = 0
+        self.last_sequence_ = -1
+        self.started_at_ = None
+        self.latency_ = LatencyStats()
+
+    def run(self):
+        self.started_at_ = time.perf_counter()
+        kind_ = None
+        try:
+            while not self.stopped_.is_set():
+                # With a pool, the frame is read into a recycled buffer of the shape and type of the previous one
+                target_ = self.pool_.acquire(*kind_) if self.pool_ is not None and kind_ is not None else None
+                ok_, frame_ = self.source_.read() if target_ is None else self.source_.read(target_)
+                timestamp_ = time.perf_counter()
+                if target_ is not None and frame_ is not target_:
+                    self.pool_.release(target_)
+                if not ok_:
+                    break
+                kind_ = (frame_.shape, frame_.dtype)
+                with self.condition_:
+                    if self.pool_ is not None and len(self.buffer_) == self.buffer_.maxlen:
+                        self.pool_.release(self.buffer_.popleft()[2])
+                    self.buffer_.append((self.captured_, timestamp_, frame_))
+                    self.captured_ += 1
+                    self.condition_.notify_all()
+        finally:
+            self.source_.release()
+            with self.condition_:
+                self.ended_ = True
+                self.condition_.notify_all()
+
+    def read(self,
+             timeout_: float = 1.) -> tuple:
+        """
+        Waits for a frame newer than the last one read
+        :param timeout_: maximum seconds to wait
+        :return: a tuple (sequence number, capture timestamp in time.perf_counter() seconds, BGR frame),
+                 or None if the source ended or no frame arrived in time
+        """
+        with self.condition_:
+            if self.pool_ is not None:
+                # The consumer finished with the frame delivered before
+                self.pool_.release(self.delivered_frame_)
+                self.delivered_frame_ = None
+            self.condition_.wait_for(lambda: self.ended_ or (self.buffer_ and
+                                                             self.buffer_[-1][0] > self.last_sequence_), timeout_)
+            if not self.buffer_ or self.buffer_[-1][0] <= self.last_sequence_:
+                return None
+
+            # The newest frame is delivered, the older ones are stale
+            sequence_, timestamp_, frame_ = self.buffer_.pop()
+            if self.pool_ is not None:
+                for _, _, stale_frame_ in self.buffer_:
+                    self.pool_.release(stale_frame_)
+                self.delivered_frame_ = frame_
+            self.buffer_.clear()
+            self.dropped_ += sequence_ - self.last_sequence_ - 1
+            self.last_sequence_ = sequence_
+            self.delivered_ += 1
+
+        return sequence_, timestamp_, frame_
+
+    def processed(self, timestamp_: float):
+        """
+        Records the capture-to-process latency of a frame whose processing finished
+        :param timestamp_: capture timestamp of the frame, as returned by read()
+        """
+        self.latency_.record(time.perf_counter() - timestamp_)
+
+    def frames(self,
+               timeout_: float = 1.):
+        """
+        Generates the newest frames, starting the thread if it was not started yet. The latency of each frame is
+          recorded when the next one is requested, i.e. when the consumer finished processing it.
+        :param timeout_: maximum seconds to wait for each frame
+        :return: generator of BGR frames
+        """
+        if not self.is_alive() and not self.stopped_.is_set():
+            self.start()
+        try:
+            while True:
+                grabbed_ = self.read(timeout_)
+                if grabbed_ is None:
+                    return
+                yield grabbed_[2]
+                self.processed(grabbed_[1])
+        finally:
+            self.stop()
+
+    def stop(self):
+        """
+        Stops grabbing frames
+        """
+        self.stopped_.set()
+
+    def report(self) -> dict:
+        """
+        :return: a dictionary with the frames captured, delivered and dropped, the capture fps, and the
+                 capture-to-process latency
+        """
+        seconds_ = time.perf_counter() - self.started_at_ if self.started_at_ else 0.
+        return {'captured': self.captured_, 'delivered': self.delivered_, 'dropped': self.dropped_,
+                'capture_fps': self.captured_ / seconds_ if seconds_ else 0., 'latency': self.latency_.report()}
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+# Asset catalog: an index of the image files of a folder with their format, dimensions, channels and byte size, read
+#  from the file headers only, without decoding the pixels. The index is persisted to a JSON file and refreshed
+#  incrementally: only the files whose modification time or size changed are read again.
+# Supported headers: JPEG (SOF marker), PNG (IHDR chunk), WebP (VP8, VP8L and VP8X chunks), BMP and TIFF (first IFD).
+
+# --- Python modules ---
+# json: encoder and decoder of the JSON format, to persist the index.
+import json
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+# struct: converts between Python values and the C structs of the binary file headers.
+import struct
+
+# --- App modules ---
+from helper import os_helper
+
+# File name of the index, in the root folder of the catalog
+INDEX_FILE_ = '.catalog.json'
+
+# Version of the index format, an index with another version is rebuilt
+_INDEX_VERSION_ = 1
+
+# JPEG Start Of Frame markers, that hold the dimensions. C4 (DHT), C8 (JPG) and CC (DAC) are not frames.
+_JPEG_SOF_MARKERS_ = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Channels of the PNG color types, as OpenCV reads them with IMREAD_UNCHANGED: the palette is expanded to BGR
+_PNG_CHANNELS_ = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}
+
+
+def read_header(full_path_: str):
+    """
+    Reads the format, dimensions and channels of an image file from its header, without decoding the pixels
+    :param full_path_: full path of the image file
+    :return: a dictionary {'format', 'width', 'height', 'channels'}, or None if the header is unknown or corrupt
+    """
+    try:
+        with open(full_path_, 'rb') as file_:
+            head_ = file_.read(32)
+            if head_[:3] == b'\xff\xd8\xff':
+                return _jpeg_header(file_)
+            if head_[:8] == b'\x89PNG\r\n\x1a\n':
+                return _png_header(head_)
+            if head_[:4] == b'RIFF' and head_[8:12] == b'WEBP':
+                return _webp_header(head_)
+            if head_[:2] == b'BM':
+                return _bmp_header(head_)
+            if head_[:4] in (b'II*\x00', b'MM\x00*'):
+                return _tiff_header(file_, head_)
+    except (OSError, struct.error, ValueError):
+        pass
+    return None
+
+
+class Catalog:
+    """
+    Index of the image files of a folder, including its sub-folders, by path relative to the folder
+    """
+
+    def __init__(self,
+                 root_folder_: str,
+                 index_path_: str = None):
+        """
+        :param root_folder_: folder of the images
+        :param index_path_: file where the index is persisted, by default .catalog.json in the root folder
+        """
+        self.root_folder_ = os.path.abspath(root_folder_)
+        self.index_path_ = index_path_ or os.path.join(self.root_folder_, INDEX_FILE_)
+        # Entries by relative path: {'format', 'width', 'height', 'channels', 'bytes', 'mtime_ns'}
+        self.entries_ = {}
+
+    def __len__(self) -> int:
+        return len(self.entries_)
+
+    def __contains__(self, relative_path_: str) -> bool:
+        return relative_path_ in self.entries_
+
+    def get(self, relative_path_: str):
+        """
+        Gets the entry of an image file
+        :param relative_path_: path relative to the root folder
+        :return: the entry, or None if the file is not in the catalog
+        """
+        return self.entries_.get(relative_path_)
+
+    def full_path(self, relative_path_: str) -> str:
+        """
+        Gets the full path of an image file of the catalog
+        :param relative_path_: path relative to the root folder
+        :return: the full path
+        """
+        return os.path.join(self.root_folder_, relative_path_)
+
+    def load(self) -> bool:
+        """
+        Loads the persisted index, if it exists and it has the current version
+        :return: True whether the index was loaded, otherwise False
+        """
+        try:
+            with open(self.index_path_, 'r', encoding='utf-8') as file_:
+                index_ = json.load(file_)
+        except (OSError, ValueError):
+            return False
+        if index_.get('version') != _INDEX_VERSION_:
+            return False
+        self.entries_ = index_.get('entries', {})
+        return True
+
+    def save(self):
+        """
+        Persists the index, writing it to a temporary file that replaces the index at once, so a reader never finds
+          it half written
+        """
+        temporary_path_ = f'{self.index_path_}.{os.getpid()}.tmp'
+        with open(temporary_path_, 'w', encoding='utf-8') as file_:
+            json.dump({'version': _INDEX_VERSION_, 'entries': self.entries_}, file_, separators=(',', ':'))
+        os.replace(temporary_path_, self.index_path_)
+
+    def refresh(self) -> dict:
+        """
+        Scans the root folder and reads the headers of the new files and of the files whose modification time or size
+          changed, and removes the files that no longer exist
+        :return: a dictionary with the counts of added, updated, removed, unchanged and unreadable files
+        """
+        counts_ = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'unreadable': 0}
+        entries_ = {}
+
+        for relative_path_, stat_ in _scan(self.root_folder_):
+            entry_ = self.entries_.get(relative_path_)
+            if entry_ is not None and entry_['mtime_ns'] == stat_.st_mtime_ns and entry_['bytes'] == stat_.st_size:
+                entries_[relative_path_] = entry_
+                counts_['unchanged'] += 1
+                continue
+
+            header_ = read_header(os.path.join(self.root_folder_, relative_path_))
+            if header_ is None:
+                counts_['unreadable'] += 1
+                continue
+            header_.update(bytes=stat_.st_size, mtime_ns=stat_.st_mtime_ns)
+            entries_[relative_path_] = header_
+            counts_['updated' if entry_ is not None else 'added'] += 1
+
+        counts_['removed'] = len(self.entries_.keys() - entries_.keys())
+        self.entries_ = entries_
+        return counts_
+
+    def query(self,
+              formats_: tuple = (),
+              min_width_: int = 0,
+              max_width_: int = None,
+              min_height_: int = 0,
+              max_height_: int = None,
+              channels_: int = None,
+              predicate_=None) -> []:
+        """
+        Finds the image files that meet all the given conditions, without reading them
+          e.g. query(('jpeg',), min_width_=4001) finds all the JPEGs wider than 4000 pixels
+        :param formats_: formats to find, among jpeg, png, webp, bmp and tiff, all by default
+        :param min_width_: minimum width in pixels
+        :param max_width_: maximum width in pixels
+        :param min_height_: minimum height in pixels
+        :param max_height_: maximum height in pixels
+        :param channels_: number of channels
+        :param predicate_: function that receives an entry and returns True to select it
+        :return: a sorted list of tuples (path relative to the root folder, entry)
+        """
+        return sorted((relative_path_, entry_) for relative_path_, entry_ in self.entries_.items()
+                      if (not formats_ or entry_['format'] in formats_)
+                      and min_width_ <= entry_['width'] and (max_width_ is None or entry_['width'] <= max_width_)
+                      and min_height_ <= entry_['height'] and (max_height_ is None or entry_['height'] <= max_height_)
+                      and (channels_ is None or entry_['channels'] == channels_)
+                      and (predicate_ is None or predicate_(entry_)))
+
+
+def open_catalog(root_folder_: str,
+                 index_path_: str = None,
+                 save_: bool = True) -> Catalog:
+    """
+    Opens the catalog of a folder: loads its persisted index, refreshes it and persists it again if anything changed
+    :param root_folder_: folder of the images
+    :param index_path_: file where the index is persisted, by default .catalog.json in the root folder
+    :param save_: flag to persist or not the refreshed index
+    :return: the catalog
+    """
+    catalog_ = Catalog(root_folder_, index_path_)
+    catalog_.load()
+    counts_ = catalog_.refresh()
+    if save_ and (counts_['added'] or counts_['updated'] or counts_['removed']
+                  or not os.path.exists(catalog_.index_path_)):
+        catalog_.save()
+    return catalog_
+
+
+def _scan(root_folder_: str):
+    """
+    Generates the image files of a folder and its sub-folders, with the stat of each one
+    :return: generator of tuples (path relative to the root folder, os.stat_result)
+    """
+    folders_ = [root_folder_]
+    while folders_:
+        folder_ = folders_.pop()
+        try:
+            with os.scandir(folder_) as directory_entries_:
+                for directory_entry_ in directory_entries_:
+                    if directory_entry_.is_dir(follow_symlinks=False):
+                        folders_.append(directory_entry_.path)
+                    elif os.path.splitext(directory_entry_.name)[1].lower() in os_helper.IMAGE_EXTENSIONS_:
+                        yield os.path.relpath(directory_entry_.path, root_folder_), directory_entry_.stat()
+        except OSError:
+            continue
+
+
+def _header(format_: str,
+            width_: int,
+            height_: int,
+            channels_: int) -> dict:
+    if width_ <= 0 or height_ <= 0:
+        raise ValueError('invalid dimensions')
+    return {'format': format_, 'width': width_, 'height': height_, 'channels': channels_}
+
+
+def _jpeg_header(file_) -> dict:
+    # Walk the segments from the first marker after SOI, skipping their payloads, until a Start Of Frame
+    file_.seek(2)
+    while True:
+        byte_ = file_.read(1)
+        if not byte_:
+            raise ValueError('no frame marker')
+        if byte_ != b'\xff':
+            continue
+        marker_ = file_.read(1)
+        while marker_ == b'\xff':
+            marker_ = file_.read(1)
+        if not marker_:
+            raise ValueError('truncated marker')
+        marker_ = ord(marker_)
+        # Markers without payload: TEM and RSTn
+        if marker_ == 0x01 or 0xD0 <= marker_ <= 0xD7:
+            continue
+        length_, = struct.unpack('>H', file_.read(2))
+        if marker_ in _JPEG_SOF_MARKERS_:
+            _, height_, width_, components_ = struct.unpack('>BHHB', file_.read(6))
+            return _header('jpeg', width_, height_, components_)
+        file_.seek(length_ - 2, os.SEEK_CUR)
+
+
+def _png_header(head_: bytes) -> dict:
+    # The IHDR chunk is always the first one: length, type, width, height, bit depth, color type
+    if head_[12:16] != b'IHDR':
+        raise ValueError('no IHDR chunk')
+    width_, height_, _, color_type_ = struct.unpack('>IIBB', head_[16:26])
+    return _header('png', width_, height_, _PNG_CHANNELS_.get(color_type_, 3))
+
+
+def _webp_header(head_: bytes) -> dict:
+    chunk_ = head_[12:16]
+    if chunk_ == b'VP8 ':
+        # Lossy: the key frame starts with a 3-byte tag and the start code, followed by 14-bit dimensions
+        width_, height_ = struct.unpack('<HH', head_[26:30])
+        return _header('webp', width_ & 0x3FFF, height_ & 0x3FFF, 3)
+    if chunk_ == b'VP8L':
+        # Lossless: signature 0x2F and 14-bit dimensions minus one, followed by the alpha flag
+        bits_, = struct.unpack('<I', head_[21:25])
+        return _header('webp', (bits_ & 0x3FFF) + 1, ((bits_ >> 14) & 0x3FFF) + 1, 4 if bits_ >> 28 & 1 else 3)
+    if chunk_ == b'VP8X':
+        # Extended: flags with the alpha bit, and 24-bit canvas dimensions minus one
+        width_ = int.from_bytes(head_[24:27], 'little') + 1
+        height_ = int.from_bytes(head_[27:30], 'little') + 1
+        return _header('webp', width_, height_, 4 if head_[20] & 0x10 else 3)
+    raise ValueError('unknown WebP chunk')
+
+
+def _bmp_header(head_: bytes) -> dict:
+    # BITMAPINFOHEADER and later: width and height as signed integers, the height is negative for top-down bitmaps
+    width_, height_, _, bit_count_ = struct.unpack('<iiHH', head_[18:30])
+    return _header('bmp', width_, abs(height_), 4 if bit_count_ == 32 else 3)
+
+
+def _tiff_header(file_,
+                 head_: bytes) -> dict:
+    # The first IFD holds the tags of the first image: ImageWidth (256), ImageLength (257) and SamplesPerPixel (277)
+    order_ = '<' if head_[:2] == b'II' else '>'
+    offset_, = struct.unpack(order_ + 'I', head_[4:8])
+    file_.seek(offset_)
+    count_, = struct.unpack(order_ + 'H', file_.read(2))
+    tags_ = {}
+    for _ in range(count_):
+        tag_, type_, _, value_ = struct.unpack(order_ + 'HHI4s', file_.read(12))
+        if tag_ in (256, 257, 277):
+            # SHORT values are left-justified in the 4-byte value field, LONG values fill it
+            tags_[tag_] = struct.unpack(order_ + ('H' if type_ == 3 else 'I'), value_[:2 if type_ == 3 else 4])[0]
+    return _header('tiff', tags_.get(256, 0), tags_.get(257, 0), tags_.get(277, 1))
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# Channel access without copies: the channels of an image are returned as strided views on its pixels, instead of the
+#  copies made by cv2.split, and the BGR <-> RGB conversion is made once as a contiguous image and reused, instead of
+#  negative-stride views image_[:, :, ::-1] that matplotlib and OpenCV copy implicitly every time they use them.
+# The counters report, per operation, how many calls allocated a new image and how many bytes.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+
+# --- Python modules ---
+# collections: provides specialized container datatypes, OrderedDict is the LRU cache of conversions.
+from collections import OrderedDict
+# threading: provides a lock to make the cache safe when it is shared by several threads. It is reentrant, because
+#            releasing an image inside the lock runs the callback that removes its entry.
+import threading
+# weakref: references that do not keep the images alive, so a conversion is dropped with its source image.
+import weakref
+
+# --- App modules ---
+from helper import trace_helper
+
+# Maximum number of conversions kept
+CONVERSION_CACHE_SIZE_ = 16
+
+# Conversions by id of the source image: (weak reference to the source, converted image, or weak reference to it when
+#  the source is itself a conversion, so the pair does not keep each other alive)
+_conversions_ = OrderedDict()
+_conversions_lock_ = threading.RLock()
+_stats_ = {}
+
+
+def channel(image_,
+            index_: int):
+    """
+    Gets a channel of an image without copying it
+    :param image_: image with channels, e.g. BGR or HSV
+    :param index_: index of the channel, e.g. 0 is blue in BGR images and hue in HSV images
+    :return: the channel, a strided view on the pixels of the image, read-only if the image is read-only
+    """
+    _count('channel', None)
+    return image_[:, :, index_]
+
+
+def channels(image_) -> tuple:
+    """
+    Gets the channels of an image without copying them, like cv2.split but with views
+    :param image_: image with channels, e.g. BGR or HSV
+    :return: tuple with the channels, strided views on the pixels of the image, read-only if the image is read-only
+    """
+    _count('channels', None)
+    return tuple(image_[:, :, index_] for index_ in range(image_.shape[2]))
+
+
+def swap_rb(image_):
+    """
+    Converts a BGR image to RGB, or a RGB image to BGR, as a contiguous image.
+    The conversion of a read-only image, e.g. an image of image_helper.read_image, is kept and reused, and converting
+      it back returns the original image, so both directions are made only once.
+    :param image_: BGR or RGB image, a grayscale image is returned as is
+    :return: the converted image, read-only if the image is read-only
+    """
+    if image_.ndim != 3:
+        _count('swap_rb', None)
+        return image_
+
+    with _conversions_lock_:
+        entry_ = _conversions_.get(id(image_))
+        if entry_ is not None and entry_[0]() is image_:
+            converted_ = entry_[1]() if isinstance(entry_[1], weakref.ref) else entry_[1]
+            if converted_ is not None:
+                _conversions_.move_to_end(id(image_))
+                _count('swap_rb', None)
+                return converted_
+
+    with trace_helper.span(trace_helper.COLOR_):
+        converted_ = cv2.cvtColor(image_, cv2.COLOR_BGR2RGB)
+    _count('swap_rb', converted_)
+
+    # A writable image can change after the conversion, so only the conversions of read-only images are kept
+    if not image_.flags.writeable:
+        converted_.setflags(write=False)
+        with _conversions_lock_:
+            _conversions_[id(image_)] = (weakref.ref(image_, _forget(id(image_))), converted_)
+            _conversions_[id(converted_)] = (weakref.ref(converted_, _forget(id(converted_))), weakref.ref(image_))
+            while len(_conversions_) > 2 * CONVERSION_CACHE_SIZE_:
+                _conversions_.popitem(last=False)
+    return converted_
+
+
+def stats() -> dict:
+    """
+    Reports the calls of each operation, how many of them allocated a new image and how many bytes
+    :return: a dictionary {operation name: {'calls', 'allocations', 'bytes'}}
+    """
+    with _conversions_lock_:
+        return {name_: dict(counters_) for name_, counters_ in _stats_.items()}
+
+
+def reset_stats():
+    """
+    Resets the counters of the operations
+    """
+    with _conversions_lock_:
+        _stats_.clear()
+
+
+def clear_cache():
+    """
+    Empties the cache of conversions
+    """
+    with _conversions_lock_:
+        _conversions_.clear()
+
+
+def _count(name_: str,
+           allocated_):
+    """
+    Counts a call of an operation
+    :param name_: name of the operation
+    :param allocated_: new image allocated by the call, or None
+    """
+    with _conversions_lock_:
+        counters_ = _stats_.setdefault(name_, {'calls': 0, 'allocations': 0, 'bytes': 0})
+        counters_['calls'] += 1
+        if allocated_ is not None:
+            counters_['allocations'] += 1
+            counters_['bytes'] += allocated_.nbytes
+
+
+def _forget(key_: int):
+    """
+    Builds the callback that removes the entry of an image from the cache, when the image is released
+    :param key_: id of the image
+    """
+    def callback_(reference_):
+        with _conversions_lock_:
+            entry_ = _conversions_.get(key_)
+            if entry_ is not None and entry_[0] is reference_:
+                del _conversions_[key_]
+    return callback_
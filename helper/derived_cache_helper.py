@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+# Persistent cache of derived images, e.g. the outputs of the course operations, stored encoded on disk.
+# An entry is addressed by the hash of the content of the source file, the name of the operation, its parameters and
+#  the format of the output, so a modified source or other parameters never return a stale result, and the same
+#  result is found again whatever the name or the folder of the source.
+# The entries are written to a temporary file that replaces the entry at once, so a reader never finds one half
+#  written. The total size is capped: when it is exceeded, the least recently used entries are evicted, under a lock
+#  file shared by all the processes that use the cache folder.
+
+# --- Python modules ---
+# fcntl / msvcrt: locks of files, to evict entries in one process at a time. fcntl on POSIX, msvcrt on Windows.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+# hashlib: secure hashes and message digests, blake2b is fast and its digest size can be set.
+import hashlib
+# json: encoder and decoder of JSON (JavaScript Object Notation) data.
+import json
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+# shutil: high-level file operations, to export an entry.
+import shutil
+# threading: a lock protects the counters when the cache is shared by several threads.
+import threading
+
+# Default cap of the total size of the entries (1 GB)
+MAX_BYTES_ = 1024 * 1024 * 1024
+
+# Fraction of the cap kept after an eviction, so the folder is not scanned again on every following write
+_EVICTION_TARGET_ = 0.9
+
+# Bytes read at a time to hash a file
+_CHUNK_BYTES_ = 1024 * 1024
+
+# Hashes of the files already hashed by this process, by (full path, size, modification time)
+_file_hashes_ = {}
+
+
+def file_hash(file_path_: str) -> str:
+    """
+    Hashes the content of a file. The hash is kept while the size and the modification time of the file do not change.
+    :param file_path_: path of the file
+    :return: hexadecimal digest, or None if the file cannot be read
+    """
+    try:
+        stat_ = os.stat(file_path_)
+        key_ = (os.path.abspath(file_path_), stat_.st_size, stat_.st_mtime_ns)
+        if key_ in _file_hashes_:
+            return _file_hashes_[key_]
+
+        hash_ = hashlib.blake2b(digest_size=16)
+        with open(file_path_, 'rb') as file_:
+            for chunk_ in iter(lambda: file_.read(_CHUNK_BYTES_), b''):
+                hash_.update(chunk_)
+    except OSError:
+        return None
+    _file_hashes_[key_] = hash_.hexdigest()
+    return _file_hashes_[key_]
+
+
+class _FolderLock:
+    """
+    Exclusive lock of a cache folder, shared by the processes through a lock file
+    """
+
+    def __init__(self, folder_: str):
+        self.path_ = os.path.join(folder_, '.lock')
+        self.file_ = None
+
+    def __enter__(self):
+        self.file_ = open(self.path_, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self.file_.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            self.file_.seek(0)
+            msvcrt.locking(self.file_.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc_info_):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.file_.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                self.file_.seek(0)
+                msvcrt.locking(self.file_.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.file_.close()
+        return False
+
+
+class DerivedCache:
+    """
+    Encoded derived images on disk, as <folder>/<first 2 characters of the key>/<key><extension>
+    """
+
+    def __init__(self,
+                 folder_: str,
+                 max_bytes_: int = MAX_BYTES_):
+        """
+        :param folder_: folder of the cache files
+        :param max_bytes_: cap of the total size of the entries
+        """
+        self.folder_ = folder_
+        self.max_bytes_ = max_bytes_
+        os.makedirs(folder_, exist_ok=True)
+        self.lock_ = threading.Lock()
+        self.stats_ = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        # Estimate of the total bytes, the folder is scanned again only when the estimate exceeds the cap
+        self.total_bytes_ = self._scan_bytes()
+
+    @staticmethod
+    def key(source_hash_: str,
+            operation_: str,
+            parameters_: dict = None,
+            extension_: str = '.png') -> str:
+        """
+        Builds the key of a derived image
+        :param source_hash_: hash of the content of the source, see file_hash
+        :param operation_: name of the operation that derives the image, and of the output when it has several
+        :param parameters_: parameters of the operation, JSON serializable
+        :param extension_: file extension, and so format, of the encoded image
+        :return: hexadecimal key
+        """
+        description_ = json.dumps([source_hash_, operation_, parameters_ or {}, extension_.lower()], sort_keys=True)
+        return hashlib.blake2b(description_.encode(), digest_size=16).hexdigest() + extension_.lower()
+
+    def path(self, key_: str) -> str:
+        """
+        :param key_: key of the entry
+        :return: the path of the entry file
+        """
+        return os.path.join(self.folder_, key_[:2], key_)
+
+    def get(self, key_: str) -> bytes:
+        """
+        Reads an entry, and marks it as the most recently used
+        :param key_: key of the entry
+        :return: the encoded image, or None if it is not in the cache
+        """
+        path_ = self.path(key_)
+        try:
+            with open(path_, 'rb') as file_:
+                data_ = file_.read()
+            os.utime(path_)
+        except OSError:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return data_
+
+    def export(self,
+               key_: str,
+               file_path_: str) -> bool:
+        """
+        Copies an entry to a file, replacing it at once, and marks the entry as the most recently used
+        :param key_: key of the entry
+        :param file_path_: file to write
+        :return: True whether the entry was in the cache and it was copied, otherwise False
+        """
+        path_ = self.path(key_)
+        temporary_path_ = f'{file_path_}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            shutil.copyfile(path_, temporary_path_)
+            os.replace(temporary_path_, file_path_)
+            os.utime(path_)
+        except OSError:
+            # The entry is not in the cache, or another process evicted it meanwhile
+            if os.path.exists(temporary_path_):
+                os.remove(temporary_path_)
+            self._count('misses')
+            return False
+        self._count('hits')
+        return True
+
+    def put(self,
+            key_: str,
+            data_: bytes):
+        """
+        Writes an entry, replacing it at once, and evicts the least recently used entries if the cap is exceeded
+        :param key_: key of the entry
+        :param data_: encoded image
+        """
+        path_ = self.path(key_)
+        os.makedirs(os.path.dirname(path_), exist_ok=True)
+        temporary_path_ = f'{path_}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary_path_, 'wb') as file_:
+            file_.write(data_)
+        try:
+            # An entry replaced is already in the total
+            replaced_bytes_ = os.stat(path_).st_size
+        except OSError:
+            replaced_bytes_ = 0
+        os.replace(temporary_path_, path_)
+        self._count('writes')
+
+        with self.lock_:
+            self.total_bytes_ += len(data_) - replaced_bytes_
+            exceeded_ = self.total_bytes_ > self.max_bytes_
+        if exceeded_:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Evicts the least recently used entries until the total size is within 90% of the cap
+        :return: number of entries evicted
+        """
+        evicted_ = 0
+        target_bytes_ = int(self.max_bytes_ * _EVICTION_TARGET_)
+        with _FolderLock(self.folder_):
+            # Other processes write to the folder too, so the sizes are the ones on disk
+            entries_ = self._entries()
+            total_bytes_ = sum(size_ for _, size_, _ in entries_)
+            for path_, size_, _ in sorted(entries_, key=lambda entry_: entry_[2]):
+                if total_bytes_ <= target_bytes_:
+                    break
+                try:
+                    os.remove(path_)
+                except OSError:
+                    continue
+                total_bytes_ -= size_
+                evicted_ += 1
+        with self.lock_:
+            self.total_bytes_ = total_bytes_
+            self.stats_['evictions'] += evicted_
+        return evicted_
+
+    def stats(self) -> dict:
+        """
+        :return: a dictionary with the hits, misses, writes and evictions of this process, and the total bytes of the
+                 entries
+        """
+        with self.lock_:
+            return dict(self.stats_, bytes=self.total_bytes_)
+
+    def _entries(self) -> []:
+        """
+        :return: list of tuples (path, size, modification time) of the entry files
+        """
+        entries_ = []
+        for folder_, _, filenames_ in os.walk(self.folder_):
+            for filename_ in filenames_:
+                if filename_.startswith('.') or filename_.endswith('.tmp'):
+                    continue
+                path_ = os.path.join(folder_, filename_)
+                try:
+                    stat_ = os.stat(path_)
+                except OSError:
+                    continue
+                entries_.append((path_, stat_.st_size, stat_.st_mtime_ns))
+        return entries_
+
+    def _scan_bytes(self) -> int:
+        return sum(size_ for _, size_, _ in self._entries())
+
+    def _count(self, name_: str):
+        with self.lock_:
+            self.stats_[name_] += 1
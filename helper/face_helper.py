@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+# Face detection with the cascades bundled with opencv-python (cv2.data.haarcascades). It is accelerated three ways:
+#  - The image is downscaled before the detection, as the cascades find faces of a few tens of pixels, but never so
+#    much that the smallest expected face gets smaller than the window of the cascade.
+#  - The scales of the pyramid of detectMultiScale are limited to the expected face sizes.
+#  - In a video, the full detection runs only every N frames, and the faces are tracked in between.
+# opencv-python only bundles Haar cascades. An LBP cascade, e.g. lbpcascade_frontalface_improved.xml of the OpenCV
+#  sources, can be loaded by its path, cv2.CascadeClassifier reads both kinds.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# functools: higher-order functions, lru_cache loads each cascade once.
+from functools import lru_cache
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+# time: provides various time-related functions.
+import time
+
+# --- App modules ---
+from . import catalog_helper, image_helper, os_helper, tracking_helper
+
+# Default cascade, a file of cv2.data.haarcascades
+CASCADE_ = 'haarcascade_frontalface_default.xml'
+
+# Default width of the images where the faces are detected
+DETECTION_WIDTH_ = 640
+
+
+@lru_cache(maxsize=8)
+def load_cascade(cascade_: str = CASCADE_):
+    """
+    Loads a cascade classifier once, the classifier is shared by the callers
+    :param cascade_: file of cv2.data.haarcascades, e.g. haarcascade_frontalface_alt2.xml, or path of a cascade file
+    :return: the cv2.CascadeClassifier
+    """
+    path_ = cascade_ if os.path.isfile(cascade_) else os.path.join(cv2.data.haarcascades, cascade_)
+    classifier_ = cv2.CascadeClassifier(path_)
+    if classifier_.empty():
+        raise ValueError(f'The cascade {cascade_} cannot be loaded')
+    return classifier_
+
+
+class FaceDetector:
+    """
+    Detects faces on a downscaled image, scanning only the scales of the expected face sizes
+    """
+
+    def __init__(self,
+                 cascade_: str = CASCADE_,
+                 scale_factor_: float = 1.1,
+                 min_neighbors_: int = 5,
+                 min_face_: int = 0,
+                 max_face_: int = 0,
+                 detection_width_: int = DETECTION_WIDTH_):
+        """
+        :param cascade_: file of cv2.data.haarcascades, or path of a cascade file
+        :param scale_factor_: scale between the levels of the pyramid of detectMultiScale
+        :param min_neighbors_: overlapping detections needed to accept a face, more are fewer false positives
+        :param min_face_: width of the smallest expected face in the original image, in pixels, 0 for any
+        :param max_face_: width of the largest expected face in the original image, in pixels, 0 for any
+        :param detection_width_: width of the image where the faces are detected, 0 to detect at full size
+        """
+        self.classifier_ = load_cascade(cascade_)
+        self.scale_factor_ = scale_factor_
+        self.min_neighbors_ = min_neighbors_
+        self.min_face_ = min_face_
+        self.max_face_ = max_face_
+        self.detection_width_ = detection_width_
+        self.window_ = self.classifier_.getOriginalWindowSize()
+
+    def scale(self, width_: int) -> float:
+        """
+        Computes the downscale of an image for the detection
+        :param width_: width of the image
+        :return: the scale, between 0 and 1
+        """
+        scale_ = min(1., self.detection_width_ / width_) if self.detection_width_ else 1.
+        if self.min_face_:
+            # The smallest expected face must stay at least as large as the window of the cascade
+            scale_ = min(1., max(scale_, self.window_[0] / self.min_face_))
+        return scale_
+
+    def detect(self, image_) -> np.ndarray:
+        """
+        Detects the faces of an image
+        :param image_: BGR or grayscale image
+        :return: the boxes of the faces in the image, an array with a row (x, y, width, height) per face
+        """
+        scale_ = self.scale(image_.shape[1])
+        gray_ = cv2.cvtColor(image_, cv2.COLOR_BGR2GRAY) if image_.ndim == 3 else image_
+        if scale_ < 1.:
+            gray_ = cv2.resize(gray_, dsize=None, fx=scale_, fy=scale_, interpolation=cv2.INTER_AREA)
+        return self.detect_scaled(gray_, scale_)
+
+    def detect_scaled(self,
+                      gray_,
+                      scale_: float) -> np.ndarray:
+        """
+        Detects the faces of a grayscale image already downscaled, e.g. decoded at reduced resolution
+        :param gray_: grayscale image
+        :param scale_: scale of the image with respect to the original one
+        :return: the boxes of the faces in the original image, an array with a row (x, y, width, height) per face
+        """
+        # Limit the pyramid to the expected face sizes, at the scale of the image
+        min_size_ = max(self.window_[0], int(self.min_face_ * scale_))
+        max_size_ = int(self.max_face_ * scale_)
+        faces_ = self.classifier_.detectMultiScale(cv2.equalizeHist(gray_), self.scale_factor_, self.min_neighbors_,
+                                                   minSize=(min_size_, min_size_),
+                                                   maxSize=(max_size_, max_size_) if max_size_ else (0, 0))
+        if len(faces_) == 0:
+            return np.empty((0, 4), dtype=np.int32)
+        return np.int32(np.round(np.asarray(faces_) / scale_))
+
+    def detect_file(self, full_image_path_: str) -> np.ndarray:
+        """
+        Detects the faces of an image file, decoding it at the reduced resolution of the detection when the format
+          allows, the dimensions are read from the header first
+        :param full_image_path_: full path of the image file
+        :return: the boxes of the faces in the image, an array with a row (x, y, width, height) per face, or None if
+                 the file cannot be read
+        """
+        header_ = catalog_helper.read_header(full_image_path_)
+        scale_ = self.scale(header_['width']) if header_ else 1.
+        gray_ = image_helper.read_image_scaled(full_image_path_, scale_, cv2.IMREAD_GRAYSCALE, cache_=False)
+        if gray_ is None:
+            return None
+        # The reduced decode rounds the dimensions, so take the actual scale
+        return self.detect_scaled(gray_, gray_.shape[1] / header_['width'] if header_ else 1.)
+
+
+class DetectTracker:
+    """
+    Follows the faces of a video: detects them every N frames, and tracks them in between, e.g.
+      detect_tracker_ = DetectTracker(FaceDetector(min_face_=60), detect_every_=10)
+      for frame_ in frames_:
+          boxes_ = detect_tracker_.update(frame_)
+    """
+
+    def __init__(self,
+                 detector_: FaceDetector,
+                 detect_every_: int = 10,
+                 **tracker_parameters_):
+        """
+        :param detector_: face detector
+        :param detect_every_: frames between full detections, 1 detects on every frame
+        :param tracker_parameters_: parameters of tracking_helper.MultiTracker, e.g. margin_=0.5
+        """
+        self.detector_ = detector_
+        self.detect_every_ = max(1, detect_every_)
+        self.tracker_parameters_ = tracker_parameters_
+        self.tracker_ = None
+        self.frames_ = 0
+        self.detections_ = 0
+        self.faces_ = 0
+        self.detect_seconds_ = 0.
+        self.track_seconds_ = 0.
+
+    def update(self, frame_) -> []:
+        """
+        Finds the faces in the next frame
+        :param frame_: BGR frame
+        :return: list of the boxes of the faces, tuples (x, y, width, height)
+        """
+        start_ = time.perf_counter()
+        if self.frames_ % self.detect_every_ == 0 or self.tracker_ is None or not self.tracker_.tracks_:
+            # Full detection, the tracks start again from its boxes
+            boxes_ = [tuple(int(value_) for value_ in box_) for box_ in self.detector_.detect(frame_)]
+            self.tracker_ = tracking_helper.MultiTracker(**self.tracker_parameters_)
+            for box_ in boxes_:
+                self.tracker_.add(frame_, box_, priority_=1)
+            self.detections_ += 1
+            self.detect_seconds_ += time.perf_counter() - start_
+        else:
+            boxes_ = [box_ for box_, _ in self.tracker_.update(frame_).values()]
+            self.track_seconds_ += time.perf_counter() - start_
+        self.frames_ += 1
+        self.faces_ += len(boxes_)
+        return boxes_
+
+    def report(self) -> dict:
+        """
+        :return: a dictionary with the frames, the full detections, the faces found, the milliseconds spent detecting
+                 and tracking, and the frames per second
+        """
+        seconds_ = self.detect_seconds_ + self.track_seconds_
+        return {'frames': self.frames_, 'detections': self.detections_, 'faces': self.faces_,
+                'detect_ms': self.detect_seconds_ * 1000, 'track_ms': self.track_seconds_ * 1000,
+                'fps': self.frames_ / seconds_ if seconds_ else 0.}
+
+
+def detect_directory(source_: str,
+                     detector_: FaceDetector = None) -> tuple:
+    """
+    Detects the faces of every image in a folder, including its sub-folders, or of the images matching a glob pattern
+    :param source_: folder or glob pattern (e.g. photos/**/*.jpg)
+    :param detector_: face detector, by default a FaceDetector with the default parameters
+    :return: a tuple (dictionary {path relative to the source: array of the face boxes (x, y, width, height)},
+                      report with the images, the faces, the seconds and the images and faces per second)
+    """
+    detector_ = detector_ or FaceDetector()
+    faces_ = {}
+    start_ = time.perf_counter()
+    for full_path_, relative_path_ in os_helper.find_image_files(source_):
+        boxes_ = detector_.detect_file(full_path_)
+        if boxes_ is not None:
+            faces_[relative_path_] = boxes_
+    seconds_ = time.perf_counter() - start_
+
+    count_ = sum(len(boxes_) for boxes_ in faces_.values())
+    return faces_, {'images': len(faces_), 'faces': count_, 'seconds': seconds_,
+                    'images_per_second': len(faces_) / seconds_ if seconds_ else 0.,
+                    'faces_per_second': count_ / seconds_ if seconds_ else 0.}
+
+
+def draw_faces(image_,
+               boxes_,
+               color_: tuple = (0, 255, 0)):
+    """
+    Draws the boxes of the faces on a copy of an image
+    :param image_: BGR image
+    :param boxes_: boxes of the faces, (x, y, width, height)
+    :param color_: BGR color of the boxes
+    :return: the annotated copy
+    """
+    image_copy_ = image_.copy()
+    thickness_ = max(2, image_.shape[1] // 400)
+    for x_, y_, width_, height_ in boxes_:
+        cv2.rectangle(image_copy_, (int(x_), int(y_)), (int(x_ + width_), int(y_ + height_)), color_, thickness_)
+    return image_copy_
+
+
+def synthetic_face(size_: int) -> np.ndarray:
+    """
+    Draws a synthetic face that the frontal face cascades detect: a bright oval with dark eyes, eyebrows and mouth
+    :param size_: width and height of the square image
+    :return: the BGR face on a gray background
+    """
+    face_ = np.full((size_, size_), 90, dtype=np.uint8)
+    center_ = size_ // 2
+    cv2.ellipse(face_, (center_, center_), (int(size_ * 0.36), int(size_ * 0.46)), 0, 0, 360, 200, -1)
+    for side_ in (-1, 1):
+        cv2.ellipse(face_, (center_ + side_ * int(size_ * 0.17), int(size_ * 0.40)),
+                    (int(size_ * 0.09), int(size_ * 0.045)), 0, 0, 360, 40, -1)
+        cv2.line(face_, (center_ + side_ * int(size_ * 0.08), int(size_ * 0.31)),
+                 (center_ + side_ * int(size_ * 0.27), int(size_ * 0.30)), 50, max(1, size_ // 30))
+    cv2.ellipse(face_, (center_, int(size_ * 0.58)), (int(size_ * 0.04), int(size_ * 0.08)), 0, 0, 360, 170, -1)
+    cv2.ellipse(face_, (center_, int(size_ * 0.74)), (int(size_ * 0.15), int(size_ * 0.04)), 0, 0, 360, 60, -1)
+    return cv2.cvtColor(cv2.GaussianBlur(face_, (0, 0), size_ / 60), cv2.COLOR_GRAY2BGR)
+
+
+class FacesSource(tracking_helper.ShapesSource):
+    """
+    Synthetic camera with synthetic faces bouncing over a gradient, whose boxes are known in every frame
+    """
+
+    def __init__(self,
+                 width_: int = 640,
+                 height_: int = 480,
+                 fps_: float = 30.,
+                 frames_: int = None,
+                 faces_: int = 3,
+                 size_: int = 96,
+                 seed_: int = 0):
+        """
+        :param width_: frame width
+        :param height_: frame height
+        :param fps_: frames per second delivered by read()
+        :param frames_: number of frames before the source ends, None never ends
+        :param faces_: number of faces
+        :param size_: width and height of the faces
+        :param seed_: seed of the positions and the velocities of the faces
+        """
+        super().__init__(width_, height_, fps_, frames_, faces_, size_, seed_=seed_)
+        self.patterns_ = [synthetic_face(size_)] * faces_
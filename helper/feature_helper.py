@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+# Image features for alignment and stitching: ORB or AKAZE keypoints and binary descriptors, computed once per image
+#  and stored on disk, keyed by the hash of the image content and the detector parameters. So re-running a stitch
+#  after adding one photo only computes the features of the new photo.
+# To order a large unordered set of images, the descriptors of all the images are indexed with FLANN LSH (Locality
+#  Sensitive Hashing), and each image only votes for its nearest images, instead of matching all the pairs. Only the
+#  candidate pairs are verified with a homography.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# hashlib: secure hashes, blake2b hashes the image content.
+import hashlib
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+
+# Minimum inliers of the robust estimation to accept that two images overlap
+MIN_INLIERS_ = 15
+
+# Limits of a plausible homography between photos: the scale of its area and its perspective terms, beyond them
+#  the robust estimation has fitted a few wrong matches
+SCALE_LIMITS_ = (0.2, 5.)
+MAX_PERSPECTIVE_ = 0.001
+
+# Ratio test of Lowe: a match is kept when it is clearly better than the second best one
+RATIO_ = 0.75
+
+# Robust estimation of the homographies: MAGSAC++ fits the matches of a narrow overlap much better than RANSAC,
+#  which leaves the perspective of a thin strip of inliers loose. It is available since OpenCV 4.5.
+_ROBUST_METHOD_ = getattr(cv2, 'USAC_MAGSAC', cv2.RANSAC)
+
+# FLANN index parameters for binary descriptors (LSH)
+_FLANN_LSH_ = {'algorithm': 6, 'table_number': 6, 'key_size': 12, 'multi_probe_level': 1}
+
+
+def create_detector(detector_name_: str = 'orb',
+                    **parameters_):
+    """
+    Creates a keypoint detector and descriptor extractor
+    :param detector_name_: 'orb' or 'akaze'
+    :param parameters_: parameters of cv2.ORB_create or cv2.AKAZE_create, e.g. nfeatures=2000
+    :return: the detector
+    """
+    if detector_name_ == 'orb':
+        return cv2.ORB_create(**parameters_)
+    if detector_name_ == 'akaze':
+        return cv2.AKAZE_create(**parameters_)
+    raise ValueError(f'Unknown detector {detector_name_}')
+
+
+def content_hash(image_) -> str:
+    """
+    Hashes the content of an image, its pixels, shape and data type
+    :param image_: image to hash
+    :return: hexadecimal digest
+    """
+    hash_ = hashlib.blake2b(digest_size=16)
+    hash_.update(f'{image_.shape}{image_.dtype}'.encode())
+    hash_.update(np.ascontiguousarray(image_).data)
+    return hash_.hexdigest()
+
+
+class FeatureCache:
+    """
+    Keypoints and descriptors of images, computed once and stored on disk as <content hash>_<parameters hash>.npz
+    """
+
+    def __init__(self,
+                 folder_: str,
+                 detector_name_: str = 'orb',
+                 **parameters_):
+        """
+        :param folder_: folder of the cache files
+        :param detector_name_: 'orb' or 'akaze'
+        :param parameters_: parameters of the detector, e.g. nfeatures=2000
+        """
+        self.folder_ = folder_
+        self.detector_name_ = detector_name_
+        self.parameters_ = parameters_
+        self.detector_ = None
+        # The parameters are part of the key, so changing them does not return features of other parameters
+        self.parameters_hash_ = hashlib.blake2b(f'{detector_name_}{sorted(parameters_.items())}'.encode(),
+                                                digest_size=8).hexdigest()
+        self.stats_ = {'hits': 0, 'misses': 0}
+
+    def compute(self, image_) -> tuple:
+        """
+        Gets the features of an image from the cache, computing and storing them if they are not there
+        :param image_: BGR or grayscale image
+        :return: a tuple (keypoints as a float32 array with a row (x, y, size, angle, response, octave) per keypoint,
+                          uint8 descriptors with a row per keypoint)
+        """
+        file_path_ = os.path.join(self.folder_, f'{content_hash(image_)}_{self.parameters_hash_}.npz')
+        try:
+            with np.load(file_path_) as cached_:
+                features_ = cached_['keypoints'], cached_['descriptors']
+            self.stats_['hits'] += 1
+            return features_
+        except (OSError, KeyError, ValueError):
+            pass
+
+        self.stats_['misses'] += 1
+        if self.detector_ is None:
+            self.detector_ = create_detector(self.detector_name_, **self.parameters_)
+        gray_ = cv2.cvtColor(image_, cv2.COLOR_BGR2GRAY) if image_.ndim == 3 else image_
+        keypoints_, descriptors_ = self.detector_.detectAndCompute(gray_, None)
+        features_ = (np.array([(k_.pt[0], k_.pt[1], k_.size, k_.angle, k_.response, k_.octave) for k_ in keypoints_],
+                              dtype=np.float32).reshape(-1, 6),
+                     descriptors_ if descriptors_ is not None else np.empty((0, 32), dtype=np.uint8))
+
+        # Write to a temporary file that replaces the cache file at once, so a reader never finds it half written
+        os.makedirs(self.folder_, exist_ok=True)
+        temporary_path_ = f'{file_path_}.{os.getpid()}.tmp.npz'
+        np.savez(temporary_path_, keypoints=features_[0], descriptors=features_[1])
+        os.replace(temporary_path_, file_path_)
+        return features_
+
+
+def to_keypoints(keypoints_: np.ndarray) -> []:
+    """
+    Converts a keypoints array of FeatureCache.compute into OpenCV keypoints, e.g. for cv2.drawMatches
+    :param keypoints_: float32 array with a row (x, y, size, angle, response, octave) per keypoint
+    :return: list of cv2.KeyPoint
+    """
+    return [cv2.KeyPoint(float(x_), float(y_), float(size_), float(angle_), float(response_), int(octave_))
+            for x_, y_, size_, angle_, response_, octave_ in keypoints_]
+
+
+def match(features_a_: tuple,
+          features_b_: tuple,
+          ratio_: float = RATIO_) -> []:
+    """
+    Matches the descriptors of two images by Hamming distance, keeping the matches that pass the ratio test
+    :param features_a_: features of the first image, the query
+    :param features_b_: features of the second image, the train
+    :param ratio_: maximum ratio between the best and the second best distance
+    :return: list of cv2.DMatch, sorted by distance
+    """
+    if len(features_a_[1]) < 2 or len(features_b_[1]) < 2:
+        return []
+    matches_ = cv2.BFMatcher(cv2.NORM_HAMMING).knnMatch(features_a_[1], features_b_[1], k=2)
+    return sorted((pair_[0] for pair_ in matches_
+                   if len(pair_) == 2 and pair_[0].distance < ratio_ * pair_[1].distance),
+                  key=lambda match_: match_.distance)
+
+
+def find_homography(features_a_: tuple,
+                    features_b_: tuple,
+                    ratio_: float = RATIO_) -> tuple:
+    """
+    Finds the homography that maps the second image onto the first one
+    :param features_a_: features of the first image
+    :param features_b_: features of the second image
+    :param ratio_: maximum ratio between the best and the second best distance
+    :return: a tuple (3x3 homography, or None if there are not enough inliers or it is not plausible,
+                      number of inliers)
+    """
+    matches_ = match(features_a_, features_b_, ratio_)
+    if len(matches_) < 4:
+        return None, 0
+    points_a_ = features_a_[0][[match_.queryIdx for match_ in matches_], :2]
+    points_b_ = features_b_[0][[match_.trainIdx for match_ in matches_], :2]
+    homography_, mask_ = cv2.findHomography(points_b_, points_a_, _ROBUST_METHOD_, 3.0)
+    inliers_ = int(mask_.sum()) if mask_ is not None else 0
+    if inliers_ < MIN_INLIERS_ or not plausible(homography_):
+        return None, inliers_
+    return homography_, inliers_
+
+
+def plausible(homography_: np.ndarray) -> bool:
+    """
+    Evaluates if a homography can map a photo onto another one: it keeps the orientation, does not shrink or grow the
+      area beyond SCALE_LIMITS_, and its perspective is moderate
+    :param homography_: 3x3 homography
+    :return: True whether it is plausible, otherwise False
+    """
+    homography_ = homography_ / homography_[2, 2]
+    scale_ = np.linalg.det(homography_[:2, :2])
+    return bool(SCALE_LIMITS_[0] < scale_ < SCALE_LIMITS_[1] and
+                abs(homography_[2, 0]) + abs(homography_[2, 1]) < MAX_PERSPECTIVE_)
+
+
+def candidate_pairs(features_: [],
+                    neighbours_: int = 3,
+                    sample_: int = 300) -> []:
+    """
+    Finds the pairs of images that probably overlap without matching all the pairs: the descriptors of all the images
+      are indexed with FLANN LSH, the strongest descriptors of each image look for their nearest neighbours, and each
+      neighbour is a vote for the image it belongs to
+    :param features_: features of each image
+    :param neighbours_: candidate images per image
+    :param sample_: strongest descriptors of each image that vote
+    :return: list of tuples (votes, image index, image index), with the first index lower, sorted by votes
+    """
+    if len(features_) < 2:
+        return []
+    matcher_ = cv2.FlannBasedMatcher(_FLANN_LSH_, {'checks': 50})
+    matcher_.add([descriptors_ for _, descriptors_ in features_])
+    matcher_.train()
+
+    votes_ = {}
+    for i_, (keypoints_, descriptors_) in enumerate(features_):
+        if len(descriptors_) == 0:
+            continue
+        strongest_ = np.argsort(-keypoints_[:, 4])[:sample_]
+        # The best neighbour is usually in the same image, so ask for a few more
+        for neighbours_of_point_ in matcher_.knnMatch(descriptors_[strongest_], k=3):
+            for match_ in neighbours_of_point_:
+                if match_.imgIdx != i_:
+                    key_ = (min(i_, match_.imgIdx), max(i_, match_.imgIdx))
+                    votes_[key_] = votes_.get(key_, 0) + 1
+
+    # Keep the best candidates of each image
+    pairs_ = []
+    for i_ in range(len(features_)):
+        ranked_ = sorted(((votes_count_, pair_) for pair_, votes_count_ in votes_.items() if i_ in pair_),
+                         reverse=True)[:neighbours_]
+        pairs_.extend((votes_count_, pair_[0], pair_[1]) for votes_count_, pair_ in ranked_)
+    return sorted(set(pairs_), reverse=True)
+
+
+def stitch(images_: [],
+           features_: [],
+           neighbours_: int = 3) -> tuple:
+    """
+    Stitches an unordered set of overlapping images into a panorama: verifies the candidate pairs with homographies,
+      links the images with a maximum spanning tree of the inliers, and warps every image onto the image with most
+      inliers, blending the overlaps with weights that decrease towards the borders of each image
+    :param images_: BGR images
+    :param features_: features of each image, e.g. from FeatureCache.compute
+    :param neighbours_: candidate images per image
+    :return: a tuple (the panorama, or None if no image overlaps with another,
+                      list of the indexes of the stitched images in the order they were linked)
+    """
+    # Verify the candidate pairs, each homography maps the second image onto the first one
+    edges_ = {}
+    for _, i_, j_ in candidate_pairs(features_, neighbours_):
+        homography_, inliers_ = find_homography(features_[i_], features_[j_])
+        if homography_ is not None:
+            edges_[(i_, j_)] = (inliers_, homography_)
+            edges_[(j_, i_)] = (inliers_, np.linalg.inv(homography_))
+    if not edges_:
+        return None, []
+
+    # The reference is the image with most inliers, and the tree grows by the strongest edge (Prim)
+    weights_ = {}
+    for (i_, _), (inliers_, _) in edges_.items():
+        weights_[i_] = weights_.get(i_, 0) + inliers_
+    reference_ = max(weights_, key=weights_.get)
+    to_reference_ = {reference_: np.eye(3)}
+    order_ = [reference_]
+    while True:
+        frontier_ = [(inliers_, i_, j_) for (i_, j_), (inliers_, _) in edges_.items()
+                     if i_ in to_reference_ and j_ not in to_reference_]
+        if not frontier_:
+            break
+        _, i_, j_ = max(frontier_)
+        to_reference_[j_] = to_reference_[i_] @ edges_[(i_, j_)][1]
+        order_.append(j_)
+
+    # Canvas that holds all the warped images
+    corners_ = []
+    for i_ in order_:
+        height_, width_ = images_[i_].shape[:2]
+        box_ = np.float32([[0, 0], [width_, 0], [width_, height_], [0, height_]]).reshape(-1, 1, 2)
+        corners_.append(cv2.perspectiveTransform(box_, to_reference_[i_]))
+    corners_ = np.concatenate(corners_)
+    x0_, y0_ = np.floor(corners_.min(axis=(0, 1))).astype(int)
+    x1_, y1_ = np.ceil(corners_.max(axis=(0, 1))).astype(int)
+    translation_ = np.array([[1, 0, -x0_], [0, 1, -y0_], [0, 0, 1]], dtype=np.float64)
+    size_ = (int(x1_ - x0_), int(y1_ - y0_))
+
+    accumulator_ = np.zeros((size_[1], size_[0], 3), dtype=np.float32)
+    total_weight_ = np.zeros((size_[1], size_[0]), dtype=np.float32)
+    for i_ in order_:
+        image_ = images_[i_] if images_[i_].ndim == 3 else cv2.cvtColor(images_[i_], cv2.COLOR_GRAY2BGR)
+        matrix_ = translation_ @ to_reference_[i_]
+        # The weight of each pixel is its distance to the border of its image, so the seams fade
+        mask_ = np.zeros(image_.shape[:2], dtype=np.uint8)
+        mask_[1:-1, 1:-1] = 255
+        weight_ = cv2.distanceTransform(mask_, cv2.DIST_L2, 3)
+        warped_weight_ = cv2.warpPerspective(weight_, matrix_, size_)
+        warped_ = cv2.warpPerspective(image_, matrix_, size_)
+        accumulator_ += warped_ * warped_weight_[:, :, None]
+        total_weight_ += warped_weight_
+
+    panorama_ = accumulator_ / np.maximum(total_weight_, 1e-6)[:, :, None]
+    return np.uint8(np.clip(panorama_ + 0.5, 0, 255)), order_
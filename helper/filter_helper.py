@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+# Filtering and edge detection: box, Gaussian, median, Sobel, Laplacian and Canny filters, and a box filter on the
+#  integral image, whose cost per pixel does not depend on the kernel size.
+# Large images can be split into tiles that are filtered on a pool of threads: OpenCV releases the GIL while it works,
+#  so the tiles run in parallel. Each tile is extended with an overlap (halo) of the neighbouring pixels as large as
+#  the radius of the filter, so the tiled result is the same as filtering the whole image, except for Canny: its
+#  hysteresis follows the edges across the whole image, so a tiled Canny only approximates the whole-image one.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# concurrent.futures: high-level interface for asynchronously executing callables, on a pool of threads.
+from concurrent.futures import ThreadPoolExecutor
+# threading: provides a lock to create the thread pool once.
+import threading
+
+# Default width and height of the tiles
+TILE_SIZE_ = 1024
+
+# Extra overlap of the Canny tiles: the hysteresis follows the edges beyond the radius of the Sobel aperture, so a
+#  tiled Canny is the same as the whole-image one except for edges that leave and enter a tile beyond this overlap
+CANNY_HALO_ = 16
+
+# Thread pool shared by the tiled filters, created on first use
+_executor_ = {'executor': None, 'workers': 0}
+_executor_lock_ = threading.Lock()
+
+
+def box(image_,
+        ksize_: int = 5):
+    """
+    Blurs an image with the average of the pixels in a square kernel, with cv2.blur
+    :param image_: image to filter
+    :param ksize_: width and height of the kernel
+    :return: the filtered image
+    """
+    return cv2.blur(image_, (ksize_, ksize_))
+
+
+def integral_box(image_,
+                 ksize_: int = 5):
+    """
+    Blurs an image like box, but adding up the kernel with 4 lookups on the integral image (summed-area table), so
+      its cost per pixel does not grow with the kernel size. The border is reflected like cv2.blur does.
+    :param image_: uint8 image to filter
+    :param ksize_: width and height of the kernel, an odd number
+    :return: the filtered image
+    """
+    if ksize_ < 1 or ksize_ % 2 == 0:
+        raise ValueError(f'The kernel size must be a positive odd number, not {ksize_}')
+    radius_ = ksize_ // 2
+    padded_ = cv2.copyMakeBorder(image_, radius_, radius_, radius_, radius_, cv2.BORDER_REFLECT_101)
+    # The sums of 8K images overflow 32 bits, but the difference of 4 sums wraps around to the right kernel sum
+    integral_ = cv2.integral(padded_, sdepth=cv2.CV_32S)
+
+    height_, width_ = image_.shape[:2]
+    sums_ = integral_[ksize_:ksize_ + height_, ksize_:ksize_ + width_] - integral_[:height_, ksize_:ksize_ + width_]
+    sums_ -= integral_[ksize_:ksize_ + height_, :width_]
+    sums_ += integral_[:height_, :width_]
+    # Divide by the area of the kernel, rounding and converting to 8 bits in a single pass
+    return cv2.convertScaleAbs(sums_, alpha=1. / (ksize_ * ksize_))
+
+
+def gaussian(image_,
+             ksize_: int = 5,
+             sigma_: float = 0.):
+    """
+    Blurs an image with a Gaussian kernel, with cv2.GaussianBlur
+    :param image_: image to filter
+    :param ksize_: width and height of the kernel, an odd number
+    :param sigma_: standard deviation of the Gaussian, 0 computes it from the kernel size
+    :return: the filtered image
+    """
+    return cv2.GaussianBlur(image_, (ksize_, ksize_), sigma_)
+
+
+def median(image_,
+           ksize_: int = 5):
+    """
+    Replaces each pixel with the median of the pixels in a square kernel, with cv2.medianBlur. It removes salt and
+      pepper noise while it keeps the edges.
+    :param image_: image to filter
+    :param ksize_: width and height of the kernel, an odd number
+    :return: the filtered image
+    """
+    return cv2.medianBlur(image_, ksize_)
+
+
+def sobel(image_,
+          ksize_: int = 3):
+    """
+    Detects edges with the first derivatives of the image, the horizontal and the vertical Sobel gradients blended
+    :param image_: image to filter
+    :param ksize_: size of the Sobel kernel: 1, 3, 5 or 7
+    :return: the 8-bit magnitude of the gradients
+    """
+    # The derivatives are signed, so they are computed in 16 bits and then their absolute value is taken
+    gradient_x_ = cv2.convertScaleAbs(cv2.Sobel(image_, cv2.CV_16S, 1, 0, ksize=ksize_))
+    gradient_y_ = cv2.convertScaleAbs(cv2.Sobel(image_, cv2.CV_16S, 0, 1, ksize=ksize_))
+    return cv2.addWeighted(gradient_x_, 0.5, gradient_y_, 0.5, 0)
+
+
+def laplacian(image_,
+              ksize_: int = 3):
+    """
+    Detects edges with the second derivatives of the image, with cv2.Laplacian
+    :param image_: image to filter
+    :param ksize_: size of the kernel, an odd number
+    :return: the 8-bit absolute value of the Laplacian
+    """
+    return cv2.convertScaleAbs(cv2.Laplacian(image_, cv2.CV_16S, ksize=ksize_))
+
+
+def canny(image_,
+          threshold1_: float = 100,
+          threshold2_: float = 200,
+          aperture_size_: int = 3):
+    """
+    Detects edges with the Canny algorithm, with cv2.Canny
+    :param image_: image to filter, a color image is converted to grayscale
+    :param threshold1_: lower threshold of the hysteresis, weaker edges are discarded
+    :param threshold2_: upper threshold of the hysteresis, stronger edges are kept
+    :param aperture_size_: size of the Sobel kernel: 3, 5 or 7
+    :return: the 8-bit edge map
+    """
+    if image_.ndim == 3:
+        image_ = cv2.cvtColor(image_, cv2.COLOR_BGR2GRAY)
+    return cv2.Canny(image_, threshold1_, threshold2_, apertureSize=aperture_size_)
+
+
+# Filters by name: (function, function of the same parameters that returns the radius of the filter, the halo)
+FILTERS_ = {
+    'box': (box, lambda ksize_=5: ksize_ // 2),
+    'integral_box': (integral_box, lambda ksize_=5: ksize_ // 2),
+    'gaussian': (gaussian, lambda ksize_=5, sigma_=0.: ksize_ // 2),
+    'median': (median, lambda ksize_=5: ksize_ // 2),
+    # The Sobel kernel of size 1 is 3 pixels wide in the direction of the derivative
+    'sobel': (sobel, lambda ksize_=3: max(1, ksize_ // 2)),
+    'laplacian': (laplacian, lambda ksize_=3: max(1, ksize_ // 2)),
+    'canny': (canny, lambda threshold1_=100, threshold2_=200, aperture_size_=3: aperture_size_ // 2 + CANNY_HALO_),
+}
+
+
+def apply(filter_name_: str,
+          image_,
+          tiled_: bool = False,
+          tile_size_: int = TILE_SIZE_,
+          **parameters_):
+    """
+    Applies a filter to an image, as a whole or in tiles
+    :param filter_name_: key of FILTERS_
+    :param image_: image to filter
+    :param tiled_: flag to filter the image in tiles on the thread pool, which has as many threads as OpenCV
+    :param tile_size_: width and height of the tiles, without the halo
+    :param parameters_: parameters of the filter, e.g. ksize_=9
+    :return: the filtered image
+    """
+    function_, halo_ = FILTERS_[filter_name_]
+    if not tiled_:
+        return function_(image_, **parameters_)
+    return run_tiled(lambda tile_: function_(tile_, **parameters_), image_, halo_(**parameters_), tile_size_)
+
+
+def run_tiled(function_,
+              image_,
+              halo_: int,
+              tile_size_: int = TILE_SIZE_,
+              workers_: int = 0):
+    """
+    Applies a function to an image in tiles on a pool of threads, each tile extended with a halo of the neighbouring
+      pixels that is discarded from the result
+    :param function_: function that receives an image and returns an image of the same width and height
+    :param image_: image to filter
+    :param halo_: overlap of the tiles, at least the radius of the filter for the same result as the whole image
+    :param tile_size_: width and height of the tiles, without the halo
+    :param workers_: number of threads, by default the number of threads of OpenCV, e.g. 1 in the worker processes of
+                     batch.py, where the image is then filtered as a whole
+    :return: the filtered image
+    """
+    # The processes that limit OpenCV to one thread run several images in parallel, so they must not start a thread
+    #  per core each
+    workers_ = workers_ or cv2.getNumThreads()
+    height_, width_ = image_.shape[:2]
+    tiles_ = [(top_, left_) for top_ in range(0, height_, tile_size_) for left_ in range(0, width_, tile_size_)]
+    if len(tiles_) == 1 or workers_ == 1:
+        return function_(image_)
+
+    def filter_tile_(tile_):
+        top_, left_ = tile_
+        bottom_, right_ = min(top_ + tile_size_, height_), min(left_ + tile_size_, width_)
+        # Extend the tile with the halo, except at the borders of the image where the filter handles the border
+        y0_, x0_ = max(0, top_ - halo_), max(0, left_ - halo_)
+        y1_, x1_ = min(height_, bottom_ + halo_), min(width_, right_ + halo_)
+        result_ = function_(image_[y0_:y1_, x0_:x1_])
+        return top_, left_, result_[top_ - y0_:bottom_ - y0_, left_ - x0_:right_ - x0_]
+
+    output_ = None
+    for top_, left_, result_ in _executor(workers_).map(filter_tile_, tiles_):
+        if output_ is None:
+            # The output takes the data type and channels of the results, e.g. a color image gives a Canny edge map
+            output_ = np.empty((height_, width_) + result_.shape[2:], dtype=result_.dtype)
+        output_[top_:top_ + result_.shape[0], left_:left_ + result_.shape[1]] = result_
+    return output_
+
+
+def _executor(workers_: int = 0) -> ThreadPoolExecutor:
+    """
+    Gets the thread pool of the tiled filters, created again if another number of threads is requested
+    :param workers_: number of threads, 0 for the number of threads of OpenCV
+    """
+    workers_ = workers_ or cv2.getNumThreads()
+    with _executor_lock_:
+        if _executor_['executor'] is None or _executor_['workers'] != workers_:
+            if _executor_['executor'] is not None:
+                _executor_['executor'].shutdown(wait=False)
+            _executor_['executor'] = ThreadPoolExecutor(workers_, thread_name_prefix='tile')
+            _executor_['workers'] = workers_
+        return _executor_['executor']
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# High Dynamic Range imaging: merges a stack of exposures with the Debevec or the Mertens algorithms of OpenCV, in
+#  bands of rows, so the working memory is bounded by a cap whatever the size and the number of the exposures.
+# Merged as a whole, OpenCV needs about 66 bytes per pixel for Debevec and 35 + 16 * exposures bytes per pixel for
+#  Mertens, e.g. 7 GB for 9 exposures of 40 MP. In bands, only a band is processed at a time, in float32.
+# Debevec works pixel by pixel, so the bands give the same result as the whole image. Mertens blends pyramids, so its
+#  bands overlap and are cross-faded. Without seams, but the pyramid of a band is shallower than the one of the
+#  whole image, so the fusion keeps some more local contrast. A higher memory cap gives taller bands, and a result
+#  closer to the whole image one.
+# Every merge reports its throughput and the peak resident memory of the process.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# resource: resource usage of the process, the peak resident memory where /proc is not available. Not on Windows.
+try:
+    import resource
+except ImportError:
+    resource = None
+# sys: module which provides access to variables used or maintained by the interpreter and to functions that
+#      interact strongly with the interpreter
+import sys
+# time: provides various time-related functions.
+import time
+
+# Default cap of the working memory of a merge, besides the exposures and the results
+MEMORY_CAP_ = 512 * 1024 * 1024
+
+# Working memory of OpenCV per pixel of a band, measured, with a margin
+_DEBEVEC_BYTES_PER_PIXEL_ = 72
+_MERTENS_BYTES_PER_PIXEL_ = (40, 16)
+_TONEMAP_BYTES_PER_PIXEL_ = 24
+
+# Rows shared by consecutive Mertens bands, cross-faded to hide the seams
+MERTENS_OVERLAP_ = 64
+
+# Pixels of the exposures that calibrate the camera response, they are reduced to this size
+CALIBRATION_PIXELS_ = 1_000_000
+
+
+def band_rows(width_: int,
+              bytes_per_pixel_: float,
+              memory_cap_: int = MEMORY_CAP_,
+              min_rows_: int = 16) -> int:
+    """
+    Computes the number of rows of the bands that fit in the memory cap
+    :param width_: width of the images
+    :param bytes_per_pixel_: working memory per pixel of a band
+    :param memory_cap_: cap of the working memory
+    :param min_rows_: minimum number of rows, even if they exceed the cap
+    :return: rows per band
+    """
+    return max(min_rows_, int(memory_cap_ // (width_ * bytes_per_pixel_)))
+
+
+def calibrate_debevec(images_: [],
+                      times_,
+                      samples_: int = 70):
+    """
+    Estimates the response curve of the camera from an exposure stack. The curve is estimated from samples of the
+      pixels, so the exposures are reduced first to save memory.
+    :param images_: 8-bit BGR exposures of the same scene
+    :param times_: exposure times, in seconds
+    :param samples_: number of pixels sampled by cv2.CalibrateDebevec
+    :return: the float32 response curve, 256 x 1 x 3
+    """
+    height_, width_ = images_[0].shape[:2]
+    scale_ = min(1., (CALIBRATION_PIXELS_ / (height_ * width_)) ** 0.5)
+    if scale_ < 1.:
+        images_ = [cv2.resize(image_, dsize=None, fx=scale_, fy=scale_, interpolation=cv2.INTER_AREA)
+                   for image_ in images_]
+    return cv2.createCalibrateDebevec(samples_).process(images_, np.float32(times_))
+
+
+def merge_debevec(images_: [],
+                  times_,
+                  response_=None,
+                  memory_cap_: int = MEMORY_CAP_) -> tuple:
+    """
+    Merges an exposure stack into a radiance map with the Debevec algorithm, in bands of rows
+    :param images_: 8-bit BGR exposures of the same scene, e.g. np.load(..., mmap_mode='r') arrays, then only the bands
+                    in process are read into memory
+    :param times_: exposure times, in seconds
+    :param response_: response curve of the camera, by default it is estimated with calibrate_debevec
+    :param memory_cap_: cap of the working memory
+    :return: a tuple (float32 radiance map,
+                      report of the merge, see _Meter.report)
+    """
+    meter_ = _Meter('debevec', images_)
+    times_ = np.float32(times_)
+    if response_ is None:
+        response_ = calibrate_debevec(images_, times_)
+
+    height_, width_ = images_[0].shape[:2]
+    rows_ = band_rows(width_, _DEBEVEC_BYTES_PER_PIXEL_, memory_cap_)
+    merge_ = cv2.createMergeDebevec()
+    radiance_ = np.empty((height_, width_, 3), dtype=np.float32)
+    for top_ in range(0, height_, rows_):
+        bottom_ = min(height_, top_ + rows_)
+        # Each band is a contiguous view of the rows, OpenCV reads it without a copy
+        radiance_[top_:bottom_] = merge_.process([image_[top_:bottom_] for image_ in images_], times_, response_)
+    return radiance_, meter_.report(rows_)
+
+
+def tonemap_gamma(radiance_,
+                  gamma_: float = 2.2,
+                  memory_cap_: int = MEMORY_CAP_):
+    """
+    Maps a radiance map to an 8-bit image like cv2.createTonemap(gamma_), in bands of rows: the radiance is normalized
+      between its minimum and its maximum, and gamma corrected
+    :param radiance_: float32 radiance map
+    :param gamma_: gamma of the correction
+    :param memory_cap_: cap of the working memory
+    :return: the 8-bit image
+    """
+    height_, width_ = radiance_.shape[:2]
+    rows_ = band_rows(width_, _TONEMAP_BYTES_PER_PIXEL_, memory_cap_)
+    # The normalization is global, so the minimum and the maximum are found first. They are the ones of the finite
+    #  radiances, a pixel that all the exposures burn or leave black can be infinite or not a number.
+    minimum_, maximum_ = np.inf, -np.inf
+    for top_ in range(0, height_, rows_):
+        band_ = radiance_[top_:top_ + rows_]
+        finite_ = band_[np.isfinite(band_)]
+        if finite_.size:
+            minimum_, maximum_ = min(minimum_, float(finite_.min())), max(maximum_, float(finite_.max()))
+    if minimum_ > maximum_:
+        minimum_, maximum_ = 0., 1.
+    range_ = maximum_ - minimum_ if maximum_ - minimum_ > sys.float_info.epsilon else 1.
+
+    image_ = np.empty(radiance_.shape, dtype=np.uint8)
+    for top_ in range(0, height_, rows_):
+        band_ = np.clip(radiance_[top_:top_ + rows_], minimum_, maximum_)
+        cv2.patchNaNs(band_, 0)
+        band_ -= np.float32(minimum_)
+        band_ *= np.float32(1. / range_)
+        cv2.pow(band_, 1. / gamma_, band_)
+        image_[top_:top_ + rows_] = cv2.convertScaleAbs(band_, alpha=255)
+    return image_
+
+
+def merge_mertens(images_: [],
+                  contrast_weight_: float = 1.,
+                  saturation_weight_: float = 1.,
+                  exposure_weight_: float = 0.,
+                  memory_cap_: int = MEMORY_CAP_,
+                  overlap_: int = MERTENS_OVERLAP_) -> tuple:
+    """
+    Fuses an exposure stack into an 8-bit image with the Mertens algorithm, which needs neither the exposure times nor
+      tone mapping, in overlapping bands of rows that are cross-faded
+    :param images_: 8-bit BGR exposures of the same scene
+    :param contrast_weight_: weight of the contrast of the pixels
+    :param saturation_weight_: weight of the saturation of the pixels
+    :param exposure_weight_: weight of the well-exposedness of the pixels
+    :param memory_cap_: cap of the working memory
+    :param overlap_: rows shared by consecutive bands
+    :return: a tuple (the 8-bit image,
+                      report of the merge, see _Meter.report)
+    """
+    meter_ = _Meter('mertens', images_)
+    height_, width_ = images_[0].shape[:2]
+    bytes_per_pixel_ = _MERTENS_BYTES_PER_PIXEL_[0] + _MERTENS_BYTES_PER_PIXEL_[1] * len(images_)
+    rows_ = max(band_rows(width_, bytes_per_pixel_, memory_cap_), 4 * overlap_)
+    merge_ = cv2.createMergeMertens(contrast_weight_, saturation_weight_, exposure_weight_)
+
+    image_ = np.empty((height_, width_, 3), dtype=np.uint8)
+    top_, tail_ = 0, None
+    while True:
+        bottom_ = min(height_, top_ + rows_)
+        fused_ = merge_.process([exposure_[top_:bottom_] for exposure_ in images_])
+        if tail_ is not None:
+            # Cross-fade the rows shared with the previous band
+            ramp_ = np.linspace(0, 1, len(tail_), dtype=np.float32)[:, None, None]
+            fused_[:len(tail_)] = tail_ * (1 - ramp_) + fused_[:len(tail_)] * ramp_
+        if bottom_ < height_:
+            tail_ = fused_[-overlap_:].copy()
+        # The fusion goes slightly below 0 in dark areas, and convertScaleAbs would turn those pixels bright
+        np.maximum(fused_, 0, out=fused_)
+        if bottom_ == height_:
+            image_[top_:] = cv2.convertScaleAbs(fused_, alpha=255)
+            break
+        image_[top_:bottom_ - overlap_] = cv2.convertScaleAbs(fused_[:-overlap_], alpha=255)
+        top_ = bottom_ - overlap_
+    return image_, meter_.report(rows_)
+
+
+def synthesize_exposures(image_,
+                         times_,
+                         dynamic_range_: float = 64.) -> []:
+    """
+    Simulates an exposure stack of a scene from an 8-bit image: the image is linearized and its brightness stretched
+      from left to right over a dynamic range, then each exposure scales it by its time and clips it
+    :param image_: 8-bit BGR image of the scene
+    :param times_: exposure times, in seconds
+    :param dynamic_range_: ratio between the brightest and the darkest side of the scene
+    :return: list of 8-bit BGR exposures
+    """
+    width_ = image_.shape[1]
+    radiance_ = (image_.astype(np.float32) / 255) ** 2.2
+    radiance_ *= np.logspace(0, np.log10(dynamic_range_), width_, dtype=np.float32)[None, :, None]
+    # The middle exposure shows the middle of the scene as the image
+    radiance_ /= float(np.median(times_)) * dynamic_range_ ** 0.5
+    return [np.uint8(np.clip((radiance_ * time_) ** (1 / 2.2) * 255 + 0.5, 0, 255)) for time_ in times_]
+
+
+def peak_rss() -> int:
+    """
+    Gets the peak resident memory of the process, since it started or since reset_peak_rss
+    :return: bytes, or 0 if the platform does not report it
+    """
+    try:
+        # Linux reports the peak that reset_peak_rss can reset
+        with open('/proc/self/status') as file_:
+            for line_ in file_:
+                if line_.startswith('VmHWM:'):
+                    return int(line_.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0
+    # Kilobytes on Linux, bytes on macOS
+    peak_ = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_ if sys.platform == 'darwin' else peak_ * 1024
+
+
+def reset_peak_rss() -> bool:
+    """
+    Resets the peak resident memory of the process to the current one, so the peak of a merge can be measured
+    :return: True whether it was reset, otherwise False, then the peak is the one since the process started
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as file_:
+            file_.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class _Meter:
+    """
+    Measures the time and the peak resident memory of a merge
+    """
+
+    def __init__(self, method_: str, images_: []):
+        self.method_ = method_
+        self.exposures_ = len(images_)
+        self.megapixels_ = images_[0].shape[0] * images_[0].shape[1] / 1e6
+        self.peak_reset_ = reset_peak_rss()
+        self.start_ = time.perf_counter()
+
+    def report(self, band_rows_: int) -> dict:
+        """
+        :return: dictionary with the method, the number of exposures, megapixels of each exposure, rows per band,
+                 seconds, megapixels merged per second, peak resident memory in bytes and whether that peak is the one
+                 of the merge or the one of the process
+        """
+        seconds_ = time.perf_counter() - self.start_
+        return {'method': self.method_, 'exposures': self.exposures_, 'megapixels': self.megapixels_,
+                'band_rows': band_rows_, 'seconds': seconds_,
+                'megapixels_per_second': self.megapixels_ / seconds_ if seconds_ > 0 else 0.,
+                'peak_rss_bytes': peak_rss(), 'peak_of_merge': self.peak_reset_}
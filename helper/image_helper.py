@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+
+# --- Python modules ---
+# collections: provides specialized container datatypes, OrderedDict remembers the order of the entries and it allows
+#              to move them to the end, so it is the natural choice for a LRU (Least Recently Used) cache.
+from collections import OrderedDict
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+# threading: provides a lock to make the cache safe when it is shared by several threads.
+import threading
+
+# --- App modules ---
+from helper import trace_helper
+
+# Default byte-size budget of the decoded image cache (256 MB)
+CACHE_BUDGET_BYTES_ = 256 * 1024 * 1024
+
+# Reduced decode modes by full size flag, from the largest reduction
+_REDUCED_FLAGS_ = {
+    cv2.IMREAD_COLOR: ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                       (2, cv2.IMREAD_REDUCED_COLOR_2)),
+    cv2.IMREAD_GRAYSCALE: ((8, cv2.IMREAD_REDUCED_GRAYSCALE_8), (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+                           (2, cv2.IMREAD_REDUCED_GRAYSCALE_2)),
+}
+
+# Process-wide cache: (full path, imread flag) -> (file mtime, read-only decoded image)
+_cache_ = OrderedDict()
+_cache_lock_ = threading.Lock()
+_cache_state_ = {'bytes': 0, 'budget': CACHE_BUDGET_BYTES_, 'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def read_image(full_image_path_: str,
+               cv2_flag_: int = cv2.IMREAD_COLOR,
+               cache_: bool = True):
+    """
+    Reads an image file with OpenCV through a process-wide LRU cache of decoded images, keyed by path, imread flag and
+      file modification time, so the same file is decoded only once while it is not modified.
+    The returned array is read-only to protect the cached pixels, so copy it before modifying it.
+    :param full_image_path_: full path of the image file to read
+    :param cv2_flag_: to read image with open cv
+    :param cache_: flag to keep or not the decoded image in the cache, e.g. not to fill it with a very large image
+                   that is read only once. A cached image is returned anyway.
+    :return: the decoded image as a read-only numpy array, or None if the file cannot be read
+    """
+    key_ = (os.path.abspath(full_image_path_), cv2_flag_)
+    try:
+        mtime_ = os.stat(key_[0]).st_mtime_ns
+    except OSError:
+        return None
+
+    with _cache_lock_:
+        entry_ = _cache_.get(key_)
+        if entry_ is not None and entry_[0] == mtime_:
+            # Hit, mark the entry as the most recently used
+            _cache_.move_to_end(key_)
+            _cache_state_['hits'] += 1
+            return entry_[1]
+        _cache_state_['misses'] += 1
+
+    # Decode outside the lock, so other threads can keep reading cached images meanwhile
+    with trace_helper.span(trace_helper.DECODE_):
+        image_ = cv2.imread(key_[0], cv2_flag_)
+    if image_ is None:
+        return None
+    image_.setflags(write=False)
+
+    with _cache_lock_:
+        # Drop the stale entry of a modified file, or the entry stored by another thread meanwhile
+        _discard(key_)
+        if cache_ and image_.nbytes <= _cache_state_['budget']:
+            _cache_[key_] = (mtime_, image_)
+            _cache_state_['bytes'] += image_.nbytes
+            _evict(_cache_state_['budget'])
+
+    return image_
+
+
+def reduced_decode_flag(cv2_flag_: int,
+                        scale_: float) -> tuple:
+    """
+    Chooses the reduced decode mode of OpenCV (IMREAD_REDUCED_*_2/4/8) with the largest reduction that still decodes
+      the image at least as large as the target scale. JPEG decoders produce those reductions while decoding, much
+      faster and with less memory than decoding at full size and shrinking afterwards.
+    :param cv2_flag_: imread flag at full size, IMREAD_COLOR or IMREAD_GRAYSCALE
+    :param scale_: target scale of the image, between 0 and 1
+    :return: a tuple (imread flag to use,
+                      reduction factor of that flag: 1, 2, 4 or 8)
+    """
+    for reduction_, reduced_flag_ in _REDUCED_FLAGS_.get(cv2_flag_, ()):
+        if scale_ * reduction_ <= 1:
+            return reduced_flag_, reduction_
+    return cv2_flag_, 1
+
+
+def read_image_scaled(full_image_path_: str,
+                      scale_: float,
+                      cv2_flag_: int = cv2.IMREAD_COLOR,
+                      cache_: bool = True):
+    """
+    Reads an image file scaled down, decoding it at reduced resolution when the scale allows, and finishing with a
+      small residual resize
+    :param full_image_path_: full path of the image file to read
+    :param scale_: scale factor of the image, between 0 and 1
+    :param cv2_flag_: imread flag at full size, IMREAD_COLOR or IMREAD_GRAYSCALE
+    :param cache_: flag to keep or not the decoded image in the cache
+    :return: the scaled image, read-only if it did not need a residual resize, or None if the file cannot be read
+    """
+    reduced_flag_, reduction_ = reduced_decode_flag(cv2_flag_, scale_)
+    image_ = read_image(full_image_path_, reduced_flag_, cache_)
+    if image_ is None:
+        return None
+
+    # The reduced decode rounds the dimensions up, so the size is computed from the reduced dimensions
+    residual_scale_ = scale_ * reduction_
+    if abs(residual_scale_ - 1) < 1e-6:
+        return image_
+    # To shrink an image, it will generally look best with INTER_AREA interpolation
+    return cv2.resize(image_, dsize=None, fx=residual_scale_, fy=residual_scale_, interpolation=cv2.INTER_AREA)
+
+
+def cache_stats() -> dict:
+    """
+    Reports the counters of the decoded image cache
+    :return: a dictionary with hits, misses, evictions, entries, bytes and budget
+    """
+    with _cache_lock_:
+        stats_ = dict(_cache_state_)
+        stats_['entries'] = len(_cache_)
+    return stats_
+
+
+def set_cache_budget(budget_bytes_: int):
+    """
+    Sets the byte-size budget of the decoded image cache, evicting the least recently used images that do not fit
+    :param budget_bytes_: maximum bytes of decoded pixels to keep, 0 disables the cache
+    """
+    with _cache_lock_:
+        _cache_state_['budget'] = max(0, int(budget_bytes_))
+        _evict(_cache_state_['budget'])
+
+
+def clear_cache():
+    """
+    Empties the decoded image cache and resets its counters
+    """
+    with _cache_lock_:
+        _cache_.clear()
+        _cache_state_.update(bytes=0, hits=0, misses=0, evictions=0)
+
+
+def _discard(key_: tuple):
+    """
+    Removes an entry from the cache, if it exists. The caller must hold the cache lock.
+    :param key_: cache key of the entry to remove
+    """
+    entry_ = _cache_.pop(key_, None)
+    if entry_ is not None:
+        _cache_state_['bytes'] -= entry_[1].nbytes
+
+
+def _evict(budget_bytes_: int):
+    """
+    Evicts the least recently used entries until the cache fits the budget. The caller must hold the cache lock.
+    :param budget_bytes_: maximum bytes of decoded pixels to keep
+    """
+    while _cache_ and _cache_state_['bytes'] > budget_bytes_:
+        _, (_, image_) = _cache_.popitem(last=False)
+        _cache_state_['bytes'] -= image_.nbytes
+        _cache_state_['evictions'] += 1
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# Point operations with lookup tables (LUT).
+# A point operation changes the value of each pixel depending only on its own value, e.g. brightness, contrast or
+#  gamma, so for 8-bit images it can be precomputed for the 256 possible values into a table, and applied to the
+#  whole image in a single pass with cv2.LUT, without full-size temporary matrices.
+# Several adjustments can be chained into one table, applying them all in the same single pass.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# functools: higher-order functions, lru_cache memoizes the tables already built.
+from functools import lru_cache
+
+# --- App modules ---
+from helper import buffer_helper, trace_helper
+
+# The 256 possible values of an 8-bit pixel
+_VALUES_ = np.arange(256, dtype=np.float64)
+
+
+def _table(values_) -> np.ndarray:
+    """
+    Builds a read-only table from the computed values, which must be already within [0, 255]
+    :param values_: the 256 computed values
+    :return: the 256-entry uint8 lookup table
+    """
+    lut_ = np.uint8(values_)
+    lut_.setflags(write=False)
+    return lut_
+
+
+@lru_cache(maxsize=None)
+def identity_lut() -> np.ndarray:
+    """
+    Builds the table that leaves the pixels unchanged
+    :return: the 256-entry uint8 lookup table
+    """
+    return _table(_VALUES_)
+
+
+@lru_cache(maxsize=256)
+def brightness_lut(amount_: int) -> np.ndarray:
+    """
+    Builds the table that adds the same amount to each pixel, saturating at 0 and 255 like cv2.add and cv2.subtract
+    :param amount_: positive value to increase the brightness, negative value to decrease it
+    :return: the 256-entry uint8 lookup table
+    """
+    return _table(np.clip(_VALUES_ + amount_, 0, 255))
+
+
+@lru_cache(maxsize=256)
+def contrast_lut(factor_: float,
+                 saturate_: bool = True) -> np.ndarray:
+    """
+    Builds the table that multiplies each pixel by a constant, truncating the result like np.uint8
+    :param factor_: if factor > 1 the contrast is increased, but if factor < 1 it is decreased
+    :param saturate_: flag to clip the results to [0, 255], otherwise the values greater than 255 overflow and wrap
+                      around, as it happens when a float image is converted to uint8 without clipping
+    :return: the 256-entry uint8 lookup table
+    """
+    values_ = _VALUES_ * factor_
+    if saturate_:
+        return _table(np.clip(values_, 0, 255))
+    return _table(np.int64(np.clip(values_, 0, None)) % 256)
+
+
+@lru_cache(maxsize=256)
+def gamma_lut(gamma_: float) -> np.ndarray:
+    """
+    Builds the table of the gamma correction, value = 255 * (value / 255) ^ (1 / gamma)
+    :param gamma_: if gamma > 1 the image gets brighter, but if gamma < 1 it gets darker
+    :return: the 256-entry uint8 lookup table
+    """
+    return _table(np.clip(np.round(255 * (_VALUES_ / 255) ** (1 / gamma_)), 0, 255))
+
+
+@lru_cache(maxsize=256)
+def hue_lut(increment_: int) -> np.ndarray:
+    """
+    Builds the 3-channel table that shifts the Hue channel of an OpenCV 8-bit HSV image, leaving the Saturation and
+      Value channels unchanged. OpenCV stores 8-bit hues in the range [0, 179] (degrees / 2), so the shift wraps
+      around modulo 180 instead of overflowing at 256.
+    :param increment_: to modify hue channel, in OpenCV hue units (2 degrees)
+    :return: the 256-entry, 3-channel uint8 lookup table, with shape (256, 1, 3)
+    """
+    values_ = np.repeat(_VALUES_[:, None, None], 3, axis=2)
+    values_[:180, 0, 0] = (_VALUES_[:180] + increment_) % 180
+    return _table(values_)
+
+
+def chain_luts(*luts_) -> np.ndarray:
+    """
+    Chains several tables into one, that applies all of them in the given order in a single pass.
+    As each table saturates, the result is the same as applying the tables one after another.
+    :param luts_: 256-entry uint8 lookup tables to chain
+    :return: the 256-entry uint8 lookup table
+    """
+    chained_lut_ = identity_lut()
+    for lut_ in luts_:
+        chained_lut_ = lut_[chained_lut_]
+    return _table(chained_lut_)
+
+
+def apply_lut(image_,
+              lut_: np.ndarray,
+              dst_=None) -> np.ndarray:
+    """
+    Applies a table to every channel of an 8-bit image in a single pass
+    :param image_: uint8 image to modify
+    :param lut_: 256-entry uint8 lookup table
+    :param dst_: optional destination array with the same shape as the image, it can be the image itself
+    :return: the new image, or dst_ if it was given
+    """
+    with trace_helper.span(trace_helper.ARITHMETIC_):
+        return cv2.LUT(image_, lut_, dst=buffer_helper.check_destination(dst_, image_.shape, image_.dtype))
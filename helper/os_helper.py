@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 
 # --- Python modules ---
+# functools: higher-order functions, lru_cache memoizes the application folder.
+from functools import lru_cache
+# glob: finds all the pathnames matching a specified pattern according to the rules used by the Unix shell.
+from glob import glob
 # os: library that allows access to functionalities dependent on the Operating System.
-from os import path
+from os import path, walk
 # sys: module which provides access to variables used or maintained by the interpreter and to functions that
 #      interact strongly with the interpreter
 import sys
@@ -25,12 +29,51 @@ def file_exists(filename_: str,
     if string_helper.is_none_empty_space(filename_):
         return False, None
 
-    # Identify the application directory
-    app_folder_ = path.abspath(path.dirname(str(sys.modules['__main__'].__file__)))
-    # Get path with sub-folders (app_folder/<*sub_folders>)
-    file_folder_ = path.join(app_folder_, *sub_folders)
     # Get full path with filename (app_folder/<*sub_folders>/filename)
-    full_file_path_ = path.join(file_folder_, filename_)
+    full_file_path_ = path.join(app_sub_folder(*sub_folders), filename_)
 
     # Evaluate file existence, and return result
     return path.exists(full_file_path_), full_file_path_
+
+
+@lru_cache(maxsize=1)
+def app_folder() -> str:
+    """
+    Identifies the application directory, the folder of the main script. It is resolved once per process.
+    :return: the full path of the application folder
+    """
+    return path.abspath(path.dirname(str(sys.modules['__main__'].__file__)))
+
+
+@lru_cache(maxsize=64)
+def app_sub_folder(*sub_folders) -> str:
+    """
+    Gets the full path of a folder dependent on the application folder, app_folder/<*sub_folders>
+    :param sub_folders: dependent on the application folder
+    :return: the full path of the folder
+    """
+    return path.join(app_folder(), *sub_folders)
+
+
+# File extensions of the images that OpenCV can read
+IMAGE_EXTENSIONS_ = ('.bmp', '.jpeg', '.jpg', '.png', '.tif', '.tiff', '.webp')
+
+
+def find_image_files(source_: str) -> []:
+    """
+    Finds the image files in a folder, including its sub-folders, or the image files matching a glob pattern
+    :param source_: folder or glob pattern (e.g. images/**/*.jpg)
+    :return: a sorted list of tuples (full path,
+                                      path relative to the source folder, or to the folder common to all the matches)
+    """
+    if path.isdir(source_):
+        root_folder_ = path.abspath(source_)
+        full_paths_ = [path.join(folder_, filename_)
+                       for folder_, _, filenames_ in walk(root_folder_)
+                       for filename_ in filenames_]
+    else:
+        full_paths_ = [path.abspath(path_) for path_ in glob(source_, recursive=True) if path.isfile(path_)]
+        root_folder_ = path.commonpath([path.dirname(path_) for path_ in full_paths_]) if full_paths_ else ''
+
+    return sorted((path_, path.relpath(path_, root_folder_)) for path_ in full_paths_
+                  if path.splitext(path_)[1].lower() in IMAGE_EXTENSIONS_)
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+# Declarative pipeline of geometric and point operations, planned before it runs so each pixel is touched the
+#  minimum number of times:
+#  - Crops are pushed ahead of the resizes and flips, into a single crop in source coordinates, which is a view.
+#  - Consecutive resizes are folded into a single resize.
+#  - Flips are moved to the end, and applied in place on the buffer the pipeline already owns.
+#  - Consecutive point operations (brightness, contrast, gamma, custom tables) are merged into one lookup table, and
+#    applied in place when possible.
+# A single resize is done like module_02.reduce and module_02.enlarge, so a pipeline whose crops come before the
+#  resize and whose flips come after it gives the same image as running its steps one by one. Otherwise the output is
+#  not identical: a crop moved ahead of a resize is rounded in source pixels, a flip moved after a resize mirrors its
+#  interpolation, and folding resizes or decoding a reduced file changes the rounding of the interpolation.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+
+# --- App modules ---
+from helper import buffer_helper, image_helper, lut_helper
+
+# Maximum number of plans kept by a pipeline
+PLAN_CACHE_SIZE_ = 64
+
+
+class Pipeline:
+    """
+    Chain of operations, each method adds a step and returns the pipeline, e.g.
+      Pipeline().crop(0.05, 0.05, 0.05, 0.05).reduce(0.75).flip(1).brightness(30).contrast(1.2)
+    """
+
+    def __init__(self):
+        # Steps in the order they were added: (kind, parameters)
+        self.steps_ = []
+        # Plans by (input shape, decode reduction)
+        self.plans_ = {}
+
+    def __len__(self) -> int:
+        return len(self.steps_)
+
+    def crop(self,
+             top_cut_percentage_: float,
+             bottom_cut_percentage_: float,
+             left_cut_percentage_: float,
+             cut_right_percentage_: float):
+        """
+        Adds a crop, with the cut percentages of module_02.crop, values between 0 and 1
+        :return: the pipeline
+        """
+        return self._add('crop', (top_cut_percentage_, 1 - bottom_cut_percentage_,
+                                  left_cut_percentage_, 1 - cut_right_percentage_))
+
+    def resize(self, scale_: float):
+        """
+        Adds a resize maintaining aspect ratio
+        :param scale_: scale factor, < 1 to reduce the image or > 1 to enlarge it
+        :return: the pipeline
+        """
+        return self._add('resize', scale_)
+
+    def reduce(self, resize_factor_: float):
+        """
+        Adds a reduction like module_02.reduce
+        :param resize_factor_: scale factor of the reduced image, its value must be between 0 and 1
+        :return: the pipeline
+        """
+        return self.resize(resize_factor_)
+
+    def enlarge(self, resize_factor_: float):
+        """
+        Adds an enlargement like module_02.enlarge
+        :param resize_factor_: percentage to increase the size of the image, its value must be between 0 and 1
+        :return: the pipeline
+        """
+        return self.resize(1 + resize_factor_)
+
+    def flip(self, flip_code_: int):
+        """
+        Adds a flip like cv2.flip
+        :param flip_code_: 0 flips vertically, 1 flips horizontally and -1 flips both
+        :return: the pipeline
+        """
+        return self._add('flip', (flip_code_ != 0, flip_code_ <= 0))
+
+    def brightness(self, amount_: int):
+        """
+        Adds a brightness change like module_04.change_brightness
+        :return: the pipeline
+        """
+        return self.lut(lut_helper.brightness_lut(amount_))
+
+    def contrast(self, factor_: float):
+        """
+        Adds a contrast change like module_04.change_contrast
+        :return: the pipeline
+        """
+        return self.lut(lut_helper.contrast_lut(factor_))
+
+    def gamma(self, gamma_: float):
+        """
+        Adds a gamma correction
+        :return: the pipeline
+        """
+        return self.lut(lut_helper.gamma_lut(gamma_))
+
+    def lut(self, lut_):
+        """
+        Adds a point operation given by its 256-entry uint8 lookup table
+        :return: the pipeline
+        """
+        return self._add('lut', lut_)
+
+    def plan(self,
+             shape_: tuple,
+             reduction_: int = 1) -> list:
+        """
+        Plans the pipeline for an input shape, the plans are cached by shape
+        :param shape_: shape of the input images
+        :param reduction_: factor by which the input was already reduced when decoded, the first resize is divided by it
+        :return: list of stages: ('crop', (top, bottom, left, right)), ('resize', (dsize, interpolation, scale factor
+                 of a reduction or None)), ('lut', table) and ('flip', flip code)
+        """
+        key_ = (tuple(shape_[:2]), reduction_)
+        plan_ = self.plans_.get(key_)
+        if plan_ is None:
+            # Keep the plans of a few shapes only, e.g. when a batch of images of many sizes is processed
+            if len(self.plans_) >= PLAN_CACHE_SIZE_:
+                self.plans_.clear()
+            plan_ = self.plans_[key_] = self._plan(shape_[0], shape_[1], reduction_)
+        return plan_
+
+    def output_shape(self,
+                     shape_: tuple,
+                     reduction_: int = 1) -> tuple:
+        """
+        Gets the shape of the result for an input shape
+        :param shape_: shape of the input images
+        :param reduction_: factor by which the input was already reduced when decoded
+        :return: the shape of the result
+        """
+        height_, width_ = shape_[:2]
+        for kind_, parameters_ in self.plan(shape_, reduction_):
+            if kind_ == 'crop':
+                height_, width_ = parameters_[1] - parameters_[0], parameters_[3] - parameters_[2]
+            elif kind_ == 'resize':
+                width_, height_ = parameters_[0]
+        return (height_, width_) + tuple(shape_[2:])
+
+    def describe(self,
+                 shape_: tuple) -> list:
+        """
+        Describes the plan for an input shape
+        :param shape_: shape of the input images
+        :return: list of readable stages
+        """
+        descriptions_ = []
+        for kind_, parameters_ in self.plan(shape_):
+            if kind_ == 'lut':
+                descriptions_.append('lut')
+            elif kind_ == 'resize':
+                descriptions_.append(f'resize to {parameters_[0][0]}x{parameters_[0][1]}')
+            else:
+                descriptions_.append(f'{kind_} {parameters_}')
+        return descriptions_
+
+    def run(self,
+            image_,
+            reduction_: int = 1,
+            dst_=None):
+        """
+        Applies the pipeline to an image
+        :param image_: uint8 image, it is not modified
+        :param reduction_: factor by which the input was already reduced when decoded
+        :param dst_: optional destination array with the shape of the result, e.g. reused frame after frame
+        :return: the new image, or dst_ if it was given
+        """
+        # OpenCV would silently allocate a new array for a destination that does not fit
+        buffer_helper.check_destination(dst_, self.output_shape(image_.shape, reduction_), image_.dtype)
+        result_ = image_
+        owned_ = False
+        for kind_, parameters_ in self.plan(image_.shape, reduction_):
+            if kind_ == 'crop':
+                top_, bottom_, left_, right_ = parameters_
+                result_ = result_[top_:bottom_, left_:right_]
+            elif kind_ == 'resize':
+                # The destination is used when it has the size of this resize, and it is not its input
+                (width_, height_), interpolation_, scale_ = parameters_
+                fits_ = dst_ is not None and dst_ is not result_ and dst_.shape[:2] == (height_, width_)
+                if scale_ is None:
+                    result_ = cv2.resize(result_, dsize=(width_, height_), dst=dst_ if fits_ else None,
+                                         interpolation=interpolation_)
+                else:
+                    # A reduction passes the scale factors like module_02.reduce, since OpenCV interpolates
+                    #  differently when it computes the size from them
+                    result_ = cv2.resize(result_, dsize=None, dst=dst_ if fits_ else None, fx=scale_, fy=scale_,
+                                         interpolation=interpolation_)
+                owned_ = True
+            elif kind_ == 'lut':
+                result_ = cv2.LUT(result_, parameters_, dst=result_ if owned_ else dst_)
+                owned_ = True
+            else:
+                result_ = cv2.flip(result_, parameters_, dst=result_ if owned_ else dst_)
+                owned_ = True
+        if dst_ is not None:
+            return result_ if result_ is dst_ else buffer_helper.copy(result_, dst_)
+        return result_ if owned_ else result_.copy()
+
+    def __call__(self, image_):
+        return self.run(image_)
+
+    def read(self,
+             full_image_path_: str,
+             cv2_flag_: int = cv2.IMREAD_COLOR):
+        """
+        Reads an image file and applies the pipeline, decoding the file at reduced resolution when the pipeline starts
+          reducing the image
+        :param full_image_path_: full path of the image file to read
+        :param cv2_flag_: imread flag at full size, IMREAD_COLOR or IMREAD_GRAYSCALE
+        :return: the new image, or None if the file cannot be read
+        """
+        reduced_flag_, reduction_ = cv2_flag_, 1
+        first_scale_ = self._first_scale()
+        if first_scale_ < 1:
+            reduced_flag_, reduction_ = image_helper.reduced_decode_flag(cv2_flag_, first_scale_)
+
+        image_ = image_helper.read_image(full_image_path_, reduced_flag_, cache_=False)
+        if image_ is None:
+            return None
+        return self.run(image_, reduction_)
+
+    def _add(self,
+             kind_: str,
+             parameters_):
+        self.steps_.append((kind_, parameters_))
+        self.plans_.clear()
+        return self
+
+    def _first_scale(self) -> float:
+        """
+        Gets the scale of the resizes before the first point operation, 1 if a point operation comes first
+        """
+        scale_ = 1.
+        for kind_, parameters_ in self.steps_:
+            if kind_ == 'lut':
+                break
+            if kind_ == 'resize':
+                scale_ *= parameters_
+        return scale_
+
+    def _plan(self,
+              height_: int,
+              width_: int,
+              reduction_: int) -> list:
+        # Crop in source pixels (top, bottom, left, right), scale of the resizes and flips done so far
+        top_, bottom_, left_, right_ = 0., float(height_), 0., float(width_)
+        scale_ = 1.
+        flip_x_, flip_y_ = False, False
+        # Resizes and point operations, with the consecutive ones merged: ['resize', scale] or ['lut', table]
+        stages_ = []
+
+        for kind_, parameters_ in self.steps_:
+            if kind_ == 'crop':
+                # Set the cutting edges like module_02.crop, on the current size of the image
+                current_height_, current_width_ = (bottom_ - top_) * scale_, (right_ - left_) * scale_
+                crop_top_, crop_bottom_ = int(current_height_ * parameters_[0]), int(current_height_ * parameters_[1])
+                crop_left_, crop_right_ = int(current_width_ * parameters_[2]), int(current_width_ * parameters_[3])
+                # A crop of a flipped image is the mirrored crop of the image
+                if flip_x_:
+                    crop_left_, crop_right_ = current_width_ - crop_right_, current_width_ - crop_left_
+                if flip_y_:
+                    crop_top_, crop_bottom_ = current_height_ - crop_bottom_, current_height_ - crop_top_
+                # Map the edges back to source pixels
+                top_, bottom_ = top_ + crop_top_ / scale_, top_ + crop_bottom_ / scale_
+                left_, right_ = left_ + crop_left_ / scale_, left_ + crop_right_ / scale_
+            elif kind_ == 'flip':
+                flip_x_ ^= parameters_[0]
+                flip_y_ ^= parameters_[1]
+            else:
+                if kind_ == 'resize':
+                    scale_ *= parameters_
+                if stages_ and stages_[-1][0] == kind_:
+                    if kind_ == 'resize':
+                        stages_[-1][1] *= parameters_
+                    else:
+                        stages_[-1][1] = lut_helper.chain_luts(stages_[-1][1], parameters_)
+                else:
+                    stages_.append([kind_, parameters_])
+
+        plan_ = []
+        crop_ = (round(top_), round(bottom_), round(left_), round(right_))
+        if crop_ != (0, height_, 0, width_):
+            plan_.append(('crop', crop_))
+        height_, width_ = crop_[1] - crop_[0], crop_[3] - crop_[2]
+
+        first_resize_ = True
+        for kind_, parameters_ in stages_:
+            if kind_ == 'lut':
+                plan_.append(('lut', parameters_))
+                continue
+
+            resize_scale_ = parameters_
+            if first_resize_:
+                resize_scale_ *= reduction_
+                first_resize_ = False
+            # To shrink an image, it will generally look best with INTER_AREA interpolation, and to enlarge it with
+            #  INTER_CUBIC interpolation, like module_02.reduce and module_02.enlarge. The size is rounded like each
+            #  of them: OpenCV rounds the size it computes from the scale factors, and enlarge truncates it.
+            if resize_scale_ < 1:
+                dsize_ = (round(width_ * resize_scale_), round(height_ * resize_scale_))
+                interpolation_, scale_factor_ = cv2.INTER_AREA, resize_scale_
+                if min(dsize_) < 1:
+                    dsize_, scale_factor_ = (max(1, dsize_[0]), max(1, dsize_[1])), None
+            else:
+                dsize_ = (int(width_ * resize_scale_), int(height_ * resize_scale_))
+                interpolation_, scale_factor_ = cv2.INTER_CUBIC, None
+            if dsize_ == (width_, height_):
+                continue
+            plan_.append(('resize', (dsize_, interpolation_, scale_factor_)))
+            width_, height_ = dsize_
+
+        if flip_x_ or flip_y_:
+            plan_.append(('flip', -1 if flip_x_ and flip_y_ else (1 if flip_x_ else 0)))
+        return plan_
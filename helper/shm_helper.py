@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+# Process pool that passes the images through shared memory: the images are copied once into shared memory blocks,
+#  and the worker processes receive only their metadata (block name, offset, shape and data type), instead of the
+#  pickled pixels. The outputs come back the same way, through another block.
+# The blocks are recycled by a pool, and each worker attaches to a block once and keeps it attached.
+# An image or output that does not fit in a block is pickled as usual.
+
+# --- Third Party Libraries ---
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# collections: provides specialized container datatypes, a deque keeps the tasks in flight in submission order.
+from collections import deque
+# multiprocessing: supports spawning processes, to use the multiple processors on a machine.
+import multiprocessing
+# shared_memory: blocks of memory that can be accessed by several processes, by name.
+from multiprocessing import resource_tracker, shared_memory
+# sys: module which provides access to variables used or maintained by the interpreter and to functions that
+#      interact strongly with the interpreter
+import sys
+
+# Default size of the blocks, enough for a 4K BGR image (3840 x 2160 x 3 = 24.9 MB)
+BLOCK_BYTES_ = 32 * 1024 * 1024
+
+# Alignment of the arrays packed into a block
+_ALIGNMENT_ = 64
+
+# Blocks attached by a worker process, by name
+_attached_ = {}
+
+
+class SharedBlockPool:
+    """
+    Pool of shared memory blocks of the same size, created on demand and recycled
+    """
+
+    def __init__(self,
+                 block_bytes_: int = BLOCK_BYTES_,
+                 max_blocks_: int = 8):
+        """
+        :param block_bytes_: size of each block
+        :param max_blocks_: maximum number of blocks
+        """
+        self.block_bytes_ = block_bytes_
+        self.max_blocks_ = max_blocks_
+        self.blocks_ = {}
+        self.free_ = []
+
+    def acquire(self):
+        """
+        Gets a free block, creating it if there is none and the maximum is not reached
+        :return: the block, a SharedMemory, or None if all the blocks are in use
+        """
+        if self.free_:
+            return self.free_.pop()
+        if len(self.blocks_) >= self.max_blocks_:
+            return None
+        block_ = shared_memory.SharedMemory(create=True, size=self.block_bytes_)
+        self.blocks_[block_.name] = block_
+        return block_
+
+    def release(self, block_):
+        """
+        Returns a block to the pool
+        :param block_: block got with acquire
+        """
+        self.free_.append(block_)
+
+    def close(self):
+        """
+        Closes and destroys all the blocks
+        """
+        for block_ in self.blocks_.values():
+            block_.close()
+            block_.unlink()
+        self.blocks_.clear()
+        self.free_.clear()
+
+
+class SharedMemoryExecutor:
+    """
+    Pool of worker processes that run a function over images passed through shared memory, e.g.
+      with SharedMemoryExecutor(4) as executor_:
+          for outputs_ in executor_.map(operations.apply, images_, ['hue_sweep']):
+              ...
+    """
+
+    def __init__(self,
+                 workers_: int = None,
+                 block_bytes_: int = BLOCK_BYTES_,
+                 tasks_per_worker_: int = 2,
+                 initializer_=None):
+        """
+        :param workers_: number of worker processes, by default the number of cores
+        :param block_bytes_: size of each shared memory block, one for the input and one for the outputs of each task
+        :param tasks_per_worker_: tasks in flight per worker, so a worker finds the next task when it finishes one
+        :param initializer_: function that initializes each worker process, e.g. to set the OpenCV threads
+        """
+        self.workers_ = workers_ or multiprocessing.cpu_count()
+        self.in_flight_ = self.workers_ * tasks_per_worker_
+        self.blocks_ = SharedBlockPool(block_bytes_, 2 * self.in_flight_)
+        self.processes_ = multiprocessing.Pool(self.workers_, initializer=_init_worker, initargs=(initializer_,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def map(self,
+            function_,
+            images_,
+            *args_):
+        """
+        Runs function_(image_, *args_) for each image in the worker processes, keeping a bounded number of tasks in
+          flight, so the images can come from a generator
+        :param function_: function defined at module level, so it can be pickled by name, that receives an image and
+                          returns an image, or a dictionary {name: image}
+        :param images_: iterable of images
+        :param args_: further arguments of the function, they are pickled
+        :return: generator of the results, in the order of the images. The output images are copies, so they stay
+                 valid after the blocks are recycled.
+        """
+        pending_ = deque()
+        for image_ in images_:
+            if len(pending_) >= self.in_flight_:
+                yield self._collect(pending_.popleft())
+
+            input_block_, output_block_ = self.blocks_.acquire(), self.blocks_.acquire()
+            input_ = _pack([image_], input_block_)[0]
+            pending_.append((self.processes_.apply_async(_run_task, (function_, input_, _name(input_block_),
+                                                                     _name(output_block_), args_)),
+                             input_block_, output_block_))
+
+        while pending_:
+            yield self._collect(pending_.popleft())
+
+    def close(self):
+        """
+        Stops the worker processes and destroys the shared memory blocks
+        """
+        self.processes_.close()
+        self.processes_.join()
+        self.blocks_.close()
+
+    def _collect(self, task_: tuple):
+        async_result_, input_block_, output_block_ = task_
+        try:
+            kind_, names_, outputs_ = async_result_.get()
+            # Copy the outputs out of the block, so it can be reused
+            images_ = [np.array(image_) for image_ in _unpack(outputs_, output_block_)]
+        finally:
+            for block_ in (input_block_, output_block_):
+                if block_ is not None:
+                    self.blocks_.release(block_)
+        return images_[0] if kind_ == 'image' else dict(zip(names_, images_))
+
+
+def _name(block_):
+    return block_.name if block_ is not None else None
+
+
+def _pack(images_: [],
+          block_) -> []:
+    """
+    Copies the images into a block, one after another, and describes where each one is
+    :param images_: images to pack
+    :param block_: SharedMemory, or None to pickle all the images
+    :return: list with, for each image, a tuple ('shm', offset, shape, data type) if it is in the block,
+             or ('pickle', image) otherwise
+    """
+    references_ = []
+    offset_ = 0
+    for image_ in images_:
+        if block_ is not None and offset_ + image_.nbytes <= block_.size:
+            view_ = np.ndarray(image_.shape, dtype=image_.dtype, buffer=block_.buf, offset=offset_)
+            view_[...] = image_
+            del view_
+            references_.append(('shm', offset_, image_.shape, image_.dtype.str))
+            offset_ += -(-image_.nbytes // _ALIGNMENT_) * _ALIGNMENT_
+        else:
+            references_.append(('pickle', image_))
+    return references_
+
+
+def _unpack(references_: [],
+            block_) -> []:
+    """
+    Gets the images described by _pack
+    :return: list of the images, the ones in the block are views on it
+    """
+    return [np.ndarray(reference_[2], dtype=np.dtype(reference_[3]), buffer=block_.buf, offset=reference_[1])
+            if reference_[0] == 'shm' else reference_[1]
+            for reference_ in references_]
+
+
+def _attach(name_: str):
+    """
+    Attaches a worker process to a block, once
+    :param name_: name of the block
+    :return: the SharedMemory
+    """
+    block_ = _attached_.get(name_)
+    if block_ is None:
+        if sys.version_info >= (3, 13):
+            block_ = shared_memory.SharedMemory(name=name_, track=False)
+        else:
+            # Before Python 3.13, attaching registers the block in the resource tracker shared with the parent
+            #  process, which then warns about it or destroys it, although the parent owns it. So skip that register.
+            register_ = resource_tracker.register
+            resource_tracker.register = lambda *_: None
+            try:
+                block_ = shared_memory.SharedMemory(name=name_)
+            finally:
+                resource_tracker.register = register_
+        _attached_[name_] = block_
+    return block_
+
+
+def _init_worker(initializer_):
+    if initializer_ is not None:
+        initializer_()
+
+
+def _run_task(function_,
+              input_: tuple,
+              input_name_: str,
+              output_name_: str,
+              args_: tuple) -> tuple:
+    """
+    Runs a task in a worker process
+    :return: a tuple (kind of result 'image' or 'dict', names of the outputs, references of the outputs)
+    """
+    image_ = _unpack([input_], _attach(input_name_) if input_[0] == 'shm' else None)[0]
+    # The input block is reused by the next tasks, so protect it from the function
+    image_.flags.writeable = False
+    result_ = function_(image_, *args_)
+
+    if isinstance(result_, dict):
+        kind_, names_, images_ = 'dict', list(result_), list(result_.values())
+    else:
+        kind_, names_, images_ = 'image', [], [result_]
+    return kind_, names_, _pack(images_, _attach(output_name_) if output_name_ is not None else None)
@@ -6,9 +6,23 @@
 import cv2
 # imutils: functions to make basic image processing functions such as translation, rotation, resizing, skeletonization,
 #          and displaying
-from imutils import resize
 # matplotlib: library for creating static, animated, and interactive visualizations
-import matplotlib.pyplot as plt
+# Both are imported when they are used, so headless processes and the OpenCV display never pay for matplotlib.
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+
+# --- App modules ---
+from helper import channel_helper, trace_helper
+
+# Mosaic buffer reused between calls while the mosaic layout does not change
+_mosaic_buffer_ = {'buffer': None}
+
+# Offscreen rendering: when there is an output folder, the show functions write a mosaic file instead of opening windows
+_offscreen_ = {'folder': None, 'extension': '.png', 'count': 0}
 
 
 def plt_show(images_: [],
@@ -21,33 +35,42 @@ def plt_show(images_: [],
     :param color_maps_: color maps array to show each image
     """
 
-    plt.figure(figsize=(12, 6)).tight_layout(pad=0)  # figsize=(width, height) in inches
-    # plt.subplots_adjust(bottom=0., left=0, top=1., right=1)
-    plt.subplots_adjust(bottom=0.0,
-                        top=0.96,
-                        wspace=0.1,
-                        hspace=0.1)
-    length_ = len(images_)
-    cols_ = length_ if length_ < 5 else 5
-    rows_ = int(length_ / cols_) + (0 if length_ % cols_ == 0 else 1)
+    if _offscreen_['folder'] is not None:
+        # matplotlib receives RGB images, while the mosaic is BGR like OpenCV. Converting back a cached conversion
+        #  returns its original image, without a new one.
+        write_offscreen([channel_helper.swap_rb(image_) for image_ in images_], image_titles_)
+        return
 
-    # Show the channels amd full image
-    for i_ in range(len(images_)):
-        # subplot(<rows><cols><ordinal position #>
-        position_ = rows_ * 100 + cols_ * 10 + (i_ + 1)
+    import matplotlib.pyplot as plt
 
-        # Add image to the plot, setting color map to selected scale for proper rendering.
-        plt.subplot(position_).imshow(images_[i_], cmap=color_maps_[i_])
+    with trace_helper.span(trace_helper.DISPLAY_):
+        plt.figure(figsize=(12, 6)).tight_layout(pad=0)  # figsize=(width, height) in inches
+        # plt.subplots_adjust(bottom=0., left=0, top=1., right=1)
+        plt.subplots_adjust(bottom=0.0,
+                            top=0.96,
+                            wspace=0.1,
+                            hspace=0.1)
+        length_ = len(images_)
+        cols_ = length_ if length_ < 5 else 5
+        rows_ = int(length_ / cols_) + (0 if length_ % cols_ == 0 else 1)
 
-        # Set title of the image
-        image_title_ = image_titles_[i_]
-        plt.title(image_title_)
+        # Show the channels amd full image
+        for i_ in range(len(images_)):
+            # subplot(<rows><cols><ordinal position #>
+            position_ = rows_ * 100 + cols_ * 10 + (i_ + 1)
 
-        # Hide axes and borders
-        plt.axis('off')
+            # Add image to the plot, setting color map to selected scale for proper rendering.
+            plt.subplot(position_).imshow(images_[i_], cmap=color_maps_[i_])
 
-        # Report array dimensions
-        print(f'{image_title_} dimensions:', images_[i_].shape)
+            # Set title of the image
+            image_title_ = image_titles_[i_]
+            plt.title(image_title_)
+
+            # Hide axes and borders
+            plt.axis('off')
+
+            # Report array dimensions
+            print(f'{image_title_} dimensions:', images_[i_].shape)
 
     # Display the images
     plt.show()
@@ -62,20 +85,141 @@ def cv2_show(images_: [],
     :param image_titles_: strings array with the title of each image
     :param fit_image_: flag to adjust the image and keep it within the screen
     """
-    # Show the image and channels
-    for i_ in range(len(images_)):
-        # Create window
-        win_name_ = image_titles_[i_]
-        cv2.namedWindow(win_name_, cv2.WINDOW_AUTOSIZE)
-
-        # Downsize image maintaining aspect ratio and show it in the window
-        if fit_image_:
-            cv2.imshow(win_name_, resize(images_[i_], width=400))
-        else:
-            cv2.imshow(win_name_, images_[i_])
+    if _offscreen_['folder'] is not None:
+        write_offscreen(images_, image_titles_)
+        return
+
+    from imutils import resize
+
+    with trace_helper.span(trace_helper.DISPLAY_):
+        # Show the image and channels
+        for i_ in range(len(images_)):
+            # Create window
+            win_name_ = image_titles_[i_]
+            cv2.namedWindow(win_name_, cv2.WINDOW_AUTOSIZE)
+
+            # Downsize image maintaining aspect ratio and show it in the window
+            if fit_image_:
+                cv2.imshow(win_name_, resize(images_[i_], width=400))
+            else:
+                cv2.imshow(win_name_, images_[i_])
 
-        # Report array dimensions
-        print(f'{win_name_} dimensions (height x width):', images_[i_].shape)
+            # Report array dimensions
+            print(f'{win_name_} dimensions (height x width):', images_[i_].shape)
 
     cv2.waitKey(0)
     cv2.destroyAllWindows()
+
+
+def mosaic(images_: [],
+           image_titles_: [],
+           tile_width_: int = 400,
+           cols_: int = 0,
+           title_height_: int = 28) -> np.ndarray:
+    """
+    Tiles images and their titles into a single BGR mosaic, scaling each image down to the tile width maintaining
+      its aspect ratio. The mosaic buffer is reused between calls with the same layout, so copy the result to keep it.
+    :param images_: images array to tile, BGR or grayscale
+    :param image_titles_: strings array with the title of each image
+    :param tile_width_: width of each tile in pixels
+    :param cols_: number of columns, by default up to 5 like plt_show
+    :param title_height_: height in pixels of the strip with the title above each image
+    :return: the mosaic, a BGR image
+    """
+    length_ = len(images_)
+    cols_ = cols_ or (length_ if length_ < 5 else 5)
+    rows_ = int(length_ / cols_) + (0 if length_ % cols_ == 0 else 1)
+
+    # Size of each image in its tile, and height of the tiles
+    sizes_ = [(tile_width_, max(1, round(image_.shape[0] * tile_width_ / image_.shape[1]))) for image_ in images_]
+    tile_height_ = max(height_ for _, height_ in sizes_) + title_height_
+
+    # Reuse the buffer when the layout is the same
+    shape_ = (rows_ * tile_height_, cols_ * tile_width_, 3)
+    buffer_ = _mosaic_buffer_['buffer']
+    if buffer_ is None or buffer_.shape != shape_:
+        buffer_ = _mosaic_buffer_['buffer'] = np.empty(shape_, dtype=np.uint8)
+    buffer_.fill(0)
+
+    for i_, (image_, (width_, height_)) in enumerate(zip(images_, sizes_)):
+        top_ = (i_ // cols_) * tile_height_
+        left_ = (i_ % cols_) * tile_width_
+
+        # Scale the image straight into its place in the mosaic
+        if image_.dtype != np.uint8:
+            image_ = cv2.normalize(image_, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+        # To shrink an image, it will generally look best with INTER_AREA interpolation
+        interpolation_ = cv2.INTER_AREA if width_ < image_.shape[1] else cv2.INTER_LINEAR
+        target_ = buffer_[top_ + title_height_:top_ + title_height_ + height_, left_:left_ + width_]
+        if image_.ndim == 2:
+            cv2.cvtColor(cv2.resize(image_, (width_, height_), interpolation=interpolation_), cv2.COLOR_GRAY2BGR,
+                         dst=target_)
+        else:
+            cv2.resize(image_, (width_, height_), dst=target_, interpolation=interpolation_)
+
+        cv2.putText(buffer_, image_titles_[i_], org=(left_ + 5, top_ + title_height_ - 8),
+                    fontFace=cv2.FONT_HERSHEY_SIMPLEX, fontScale=0.55, color=(255, 255, 255), thickness=1,
+                    lineType=cv2.LINE_AA)
+
+    return buffer_
+
+
+def mosaic_show(images_: [],
+                image_titles_: [],
+                tile_width_: int = 400,
+                win_name_: str = 'Mosaic'):
+    """
+    Shows images tiled in a single OpenCV window
+    :param images_: images array to show, BGR or grayscale
+    :param image_titles_: strings array with the title of each image
+    :param tile_width_: width of each tile in pixels
+    :param win_name_: title of the window
+    """
+    cv2.imshow(win_name_, mosaic(images_, image_titles_, tile_width_))
+    cv2.waitKey(0)
+    cv2.destroyWindow(win_name_)
+
+
+def mosaic_write(file_path_: str,
+                 images_: [],
+                 image_titles_: [],
+                 tile_width_: int = 400,
+                 params_: [] = ()) -> bool:
+    """
+    Writes images tiled in a single image file, without a display
+    :param file_path_: image file to write, its extension sets the format, e.g. .png or .jpg
+    :param images_: images array to write, BGR or grayscale
+    :param image_titles_: strings array with the title of each image
+    :param tile_width_: width of each tile in pixels
+    :param params_: encoder parameters of cv2.imwrite, e.g. (cv2.IMWRITE_JPEG_QUALITY, 90)
+    :return: True whether the file was written, otherwise False
+    """
+    return cv2.imwrite(file_path_, mosaic(images_, image_titles_, tile_width_), list(params_))
+
+
+def set_offscreen(output_folder_: str = None,
+                  extension_: str = '.png'):
+    """
+    Sets the offscreen rendering: plt_show and cv2_show write a mosaic file to the output folder instead of opening
+      windows, e.g. to run the demos without a display server
+    :param output_folder_: folder of the mosaic files, None opens windows again
+    :param extension_: file extension, and so format, of the mosaic files
+    """
+    if output_folder_ is not None:
+        os.makedirs(output_folder_, exist_ok=True)
+    _offscreen_.update(folder=output_folder_, extension=extension_, count=0)
+
+
+def write_offscreen(images_: [],
+                    image_titles_: []):
+    """
+    Writes a mosaic file to the offscreen output folder, named with a sequence number and the first title
+    :param images_: images array to write, BGR or grayscale
+    :param image_titles_: strings array with the title of each image
+    """
+    _offscreen_['count'] += 1
+    name_ = ''.join(char_ if char_.isalnum() else '_' for char_ in image_titles_[0]) if image_titles_ else 'mosaic'
+    file_path_ = os.path.join(_offscreen_['folder'], f'{_offscreen_["count"]:03d}_{name_}{_offscreen_["extension"]}')
+    with trace_helper.span(trace_helper.OUTPUT_):
+        mosaic_write(file_path_, images_, image_titles_)
+    print(f'Mosaic written to {file_path_}')
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# Text rendering cache: each combination of text, font face, scale, thickness, line type and colour is rasterized
+#  once into an alpha mask (sprite), kept in a bounded LRU cache, and alpha-blitted onto the images.
+# The sprite is cropped to the pixels the text covers, and it is blitted in place with two OpenCV operations on 8-bit
+#  images, a scaled multiplication by the inverse alpha and a saturated addition of the premultiplied colour, instead
+#  of numpy temporaries over the whole box.
+# The measurement and the line wrapping of the texts are cached too, as labels repeat across frames.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# collections: provides specialized container datatypes, OrderedDict is the LRU cache of sprites.
+from collections import OrderedDict
+# functools: higher-order functions, lru_cache memoizes the measurement and wrapping of the texts.
+from functools import lru_cache
+# textwrap: provides formatting of text by adjusting the line breaks in the input paragraph.
+import textwrap
+# threading: provides a lock to make the cache safe when it is shared by several threads.
+import threading
+
+# --- App modules ---
+from helper import trace_helper
+
+# Maximum number of sprites in the cache
+SPRITE_CACHE_SIZE_ = 512
+
+# Pixels of the box of a text times its thickness squared under which cv2.putText draws it faster than a sprite is
+#  blitted, antialiased and not
+DIRECT_AA_PIXELS_ = 1536
+DIRECT_PIXELS_ = 6144
+
+# Sprite cache: (text, font face, font scale, color, thickness, line type, channels) -> sprite
+_sprites_ = OrderedDict()
+_sprites_lock_ = threading.Lock()
+_sprites_state_ = {'capacity': SPRITE_CACHE_SIZE_, 'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+@lru_cache(maxsize=1024)
+def measure_text(text_: str,
+                 font_face_: int,
+                 font_scale_: float,
+                 thickness_: int = 1) -> tuple:
+    """
+    Measures a text, like cv2.getTextSize
+    :return: a tuple ((width, height), baseline)
+    """
+    return cv2.getTextSize(text_, font_face_, font_scale_, thickness_)
+
+
+@lru_cache(maxsize=256)
+def wrap_text(text_: str,
+              width_: int) -> tuple:
+    """
+    Wraps a text in lines, like textwrap.wrap
+    :param text_: text to wrap
+    :param width_: maximum characters per line
+    :return: tuple with the lines
+    """
+    return tuple(textwrap.wrap(text_, width=width_))
+
+
+def text_sprite(text_: str,
+                font_face_: int,
+                font_scale_: float,
+                color_: tuple,
+                thickness_: int = 1,
+                line_type_: int = cv2.LINE_8,
+                channels_: int = 3) -> tuple:
+    """
+    Gets the sprite of a text from the cache, rasterizing it if it is not there
+    :return: a tuple (left offset, top offset from the origin of the text,
+                      inverse alpha 255 - alpha as uint8 array,
+                      color premultiplied by alpha / 255 as uint8 array)
+    """
+    key_ = (text_, font_face_, font_scale_, tuple(color_), thickness_, line_type_, channels_)
+    with _sprites_lock_:
+        sprite_ = _sprites_.get(key_)
+        if sprite_ is not None:
+            _sprites_.move_to_end(key_)
+            _sprites_state_['hits'] += 1
+            return sprite_
+        _sprites_state_['misses'] += 1
+
+    # Rasterize the text as an alpha mask, with the same OpenCV function it replaces
+    (width_, height_), baseline_ = measure_text(text_, font_face_, font_scale_, thickness_)
+    padding_ = thickness_ + 2
+    mask_ = np.zeros((height_ + baseline_ + 2 * padding_, width_ + 2 * padding_), dtype=np.uint8)
+    cv2.putText(mask_, text_, (padding_, padding_ + height_), font_face_, font_scale_, 255, thickness_, line_type_)
+
+    # Crop the mask to the pixels the text covers, so the blit does not go over empty rows and columns
+    x_, y_, box_width_, box_height_ = cv2.boundingRect(mask_)
+    mask_ = mask_[y_:y_ + box_height_, x_:x_ + box_width_]
+
+    alpha_ = mask_.astype(np.uint16)
+    if channels_ > 1:
+        alpha_ = alpha_[:, :, None]
+    color_values_ = np.array(color_[:channels_] if channels_ > 1 else color_[:1], dtype=np.uint16)
+    premultiplied_ = np.uint8((alpha_ * (color_values_ if channels_ > 1 else color_values_[0]) + 127) // 255)
+    inverse_alpha_ = np.ascontiguousarray(np.broadcast_to(255 - mask_[:, :, None] if channels_ > 1 else 255 - mask_,
+                                                          premultiplied_.shape))
+    sprite_ = (x_ - padding_, y_ - padding_ - height_, inverse_alpha_, premultiplied_)
+
+    with _sprites_lock_:
+        _sprites_[key_] = sprite_
+        while len(_sprites_) > _sprites_state_['capacity']:
+            _sprites_.popitem(last=False)
+            _sprites_state_['evictions'] += 1
+    return sprite_
+
+
+def put_text(image_,
+             text_: str,
+             org_: tuple,
+             font_face_: int,
+             font_scale_: float,
+             color_: tuple,
+             thickness_: int = 1,
+             line_type_: int = cv2.LINE_8):
+    """
+    Writes a text on the image in place, like cv2.putText, alpha-blitting its cached sprite. A small text is drawn
+      with cv2.putText, which is faster than the blit for it
+    :param image_: uint8 image to annotate, BGR or grayscale
+    :param text_: string to be written
+    :param org_: bottom-left corner of the text string in the image
+    :param font_face_: font type
+    :param font_scale_: factor that is multiplied by the font-specific base size
+    :param color_: BGR color, or gray level as its first value for grayscale images
+    :param thickness_: thickness of the lines used to draw the text
+    :param line_type_: cv2.LINE_8, cv2.LINE_4 or cv2.LINE_AA
+    :return: the annotated image
+    """
+    channels_ = image_.shape[2] if image_.ndim == 3 else 1
+    if not isinstance(color_, (tuple, list)):
+        color_ = (color_,)
+    (text_width_, text_height_), baseline_ = measure_text(text_, font_face_, font_scale_, thickness_)
+    if text_width_ * (text_height_ + baseline_) * thickness_ ** 2 < (DIRECT_AA_PIXELS_ if line_type_ == cv2.LINE_AA
+                                                                       else DIRECT_PIXELS_):
+        with trace_helper.span(trace_helper.DRAWING_):
+            cv2.putText(image_, text_, org_, font_face_, font_scale_, tuple(color_), thickness_, line_type_)
+        return image_
+
+    left_offset_, top_offset_, inverse_alpha_, premultiplied_ = text_sprite(text_, font_face_, font_scale_,
+                                                                            tuple(color_), thickness_, line_type_,
+                                                                            channels_)
+
+    # Clip the sprite to the image
+    height_, width_ = image_.shape[:2]
+    sprite_height_, sprite_width_ = inverse_alpha_.shape[:2]
+    top_, left_ = org_[1] + top_offset_, org_[0] + left_offset_
+    y0_, x0_ = max(0, top_), max(0, left_)
+    y1_, x1_ = min(height_, top_ + sprite_height_), min(width_, left_ + sprite_width_)
+    if y0_ >= y1_ or x0_ >= x1_:
+        return image_
+
+    sprite_rows_ = slice(y0_ - top_, y1_ - top_)
+    sprite_cols_ = slice(x0_ - left_, x1_ - left_)
+    region_ = image_[y0_:y1_, x0_:x1_]
+    with trace_helper.span(trace_helper.DRAWING_):
+        # region * (255 - alpha) / 255 + color * alpha / 255, rounded and saturated by OpenCV, written in place
+        cv2.multiply(region_, inverse_alpha_[sprite_rows_, sprite_cols_], dst=region_, scale=1 / 255)
+        cv2.add(region_, premultiplied_[sprite_rows_, sprite_cols_], dst=region_)
+    return image_
+
+
+def put_text_lines(image_,
+                   lines_: [],
+                   org_: tuple,
+                   font_face_: int,
+                   font_scale_: float,
+                   color_: tuple,
+                   thickness_: int = 1,
+                   line_type_: int = cv2.LINE_8,
+                   gap_: int = 5):
+    """
+    Writes lines of text on the image in place, one below the other, separated by the height of the first line
+      plus a gap
+    :param image_: uint8 image to annotate, BGR or grayscale
+    :param lines_: strings to be written, e.g. as returned by wrap_text
+    :param org_: bottom-left corner of the first line in the image
+    :param gap_: pixels between lines
+    :return: the annotated image
+    """
+    if not lines_:
+        return image_
+
+    # Calculate the interlinear gap
+    line_height_ = measure_text(lines_[0], font_face_, font_scale_, thickness_)[0][1] + gap_
+    left_margin_, top_margin_ = org_
+    for line_ in lines_:
+        put_text(image_, line_, (left_margin_, top_margin_), font_face_, font_scale_, color_, thickness_, line_type_)
+        top_margin_ += line_height_
+    return image_
+
+
+def cache_stats() -> dict:
+    """
+    Reports the counters of the sprite cache, and of the measurement and wrapping caches
+    :return: a dictionary with hits, misses, evictions, entries and capacity of the sprites, and the lru_cache info
+             of measure_text and wrap_text
+    """
+    with _sprites_lock_:
+        stats_ = dict(_sprites_state_)
+        stats_['entries'] = len(_sprites_)
+    stats_['measure_text'] = measure_text.cache_info()._asdict()
+    stats_['wrap_text'] = wrap_text.cache_info()._asdict()
+    return stats_
+
+
+def clear_cache():
+    """
+    Empties the sprite, measurement and wrapping caches, and resets their counters
+    """
+    with _sprites_lock_:
+        _sprites_.clear()
+        _sprites_state_.update(hits=0, misses=0, evictions=0)
+    measure_text.cache_clear()
+    wrap_text.cache_clear()
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+# Opt-in tracing of the hot paths of the course.
+# The course functions are wrapped by traced(), and their stages are marked with spans, e.g.
+#  with trace_helper.span('color'): hsv_image_ = cv2.cvtColor(image_, cv2.COLOR_BGR2HSV)
+# While tracing is disabled, which is the default, traced() only checks a flag before calling the function, and span()
+#  returns a shared context manager that does nothing.
+# While it is enabled, each span records its wall time, the CPU time of the process (the worker threads of OpenCV
+#  included) and, when tracemalloc is enabled too, the bytes it allocated and its peak of traced memory. The spans are
+#  exported as Chrome trace events, to open in chrome://tracing or https://ui.perfetto.dev, and summarized by name.
+
+# --- Python modules ---
+# functools: higher-order functions, wraps keeps the name and the docstring of the traced functions.
+import functools
+# json: encoder and decoder of JSON (JavaScript Object Notation) data.
+import json
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+# threading: the spans of each thread are nested on their own stack, and the events are appended under a lock.
+import threading
+# time: provides various time-related functions.
+import time
+# tracemalloc: traces the memory blocks allocated by Python, numpy arrays included.
+import tracemalloc
+
+# Stages of the course functions, as span names
+DECODE_ = 'decode'
+COLOR_ = 'color'
+ARITHMETIC_ = 'arithmetic'
+GEOMETRY_ = 'geometry'
+DRAWING_ = 'drawing'
+DISPLAY_ = 'display'
+OUTPUT_ = 'output'
+
+_tracer_ = {'enabled': False, 'memory': False, 'started_tracemalloc': False, 'origin': 0., 'events': []}
+_events_lock_ = threading.Lock()
+_local_ = threading.local()
+
+
+class _NullSpan:
+    """
+    Span of the disabled tracing, shared by all the calls
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info_):
+        return False
+
+
+_NULL_SPAN_ = _NullSpan()
+
+
+class _Span:
+    """
+    Span of the enabled tracing, it appends a Chrome complete event when it exits
+    """
+    __slots__ = ('name_', 'category_', 'start_', 'cpu_start_', 'memory_start_', 'peak_', 'parent_')
+
+    def __init__(self, name_: str, category_: str):
+        self.name_ = name_
+        self.category_ = category_
+
+    def __enter__(self):
+        stack_ = _stack()
+        self.parent_ = stack_[-1] if stack_ else None
+        stack_.append(self)
+        if _tracer_['memory'] and tracemalloc.is_tracing():
+            current_, peak_ = tracemalloc.get_traced_memory()
+            # The peak is reset to measure the one of this span, the parent keeps the peak it saw so far
+            if self.parent_ is not None:
+                self.parent_.peak_ = max(self.parent_.peak_, peak_)
+            tracemalloc.reset_peak()
+            self.memory_start_, self.peak_ = current_, current_
+        else:
+            self.memory_start_ = None
+        self.cpu_start_ = time.process_time()
+        self.start_ = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info_):
+        end_ = time.perf_counter()
+        cpu_ = time.process_time() - self.cpu_start_
+        arguments_ = {'cpu_ms': cpu_ * 1000}
+        if self.memory_start_ is not None and tracemalloc.is_tracing():
+            current_, peak_ = tracemalloc.get_traced_memory()
+            self.peak_ = max(self.peak_, peak_)
+            arguments_['allocated_bytes'] = current_ - self.memory_start_
+            arguments_['peak_bytes'] = self.peak_ - self.memory_start_
+            if self.parent_ is not None:
+                self.parent_.peak_ = max(self.parent_.peak_, self.peak_)
+
+        stack_ = _stack()
+        if stack_ and stack_[-1] is self:
+            stack_.pop()
+        event_ = {'name': self.name_, 'cat': self.category_, 'ph': 'X',
+                  'ts': (self.start_ - _tracer_['origin']) * 1e6, 'dur': (end_ - self.start_) * 1e6,
+                  'pid': os.getpid(), 'tid': threading.get_ident(), 'args': arguments_}
+        with _events_lock_:
+            _tracer_['events'].append(event_)
+        return False
+
+
+def _stack() -> list:
+    stack_ = getattr(_local_, 'stack_', None)
+    if stack_ is None:
+        stack_ = _local_.stack_ = []
+    return stack_
+
+
+def enable(memory_: bool = False):
+    """
+    Enables the tracing, discarding the spans recorded before
+    :param memory_: flag to measure the memory allocated by each span with tracemalloc, which slows down the
+                    allocations while it traces them
+    """
+    with _events_lock_:
+        _tracer_['events'] = []
+    if memory_ and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _tracer_['started_tracemalloc'] = True
+    _tracer_.update(enabled=True, memory=memory_, origin=time.perf_counter())
+
+
+def disable():
+    """
+    Disables the tracing, keeping the spans recorded to export them
+    """
+    _tracer_.update(enabled=False, memory=False)
+    if _tracer_['started_tracemalloc']:
+        tracemalloc.stop()
+        _tracer_['started_tracemalloc'] = False
+
+
+def is_enabled() -> bool:
+    return _tracer_['enabled']
+
+
+def span(name_: str,
+         category_: str = 'stage'):
+    """
+    Marks a span of code, as a context manager
+    :param name_: name of the span, e.g. one of the stages DECODE_, COLOR_, ARITHMETIC_, ...
+    :param category_: category of the span in the trace, e.g. 'stage' or 'function'
+    :return: the context manager
+    """
+    if not _tracer_['enabled']:
+        return _NULL_SPAN_
+    return _Span(name_, category_)
+
+
+def traced(function_):
+    """
+    Decorates a function, so each call is a span named after its module and its name, e.g. module_04.multiply_contrast
+    :param function_: function to trace
+    :return: the decorated function
+    """
+    name_ = f'{function_.__module__.rsplit(".", 1)[-1]}.{function_.__qualname__}'
+
+    @functools.wraps(function_)
+    def wrapper_(*args_, **kwargs_):
+        if not _tracer_['enabled']:
+            return function_(*args_, **kwargs_)
+        with _Span(name_, 'function'):
+            return function_(*args_, **kwargs_)
+
+    return wrapper_
+
+
+def events() -> list:
+    """
+    :return: a copy of the list of the recorded spans, as Chrome trace events
+    """
+    with _events_lock_:
+        return list(_tracer_['events'])
+
+
+def write_chrome_trace(file_path_: str):
+    """
+    Writes the recorded spans as a Chrome trace, a JSON file for chrome://tracing or https://ui.perfetto.dev
+    :param file_path_: JSON file to write
+    """
+    with open(file_path_, 'w', encoding='utf-8') as file_:
+        json.dump({'traceEvents': events(), 'displayTimeUnit': 'ms'}, file_)
+
+
+def summary() -> dict:
+    """
+    Aggregates the recorded spans by name
+    :return: a dictionary {span name: dictionary with the category, the count, the total, mean and maximum wall
+             milliseconds, the total CPU milliseconds, and the total allocated bytes and maximum peak bytes when the
+             memory was traced}, sorted by total wall time, largest first
+    """
+    rows_ = {}
+    for event_ in events():
+        row_ = rows_.setdefault(event_['name'], {'category': event_['cat'], 'count': 0, 'wall_ms': 0., 'max_ms': 0.,
+                                                 'cpu_ms': 0.})
+        wall_ms_ = event_['dur'] / 1000
+        row_['count'] += 1
+        row_['wall_ms'] += wall_ms_
+        row_['max_ms'] = max(row_['max_ms'], wall_ms_)
+        row_['cpu_ms'] += event_['args']['cpu_ms']
+        if 'allocated_bytes' in event_['args']:
+            row_['allocated_bytes'] = row_.get('allocated_bytes', 0) + event_['args']['allocated_bytes']
+            row_['peak_bytes'] = max(row_.get('peak_bytes', 0), event_['args']['peak_bytes'])
+    for row_ in rows_.values():
+        row_['mean_ms'] = row_['wall_ms'] / row_['count']
+    return dict(sorted(rows_.items(), key=lambda item_: item_[1]['wall_ms'], reverse=True))
+
+
+def summary_table() -> str:
+    """
+    Formats the summary as a table, one line per span name
+    :return: the table
+    """
+    lines_ = [f'{"span":<40} {"count":>6} {"wall ms":>10} {"mean ms":>9} {"max ms":>9} {"cpu ms":>10} '
+              f'{"alloc MB":>9} {"peak MB":>8}']
+    for name_, row_ in summary().items():
+        memory_ = (f'{row_["allocated_bytes"] / 2 ** 20:9.1f} {row_["peak_bytes"] / 2 ** 20:8.1f}'
+                   if 'allocated_bytes' in row_ else f'{"-":>9} {"-":>8}')
+        lines_.append(f'{name_:<40} {row_["count"]:6d} {row_["wall_ms"]:10.1f} {row_["mean_ms"]:9.2f} '
+                      f'{row_["max_ms"]:9.2f} {row_["cpu_ms"]:10.1f} {memory_}')
+    return '\n'.join(lines_)
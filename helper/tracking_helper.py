@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+# Multi-object tracking by template matching: each track searches its template only in a region of interest around
+#  the position predicted from its velocity, instead of the whole frame, so the cost per track does not grow with the
+#  frame size. The frame is converted to grayscale once for all the tracks.
+# A track that does not find its template for a number of frames is stale, and is dropped.
+# The latency of each frame is recorded in a histogram. In budget mode, when the frames fall behind the target fps,
+#  the low-priority tracks are updated every 2, 4, ... frames and only predicted in between, and
+#  their update frequency recovers when the frames are back within the budget.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# time: provides various time-related functions.
+import time
+
+# --- App modules ---
+from . import buffer_helper, capture_helper
+
+# Frames at a stride of the budget mode before probing a lower one
+PROBE_FRAMES_ = 30
+
+
+class Track:
+    """
+    Object followed by template matching in a region of interest around its predicted position
+    """
+
+    def __init__(self,
+                 track_id_: int,
+                 gray_,
+                 box_: tuple,
+                 frame_index_: int,
+                 priority_: int = 0):
+        """
+        :param track_id_: identifier of the track
+        :param gray_: grayscale frame where the object is
+        :param box_: box of the object in the frame, a tuple (x, y, width, height)
+        :param frame_index_: number of the frame
+        :param priority_: 0 is low priority, its updates can be throttled in budget mode, higher ones are never
+        """
+        x_, y_, width_, height_ = (int(value_) for value_ in box_)
+        self.track_id_ = track_id_
+        self.template_ = gray_[y_:y_ + height_, x_:x_ + width_].copy()
+        self.position_ = np.array([x_, y_], dtype=np.float32)
+        self.size_ = (width_, height_)
+        self.velocity_ = np.zeros(2, dtype=np.float32)
+        self.priority_ = priority_
+        self.score_ = 1.
+        self.misses_ = 0
+        self.last_index_ = frame_index_
+
+    def box(self, frame_index_: int) -> tuple:
+        """
+        Gets the box of the object in a frame, predicted from its velocity if the frame was not searched
+        :param frame_index_: number of the frame
+        :return: the box, a tuple of integers (x, y, width, height)
+        """
+        x_, y_ = self.position_ + self.velocity_ * (frame_index_ - self.last_index_)
+        return int(round(x_)), int(round(y_)), self.size_[0], self.size_[1]
+
+    def update(self,
+               gray_,
+               frame_index_: int,
+               margin_: float,
+               min_score_: float):
+        """
+        Searches the template in a region of interest around the predicted position
+        :param gray_: grayscale frame
+        :param frame_index_: number of the frame, the region of interest grows with the frames since the last search
+        :param margin_: margin of the region of interest around the predicted box, as a fraction of the box size
+        :param min_score_: minimum normalized correlation to accept the best match
+        """
+        elapsed_ = max(1, frame_index_ - self.last_index_)
+        predicted_ = self.position_ + self.velocity_ * elapsed_
+        width_, height_ = self.size_
+        # The region grows with the distance the object could have moved since the last update
+        margin_ = int(margin_ * max(width_, height_) + np.abs(self.velocity_).max() * elapsed_) + 1
+
+        frame_height_, frame_width_ = gray_.shape[:2]
+        x0_, y0_ = max(0, int(predicted_[0]) - margin_), max(0, int(predicted_[1]) - margin_)
+        x1_ = min(frame_width_, int(predicted_[0]) + width_ + margin_)
+        y1_ = min(frame_height_, int(predicted_[1]) + height_ + margin_)
+
+        self.score_ = 0.
+        if x1_ - x0_ >= width_ and y1_ - y0_ >= height_:
+            result_ = cv2.matchTemplate(gray_[y0_:y1_, x0_:x1_], self.template_, cv2.TM_CCOEFF_NORMED)
+            _, self.score_, _, location_ = cv2.minMaxLoc(result_)
+
+        if self.score_ >= min_score_:
+            found_ = np.array([x0_ + location_[0], y0_ + location_[1]], dtype=np.float32)
+            # Smooth the velocity, so a single wrong match does not throw the prediction away
+            self.velocity_ = 0.5 * self.velocity_ + 0.5 * (found_ - self.position_) / elapsed_
+            self.position_ = found_
+            self.misses_ = 0
+        else:
+            # Not found, coast on the prediction
+            self.position_ = predicted_
+            self.misses_ += 1
+        self.last_index_ = frame_index_
+
+
+class MultiTracker:
+    """
+    Follows many objects in a stream of frames, e.g.
+      tracker_ = MultiTracker(fps_budget_=30)
+      tracker_.add(first_frame_, (x, y, width, height), priority_=1)
+      for frame_ in frames_:
+          boxes_ = tracker_.update(frame_)
+    """
+
+    def __init__(self,
+                 margin_: float = 0.5,
+                 min_score_: float = 0.6,
+                 max_misses_: int = 10,
+                 fps_budget_: float = None,
+                 max_stride_: int = 8):
+        """
+        :param margin_: margin of the regions of interest around the predicted boxes, as a fraction of the box size
+        :param min_score_: minimum normalized correlation to accept a match
+        :param max_misses_: consecutive frames without a match before a track is stale and dropped
+        :param fps_budget_: target frames per second of the budget mode, None disables it
+        :param max_stride_: maximum number of frames between the updates of the low-priority tracks
+        """
+        self.margin_ = margin_
+        self.min_score_ = min_score_
+        self.max_misses_ = max_misses_
+        self.budget_ = 1 / fps_budget_ if fps_budget_ else None
+        self.max_stride_ = max_stride_
+        self.stride_ = 1
+        self.frames_at_stride_ = 0
+        self.last_update_time_ = None
+        self.interval_ = None
+        self.tracks_ = {}
+        self.next_id_ = 0
+        self.frame_index_ = 0
+        self.dropped_ = 0
+        self.updates_ = 0
+        self.skipped_ = 0
+        self.latency_ = capture_helper.LatencyStats()
+        self.histogram_ = capture_helper.LatencyHistogram()
+
+    def add(self,
+            frame_,
+            box_: tuple,
+            priority_: int = 0) -> int:
+        """
+        Starts following an object
+        :param frame_: BGR or grayscale frame where the object is, the one of the next update or the last one updated
+        :param box_: box of the object in the frame, a tuple (x, y, width, height)
+        :param priority_: 0 is low priority, its updates can be throttled in budget mode, higher ones are never
+        :return: the identifier of the track
+        """
+        track_id_ = self.next_id_
+        self.tracks_[track_id_] = Track(track_id_, _gray(frame_), box_, self.frame_index_, priority_)
+        self.next_id_ += 1
+        return track_id_
+
+    def update(self, frame_) -> dict:
+        """
+        Follows the objects in the next frame, and drops the stale tracks
+        :param frame_: BGR or grayscale frame
+        :return: dictionary {track identifier: tuple (box (x, y, width, height), matching score)} of the live tracks
+        """
+        start_ = time.perf_counter()
+        self.frame_index_ += 1
+
+        gray_ = _gray(frame_)
+        for track_ in list(self.tracks_.values()):
+            # The low-priority tracks are staggered, so their updates spread over the frames of the stride. In between
+            #  their boxes are predicted
+            if track_.priority_ == 0 and (self.frame_index_ + track_.track_id_) % self.stride_:
+                self.skipped_ += 1
+                continue
+
+            track_.update(gray_, self.frame_index_, self.margin_, self.min_score_)
+            self.updates_ += 1
+            if track_.misses_ > self.max_misses_:
+                del self.tracks_[track_.track_id_]
+                self.dropped_ += 1
+
+        end_ = time.perf_counter()
+        self.latency_.record(end_ - start_)
+        self.histogram_.record(end_ - start_)
+        self._adapt_stride(end_)
+        return {track_id_: (track_.box(self.frame_index_), track_.score_) for track_id_, track_ in self.tracks_.items()}
+
+    def _adapt_stride(self, now_: float):
+        """
+        In budget mode, throttles the low-priority tracks when the frames fall behind the target fps, i.e. the interval
+          between updates, which includes the rest of the work on each frame, exceeds the budget. Every PROBE_FRAMES_
+          frames the stride is halved to probe whether the frames fit again, and doubles back if they do not.
+        :param now_: time.perf_counter() seconds at the end of the update
+        """
+        if self.budget_ is not None and self.last_update_time_ is not None:
+            # Average the intervals, so the jitter of a source paced at the target fps does not throttle
+            interval_ = now_ - self.last_update_time_
+            self.interval_ = interval_ if self.interval_ is None else 0.7 * self.interval_ + 0.3 * interval_
+            self.frames_at_stride_ += 1
+            # Give each stride a few frames to show its effect before doubling it again
+            if self.interval_ > 1.1 * self.budget_ and self.stride_ < self.max_stride_ and self.frames_at_stride_ >= 3:
+                self.stride_, self.frames_at_stride_ = self.stride_ * 2, 0
+            elif self.frames_at_stride_ >= PROBE_FRAMES_ and self.stride_ > 1:
+                self.stride_, self.frames_at_stride_ = self.stride_ // 2, 0
+        self.last_update_time_ = now_
+
+    def report(self) -> dict:
+        """
+        :return: a dictionary with the frames, the live and dropped tracks, the track updates and the updates skipped
+                 by the budget mode, the current stride of the low-priority tracks, and the latency per frame as
+                 statistics and as a histogram
+        """
+        return {'frames': self.frame_index_, 'tracks': len(self.tracks_), 'dropped': self.dropped_,
+                'updates': self.updates_, 'skipped': self.skipped_, 'stride': self.stride_,
+                'latency': self.latency_.report(), 'histogram': self.histogram_.report()}
+
+
+def _gray(frame_):
+    return cv2.cvtColor(frame_, cv2.COLOR_BGR2GRAY) if frame_.ndim == 3 else frame_
+
+
+def iou(box_a_: tuple,
+        box_b_: tuple) -> float:
+    """
+    Computes the intersection over union of two boxes, 1 when they are the same, 0 when they do not overlap
+    :param box_a_: a tuple (x, y, width, height)
+    :param box_b_: a tuple (x, y, width, height)
+    :return: the intersection over union
+    """
+    x0_, y0_ = max(box_a_[0], box_b_[0]), max(box_a_[1], box_b_[1])
+    x1_ = min(box_a_[0] + box_a_[2], box_b_[0] + box_b_[2])
+    y1_ = min(box_a_[1] + box_a_[3], box_b_[1] + box_b_[3])
+    intersection_ = max(0, x1_ - x0_) * max(0, y1_ - y0_)
+    union_ = box_a_[2] * box_a_[3] + box_b_[2] * box_b_[3] - intersection_
+    return intersection_ / union_ if union_ else 0.
+
+
+class ShapesSource(capture_helper.SyntheticSource):
+    """
+    Synthetic camera with patterned squares bouncing over a gradient, whose boxes are known in every frame, to test the
+      trackers. A shape can vanish, to test the dropping of stale tracks.
+    """
+
+    def __init__(self,
+                 width_: int = 640,
+                 height_: int = 480,
+                 fps_: float = 30.,
+                 frames_: int = None,
+                 shapes_: int = 6,
+                 size_: int = 48,
+                 vanish_: dict = None,
+                 seed_: int = 0):
+        """
+        :param width_: frame width
+        :param height_: frame height
+        :param fps_: frames per second delivered by read()
+        :param frames_: number of frames before the source ends, None never ends
+        :param shapes_: number of shapes
+        :param size_: width and height of the shapes, a multiple of 6 keeps the cells of their pattern even
+        :param vanish_: dictionary {shape number: frame number from which it is not drawn}
+        :param seed_: seed of the positions and the velocities of the shapes
+        """
+        super().__init__(width_, height_, fps_, frames_)
+        random_ = np.random.default_rng(seed_)
+        self.size_ = size_
+        self.vanish_ = vanish_ or {}
+        self.starts_ = random_.uniform(0, 1, (shapes_, 2)) * (width_ - size_, height_ - size_)
+        self.velocities_ = random_.uniform(1, 4, (shapes_, 2)) * random_.choice((-1, 1), (shapes_, 2))
+        # Each shape is a different random pattern of cells, so the normalized correlation, which ignores the
+        #  brightness and the contrast, does not confuse one shape with another
+        self.patterns_ = [cv2.resize(np.uint8(random_.integers(0, 2, (6, 6, 1)) * color_),
+                                     (size_, size_), interpolation=cv2.INTER_NEAREST)
+                          for color_ in random_.integers(64, 256, (shapes_, 3))]
+
+    def boxes(self, index_: int) -> dict:
+        """
+        Gets the boxes of the visible shapes in a frame
+        :param index_: frame number
+        :return: dictionary {shape number: tuple (x, y, width, height)}
+        """
+        limits_ = np.array(self.background_.shape[1::-1]) - self.size_
+        # Bounce on the borders: the position runs forth and back between 0 and the limit
+        positions_ = np.abs((self.starts_ + self.velocities_ * index_ + limits_) % (2 * limits_) - limits_)
+        return {i_: (int(x_), int(y_), self.size_, self.size_) for i_, (x_, y_) in enumerate(positions_)
+                if index_ < self.vanish_.get(i_, index_ + 1)}
+
+    def draw(self,
+             index_: int,
+             dst_=None):
+        frame_ = buffer_helper.copy(self.background_, dst_)
+        for i_, (x_, y_, width_, height_) in self.boxes(index_).items():
+            frame_[y_:y_ + height_, x_:x_ + width_] = self.patterns_[i_]
+        return frame_
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+# Streaming video pipeline: a decode thread feeds a bounded frame queue, the frames are transformed one by one through
+#  generators, and an encode thread drains another bounded queue into the output file.
+# As the queues are bounded, the memory stays flat regardless of the video length.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+# queue: synchronized queues to exchange the frames between threads.
+import queue
+# threading: runs the decoding and the encoding of the frames in background threads.
+import threading
+# time: provides various time-related functions.
+import time
+
+# --- App modules ---
+from . import buffer_helper
+
+# Marks the end of the frames in the queues
+_END_ = object()
+
+# FourCC codes of the video formats, by file extension
+FOURCC_ = {'.avi': 'MJPG', '.mp4': 'mp4v', '.mkv': 'XVID'}
+
+
+class QueueStats:
+    """
+    Occupancy statistics of a frame queue, sampled each time a frame goes through it
+    """
+
+    def __init__(self, queue_: queue.Queue):
+        """
+        :param queue_: queue to sample
+        """
+        self.queue_ = queue_
+        self.samples_ = 0
+        self.total_ = 0
+        self.max_ = 0
+
+    def sample(self):
+        """
+        Samples the current occupancy of the queue
+        """
+        size_ = self.queue_.qsize()
+        self.samples_ += 1
+        self.total_ += size_
+        self.max_ = max(self.max_, size_)
+
+    def report(self) -> dict:
+        """
+        :return: a dictionary with the capacity, and the mean and max occupancy of the queue
+        """
+        return {'capacity': self.queue_.maxsize, 'mean': self.total_ / self.samples_ if self.samples_ else 0.,
+                'max': self.max_}
+
+
+class FrameReader(threading.Thread):
+    """
+    Decodes the frames of a video in a background thread, into a bounded queue
+    """
+
+    def __init__(self,
+                 source_,
+                 queue_size_: int = 8):
+        """
+        :param source_: video file, camera index or stream URL, as accepted by cv2.VideoCapture
+        :param queue_size_: maximum number of decoded frames waiting to be consumed
+        """
+        super().__init__(name='FrameReader', daemon=True)
+        self.capture_ = cv2.VideoCapture(source_)
+        self.fps_ = self.capture_.get(cv2.CAP_PROP_FPS) or 30.
+        self.queue_ = queue.Queue(maxsize=queue_size_)
+        self.stats_ = QueueStats(self.queue_)
+        self.stopped_ = threading.Event()
+
+    def is_opened(self) -> bool:
+        """
+        :return: True whether the video could be opened, otherwise False
+        """
+        return self.capture_.isOpened()
+
+    def run(self):
+        try:
+            while not self.stopped_.is_set():
+                ok_, frame_ = self.capture_.read()
+                if not ok_:
+                    break
+                self._put(frame_)
+        finally:
+            self.capture_.release()
+            self._put(_END_)
+
+    def _put(self, item_):
+        # Wait for room in the queue, but give up if the reader is stopped
+        while not self.stopped_.is_set():
+            try:
+                self.queue_.put(item_, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def frames(self):
+        """
+        Generates the decoded frames, starting the thread if it was not started yet
+        :return: generator of BGR frames
+        """
+        if not self.is_alive() and not self.stopped_.is_set():
+            self.start()
+        try:
+            while True:
+                self.stats_.sample()
+                frame_ = self.queue_.get()
+                if frame_ is _END_:
+                    return
+                yield frame_
+        finally:
+            self.stop()
+
+    def stop(self):
+        """
+        Stops decoding frames
+        """
+        self.stopped_.set()
+
+
+class FrameWriter(threading.Thread):
+    """
+    Encodes frames into a video file in a background thread, from a bounded queue. The video writer is created with
+      the size of the first frame.
+    After close(), frames_ is the number of frames written, and error_ is None, or the message of the error that
+      stopped the writing, e.g. when the codec is not available or the file cannot be created.
+    """
+
+    def __init__(self,
+                 file_path_: str,
+                 fps_: float = 30.,
+                 queue_size_: int = 8,
+                 fourcc_: str = None):
+        """
+        :param file_path_: video file to write
+        :param fps_: frames per second of the video
+        :param queue_size_: maximum number of frames waiting to be encoded, when it is full write() blocks
+        :param fourcc_: four character code of the codec, by default it depends on the file extension
+        """
+        super().__init__(name='FrameWriter', daemon=True)
+        self.file_path_ = file_path_
+        self.fps_ = fps_
+        self.fourcc_ = fourcc_ or FOURCC_.get(os.path.splitext(file_path_)[1].lower(), 'MJPG')
+        self.queue_ = queue.Queue(maxsize=queue_size_)
+        self.stats_ = QueueStats(self.queue_)
+        self.frames_ = 0
+        self.error_ = None
+        self.start()
+
+    def run(self):
+        writer_ = None
+        try:
+            while True:
+                frame_ = self.queue_.get()
+                if frame_ is _END_:
+                    break
+                # After an error keep draining the queue, so that write() never blocks forever
+                if self.error_ is not None:
+                    continue
+                try:
+                    if writer_ is None:
+                        height_, width_ = frame_.shape[:2]
+                        writer_ = cv2.VideoWriter(self.file_path_, cv2.VideoWriter_fourcc(*self.fourcc_), self.fps_,
+                                                  (width_, height_), frame_.ndim == 3)
+                        # An unsupported codec or an unwritable path would make every write() silently do nothing
+                        if not writer_.isOpened():
+                            self.error_ = f'the writer cannot be opened with the codec {self.fourcc_}'
+                            print(f'The video {self.file_path_} cannot be written: {self.error_}')
+                            continue
+                    writer_.write(frame_)
+                    self.frames_ += 1
+                except cv2.error as error_:
+                    self.error_ = str(error_)
+                    print(f'The video {self.file_path_} cannot be written: {self.error_}')
+        finally:
+            if writer_ is not None:
+                writer_.release()
+
+    def write(self, frame_):
+        """
+        Queues a frame to be encoded, waiting while the queue is full
+        :param frame_: BGR frame, or grayscale if all the frames are grayscale
+        """
+        self.stats_.sample()
+        self.queue_.put(frame_)
+
+    def close(self):
+        """
+        Waits until all the queued frames are encoded, and closes the video file
+        """
+        self.queue_.put(_END_)
+        self.join()
+
+
+def transform_frames(frames_,
+                     transforms_: []):
+    """
+    Applies transforms to each frame, one frame at a time
+    :param frames_: iterable of frames
+    :param transforms_: functions that receive a frame and return the transformed frame, applied in order
+    :return: generator of transformed frames
+    """
+    for frame_ in frames_:
+        for transform_ in transforms_:
+            frame_ = transform_(frame_)
+        yield frame_
+
+
+def stream_video(input_path_,
+                 output_path_: str,
+                 transforms_: [] = (),
+                 queue_size_: int = 8,
+                 on_frame_=None) -> dict:
+    """
+    Reads a video, applies the transforms to each frame and writes the result, streaming the frames through bounded
+      queues between a decode thread, the current thread and an encode thread
+    :param input_path_: video file, camera index or stream URL, as accepted by cv2.VideoCapture
+    :param output_path_: video file to write
+    :param transforms_: functions that receive a frame and return the transformed frame, applied in order
+    :param queue_size_: capacity of the decode and the encode queues
+    :param on_frame_: optional function called with each transformed frame, e.g. to display it
+    :return: a dictionary with the frames, seconds, sustained fps, and the occupancy of the decode and encode queues
+    """
+    reader_ = FrameReader(input_path_, queue_size_)
+    if not reader_.is_opened():
+        print(f'The video {input_path_} cannot be opened')
+        return {'frames': 0}
+
+    writer_ = FrameWriter(output_path_, reader_.fps_, queue_size_)
+    start_ = time.perf_counter()
+    try:
+        for frame_ in transform_frames(reader_.frames(), transforms_):
+            writer_.write(frame_)
+            if on_frame_ is not None:
+                on_frame_(frame_)
+    finally:
+        reader_.stop()
+        writer_.close()
+    seconds_ = time.perf_counter() - start_
+
+    return {'frames': writer_.frames_, 'seconds': seconds_, 'fps': writer_.frames_ / seconds_ if seconds_ else 0.,
+            'decode_queue': reader_.stats_.report(), 'encode_queue': writer_.stats_.report()}
+
+
+def synthetic_background(width_: int,
+                         height_: int) -> np.ndarray:
+    """
+    Builds the gradient background of the synthetic frames
+    :param width_: frame width
+    :param height_: frame height
+    :return: the BGR background
+    """
+    background_ = np.zeros((height_, width_, 3), dtype=np.uint8)
+    background_[:, :, 0] = np.linspace(40, 200, width_, dtype=np.uint8)[None, :]
+    background_[:, :, 1] = np.linspace(40, 160, height_, dtype=np.uint8)[:, None]
+    return background_
+
+
+def synthetic_frame(background_: np.ndarray,
+                    index_: int,
+                    period_: int = 90,
+                    dst_=None) -> np.ndarray:
+    """
+    Draws a synthetic frame, with a circle and a square moving over the background
+    :param background_: gradient background, it is not modified
+    :param index_: frame number
+    :param period_: frames of a full cycle of the movement
+    :param dst_: optional destination array with the shape of the background
+    :return: the BGR frame, dst_ if it was given
+    """
+    height_, width_ = background_.shape[:2]
+    phase_ = index_ % period_
+    frame_ = buffer_helper.copy(background_, dst_)
+    x_ = int((width_ - 80) * (0.5 + 0.5 * np.sin(2 * np.pi * phase_ / period_))) + 40
+    y_ = int((height_ - 80) * phase_ / max(1, period_ - 1)) + 40
+    cv2.circle(frame_, (x_, height_ // 2), 30, (0, 0, 255), -1, cv2.LINE_AA)
+    cv2.rectangle(frame_, (width_ // 3 - 25, y_ - 25), (width_ // 3 + 25, y_ + 25), (255, 255, 255), -1)
+    cv2.putText(frame_, f'{index_:04d}', (10, height_ - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1,
+                cv2.LINE_AA)
+    return frame_
+
+
+def synthesize_video(file_path_: str,
+                     frames_: int = 90,
+                     width_: int = 640,
+                     height_: int = 480,
+                     fps_: float = 30.) -> str:
+    """
+    Writes a synthetic video of a circle and a square moving over a gradient, e.g. to test the pipeline without
+      video files
+    :param file_path_: video file to write, the codec depends on the file extension
+    :param frames_: number of frames
+    :param width_: frame width
+    :param height_: frame height
+    :param fps_: frames per second of the video
+    :return: the video file path
+    """
+    background_ = synthetic_background(width_, height_)
+
+    writer_ = FrameWriter(file_path_, fps_)
+    for i_ in range(frames_):
+        writer_.write(synthetic_frame(background_, i_, frames_))
+    writer_.close()
+
+    return file_path_
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+# Asynchronous image writer.
+# write() queues an image and returns at once, while a pool of threads encodes and writes the queued images, so the
+#  encoding overlaps with the processing of the next images. cv2.imencode releases the GIL, so the encoders run in
+#  parallel with the caller and with each other.
+# The queue is bounded: when it is full, write() blocks until an encoder takes an image, so a producer faster than the
+#  encoders does not keep every decoded image in memory.
+# The encoder parameters are set per format, and the images encoded, their bytes and the encode time are counted per
+#  format. The writers still open when the interpreter exits are flushed, so no queued image is lost.
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+#      It can process images and videos to identify objects, faces, or even the handwriting of a human.
+import cv2
+
+# --- Python modules ---
+# atexit: registers the flush of the open writers when the interpreter exits.
+import atexit
+# concurrent.futures: the pool of encoder threads, each write returns a future.
+from concurrent.futures import ThreadPoolExecutor
+# functools: partial binds the file path to the callback of each write.
+import functools
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+# threading: a semaphore bounds the queue, and a lock protects the counters.
+import threading
+# time: provides various time-related functions.
+import time
+# weakref: keeps track of the open writers without keeping them alive.
+import weakref
+
+# Writers not closed yet, flushed at exit
+_open_writers_ = weakref.WeakSet()
+
+# Writer shared by the course functions, created on first use
+_shared_ = {'writer': None}
+_shared_lock_ = threading.Lock()
+
+
+def encode_parameters(extension_: str,
+                      jpeg_quality_: int = None,
+                      png_compression_: int = None,
+                      webp_quality_: int = None) -> []:
+    """
+    Builds the parameters of cv2.imencode / cv2.imwrite for a format. The parameters that are None keep the default of
+      OpenCV, e.g. its PNG encoder uses a fast RLE strategy unless a compression level is given.
+    :param extension_: file extension, and so format, of the image
+    :param jpeg_quality_: JPEG quality, from 0 to 100 (OpenCV default: 95)
+    :param png_compression_: PNG compression level, from 0 (fastest, largest) to 9 (slowest, smallest)
+    :param webp_quality_: WebP quality, from 1 to 100, above 100 is lossless (OpenCV default: lossless)
+    :return: the list of parameters, empty for the other formats or the defaults
+    """
+    extension_ = extension_.lower()
+    if extension_ in ('.jpg', '.jpeg') and jpeg_quality_ is not None:
+        return [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality_]
+    if extension_ == '.png' and png_compression_ is not None:
+        return [cv2.IMWRITE_PNG_COMPRESSION, png_compression_]
+    if extension_ == '.webp' and webp_quality_ is not None:
+        return [cv2.IMWRITE_WEBP_QUALITY, webp_quality_]
+    return []
+
+
+class AsyncImageWriter:
+    """
+    Encodes and writes images on a pool of threads. The images must not be modified until their write is done.
+    """
+
+    def __init__(self,
+                 workers_: int = 2,
+                 max_pending_: int = 8,
+                 jpeg_quality_: int = None,
+                 png_compression_: int = None,
+                 webp_quality_: int = None):
+        """
+        :param workers_: number of encoder threads
+        :param max_pending_: images queued or being encoded, write() blocks while there are as many
+        :param jpeg_quality_: JPEG quality, from 0 to 100, None for the default of OpenCV
+        :param png_compression_: PNG compression level, from 0 (fastest, largest) to 9 (slowest, smallest), None for
+                                 the default of OpenCV
+        :param webp_quality_: WebP quality, from 1 to 100, above 100 is lossless, None for the default of OpenCV
+        """
+        self.quality_ = {'jpeg_quality_': jpeg_quality_, 'png_compression_': png_compression_,
+                         'webp_quality_': webp_quality_}
+        self.executor_ = ThreadPoolExecutor(max(1, workers_), thread_name_prefix='image-writer')
+        self.slots_ = threading.BoundedSemaphore(max(1, max_pending_))
+        self.lock_ = threading.Lock()
+        self.pending_ = set()
+        self.stats_ = {}
+        self.blocked_seconds_ = 0.
+        self.errors_ = []
+        self.closed_ = False
+        _open_writers_.add(self)
+
+    def write(self,
+              file_path_: str,
+              image_,
+              callback_=None):
+        """
+        Queues an image to encode and write. Blocks while the queue is full.
+        :param file_path_: file to write, its extension sets the format
+        :param image_: image to write
+        :param callback_: optional function called by the encoder thread with the encoded bytes, once they are written
+        :return: a future of the number of bytes written, it raises the error of the write if it failed
+        """
+        if self.closed_:
+            raise ValueError('The writer is closed')
+
+        # Back-pressure: wait for a free slot of the queue
+        if not self.slots_.acquire(blocking=False):
+            start_ = time.perf_counter()
+            self.slots_.acquire()
+            with self.lock_:
+                self.blocked_seconds_ += time.perf_counter() - start_
+
+        try:
+            future_ = self.executor_.submit(self._write, file_path_, image_, callback_)
+        except BaseException:
+            self.slots_.release()
+            raise
+        with self.lock_:
+            self.pending_.add(future_)
+        future_.add_done_callback(functools.partial(self._done, file_path_))
+        return future_
+
+    def flush(self) -> int:
+        """
+        Waits until all the queued images are written
+        :return: number of writes that failed since the writer was created, see errors()
+        """
+        while True:
+            with self.lock_:
+                pending_ = list(self.pending_)
+            if not pending_:
+                break
+            for future_ in pending_:
+                # The errors are kept by _done, so they are not raised here
+                future_.exception()
+        with self.lock_:
+            return len(self.errors_)
+
+    def close(self):
+        """
+        Writes the queued images and stops the encoder threads
+        """
+        if self.closed_:
+            return
+        self.closed_ = True
+        self.flush()
+        self.executor_.shutdown(wait=True)
+        _open_writers_.discard(self)
+
+    def errors(self) -> []:
+        """
+        :return: list of tuples (file path, error message) of the writes that failed
+        """
+        with self.lock_:
+            return list(self.errors_)
+
+    def stats(self,
+              reset_: bool = False) -> dict:
+        """
+        Reports the images written per format
+        :param reset_: flag to reset the counters, so the next call reports only the later writes
+        :return: a dictionary {file extension: dictionary with the images, megapixels, bytes, encode seconds and write
+                 seconds, summed over the encoder threads}, with the seconds write() was blocked by a full queue under
+                 the key 'blocked_seconds'
+        """
+        with self.lock_:
+            stats_ = {extension_: dict(row_) for extension_, row_ in self.stats_.items()}
+            stats_['blocked_seconds'] = self.blocked_seconds_
+            if reset_:
+                self.stats_ = {}
+                self.blocked_seconds_ = 0.
+        return stats_
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info_):
+        self.close()
+        return False
+
+    def _write(self,
+               file_path_: str,
+               image_,
+               callback_) -> int:
+        extension_ = os.path.splitext(file_path_)[1].lower()
+        start_ = time.perf_counter()
+        succeeded_, data_ = cv2.imencode(extension_, image_, encode_parameters(extension_, **self.quality_))
+        if not succeeded_:
+            raise ValueError(f'The image cannot be encoded as {extension_}')
+        encoded_ = time.perf_counter()
+        with open(file_path_, 'wb') as file_:
+            file_.write(data_)
+        written_ = time.perf_counter()
+
+        with self.lock_:
+            row_ = self.stats_.setdefault(extension_, {'images': 0, 'megapixels': 0., 'bytes': 0,
+                                                       'encode_seconds': 0., 'write_seconds': 0.})
+            row_['images'] += 1
+            row_['megapixels'] += image_.shape[0] * image_.shape[1] / 1e6
+            row_['bytes'] += data_.nbytes
+            row_['encode_seconds'] += encoded_ - start_
+            row_['write_seconds'] += written_ - encoded_
+        if callback_ is not None:
+            callback_(data_)
+        return data_.nbytes
+
+    def _done(self,
+              file_path_: str,
+              future_):
+        self.slots_.release()
+        error_ = future_.exception()
+        with self.lock_:
+            self.pending_.discard(future_)
+            if error_ is not None:
+                self.errors_.append((file_path_, str(error_)))
+
+
+def merge_stats(total_: dict,
+                stats_: dict) -> dict:
+    """
+    Adds the stats of a writer to a total, e.g. the stats of the writers of several processes
+    :param total_: dictionary to update, with the layout of AsyncImageWriter.stats
+    :param stats_: stats to add
+    :return: the total
+    """
+    for extension_, row_ in stats_.items():
+        if extension_ == 'blocked_seconds':
+            total_['blocked_seconds'] = total_.get('blocked_seconds', 0.) + row_
+            continue
+        total_row_ = total_.setdefault(extension_, dict.fromkeys(row_, 0))
+        for name_, value_ in row_.items():
+            total_row_[name_] += value_
+    return total_
+
+
+def stats_table(stats_: dict) -> str:
+    """
+    Formats the stats of a writer as a table, one line per format
+    :param stats_: stats, with the layout of AsyncImageWriter.stats
+    :return: the table
+    """
+    lines_ = [f'{"format":<8} {"images":>7} {"MP":>9} {"MB":>9} {"encode s":>9} {"MP/s":>8} {"images/s":>9}']
+    for extension_, row_ in stats_.items():
+        if extension_ == 'blocked_seconds':
+            continue
+        seconds_ = row_['encode_seconds'] or float('nan')
+        lines_.append(f'{extension_:<8} {row_["images"]:7d} {row_["megapixels"]:9.1f} {row_["bytes"] / 2 ** 20:9.1f} '
+                      f'{row_["encode_seconds"]:9.2f} {row_["megapixels"] / seconds_:8.1f} '
+                      f'{row_["images"] / seconds_:9.1f}')
+    lines_.append(f'Blocked by a full queue: {stats_.get("blocked_seconds", 0.):.2f} s')
+    return '\n'.join(lines_)
+
+
+def shared_writer() -> AsyncImageWriter:
+    """
+    :return: the writer shared by the course functions, with the default parameters
+    """
+    with _shared_lock_:
+        if _shared_['writer'] is None:
+            _shared_['writer'] = AsyncImageWriter()
+        return _shared_['writer']
+
+
+@atexit.register
+def _close_open_writers():
+    for writer_ in list(_open_writers_):
+        writer_.close()
@@ -6,12 +6,15 @@
 import cv2
 
 # --- Python modules ---
+# argparse: parser for command-line options, arguments and sub-commands.
+import argparse
 # sys: module which provides access to variables used or maintained by the interpreter and to functions that
 #      interact strongly with the interpreter
 import sys
 
 # --- App modules ---
 import course
+from helper import trace_helper
 
 
 # Use of __name__ & __main__
@@ -19,6 +22,15 @@ import course
 # For example, in a file my_module.py, when executed as the main program, the __name__ attribute will be '__main__',
 # however if it is used importing it from another module: import my_module, the __name__ attribute will be 'my_module'.
 if __name__ == '__main__':
+    # Optional tracing of the demos, e.g. python main.py --trace trace.json --trace-memory
+    parser_ = argparse.ArgumentParser(description='Demos of the OpenCV crash course.')
+    parser_.add_argument('--trace', help='JSON file to save a Chrome trace of the demos, and print a summary by span')
+    parser_.add_argument('--trace-memory', action='store_true',
+                         help='measure the memory allocated by each span with tracemalloc, slower')
+    args_ = parser_.parse_args()
+    if args_.trace:
+        trace_helper.enable(args_.trace_memory)
+
     # Module 1: Getting Started with Images
     """ Show images with matplotlib, after seeing them close the windows to continue """
     course.module_01.plot_image('checkerboard_18x18.png', cv2.IMREAD_GRAYSCALE, 'gray')
@@ -41,21 +53,48 @@ if __name__ == '__main__':
     course.module_03.draw_circle('apollo_11_launch.jpg')
     course.module_03.draw_rectangle('apollo_11_launch.jpg')
     course.module_03.put_text('apollo_11_launch.jpg')
+    course.module_03.draw_annotations('apollo_11_launch.jpg')
 
     # Module 4: Image Enhancement
     course.module_04.add_subtract_brightness('new_zealand_coast.jpg')
     course.module_04.multiply_contrast('new_zealand_coast.jpg')
 
-    # TODO Module 5: Accessing the Camera
-    # TODO Module 6: Read and Write Videos
-    # TODO Module 7: Image Filtering and Edge Detection
-    # TODO Module 8: Image Features and Image Alignment
-    # TODO Module 9: Image Stitching and Creating Panoramas
-    # TODO Module 10: High Dynamic Range Imaging (HDR)
-    # TODO Module 11: Object Tracking
-    # TODO Module 12: Face Detection
+    # Module 5: Accessing the Camera
+    """ Shows the camera preview, press q or Esc to continue """
+    course.module_05.show_camera()
+
+    # Module 6: Read and Write Videos
+    course.module_06.read_write_video()
+
+    # Module 7: Image Filtering and Edge Detection
+    course.module_07.filter_image('mafalda.jpg')
+    course.module_07.detect_edges('bicycle.jpg')
+
+    # Module 8: Image Features and Image Alignment
+    course.module_08.align_image('apollo_11_launch.jpg')
+
+    # Module 9: Image Stitching and Creating Panoramas
+    course.module_09.create_panorama('new_zealand_coast.jpg')
+
+    # Module 10: High Dynamic Range Imaging (HDR)
+    course.module_10.merge_exposures('new_zealand_coast.jpg')
+
+    # Module 11: Object Tracking
+    course.module_11.track_objects()
+
+    # Module 12: Face Detection
+    course.module_12.detect_faces('new_zealand_coast.jpg')
+    course.module_12.track_faces()
+    course.module_12.detect_faces_folder()
+
     # TODO Module 13: Object Detection
     # TODO Module 14: Pose Estimation using OpenPose
 
+    if args_.trace:
+        trace_helper.disable()
+        trace_helper.write_chrome_trace(args_.trace)
+        print(trace_helper.summary_table())
+        print(f'Trace saved to {args_.trace}')
+
     # Terminate normally
     sys.exit(0)
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+# Puts the application folder on the import path, so the tests import the course and helper packages like main.py
+
+# --- Python modules ---
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+# sys: module which provides access to variables used or maintained by the interpreter and to functions that
+#      interact strongly with the interpreter
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
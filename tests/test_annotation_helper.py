@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Tests of helper.annotation_helper: a dirty render must be identical, pixel by pixel, to a full render
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- App modules ---
+from helper import annotation_helper
+
+
+def _background() -> np.ndarray:
+    # Noise, so a pixel restored or blended differently cannot match by chance
+    return np.random.default_rng(7).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+
+
+def _scene(line_type_: int) -> annotation_helper.AnnotationLayer:
+    layer_ = annotation_helper.AnnotationLayer()
+    layer_.add_line((13, 17), (301, 211), (0, 255, 255), 1, line_type_)
+    layer_.add_line((620, 5), (40, 470), (255, 0, 0), 3, line_type_)
+    layer_.add_circle((333, 222), 97, (0, 0, 255), 5, line_type_)
+    layer_.add_circle((500, 400), 41, (0, 255, 0), -1, line_type_)
+    layer_.add_rectangle((101, 303), (257, 451), (106, 58, 243), 1, line_type_)
+    layer_.add_text('Dirty rectangles', (150, 120), cv2.FONT_HERSHEY_DUPLEX, 1.1, (255, 255, 255), 2, line_type_)
+    return layer_
+
+
+def _check_updates(line_type_: int):
+    background_ = _background()
+    layer_ = _scene(line_type_)
+    target_ = layer_.render(background_, in_place_=False)
+
+    # Move, add and remove annotations, and compare each dirty render to a full render of the same display list
+    ids_ = list(layer_.primitives_)
+    updates_ = [lambda: layer_.remove(ids_[1]),
+                lambda: layer_.add_line((300, 30), (310, 460), (255, 255, 0), 1, line_type_),
+                lambda: layer_.add_circle((340, 230), 60, (255, 0, 255), 2, line_type_),
+                lambda: layer_.remove(ids_[2]),
+                lambda: layer_.add_text('moved', (330, 240), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 1, line_type_)]
+    for update_ in updates_:
+        update_()
+        regions_ = layer_.render_dirty(target_, background_)
+        assert regions_
+        expected_ = _scene_render(layer_, background_)
+        assert np.array_equal(target_, expected_)
+
+
+def _scene_render(layer_: annotation_helper.AnnotationLayer,
+                  background_: np.ndarray) -> np.ndarray:
+    # render() resets the dirty regions, so render a layer with the same display list
+    full_ = annotation_helper.AnnotationLayer()
+    full_.primitives_ = dict(layer_.primitives_)
+    return full_.render(background_, in_place_=False)
+
+
+def test_render_dirty_equals_render_line_8():
+    _check_updates(cv2.LINE_8)
+
+
+def test_render_dirty_equals_render_line_aa():
+    _check_updates(cv2.LINE_AA)
+
+
+def test_render_dirty_without_changes_updates_nothing():
+    background_ = _background()
+    layer_ = _scene(cv2.LINE_AA)
+    target_ = layer_.render(background_, in_place_=False)
+    expected_ = target_.copy()
+    assert layer_.render_dirty(target_, background_) == []
+    assert np.array_equal(target_, expected_)
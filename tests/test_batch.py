@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Tests of batch: the totals of a run count every output, also the ones still queued when the last image is processed
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+# pytest: testing framework.
+import pytest
+
+# --- Python modules ---
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+
+# --- App modules ---
+import batch
+
+
+def _images(folder_, count_):
+    os.makedirs(folder_)
+    generator_ = np.random.default_rng(0)
+    for index_ in range(count_):
+        cv2.imwrite(os.path.join(folder_, f'image_{index_}.png'),
+                    generator_.integers(0, 256, (60 + index_, 80, 3), dtype=np.uint8))
+
+
+@pytest.mark.parametrize('workers_', [1, 2, 8])
+def test_run_counts_every_write(tmp_path, workers_):
+    source_ = str(tmp_path / 'source')
+    output_ = str(tmp_path / 'output')
+    _images(source_, 5)
+    totals_ = batch.run(source_, output_, ['flip'], workers_, verbose_=False)
+    assert totals_['images'] == 5 and totals_['errors'] == 0 and totals_['write_errors'] == 0
+    assert totals_['writes']['.png']['images'] == totals_['outputs']
+    written_ = sum(len(filenames_) for _, _, filenames_ in os.walk(output_))
+    assert written_ == totals_['outputs']
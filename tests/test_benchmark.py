@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Tests of benchmark.compare: the regressions need a relative and an absolute slowdown
+
+# --- App modules ---
+import benchmark
+
+
+def _benchmark(transform_ms_: float,
+               total_ms_: float) -> dict:
+    return {'results': {'crop@320x240': {'transform': {'p50': transform_ms_}, 'total': {'p50': total_ms_}}}}
+
+
+def test_compare_ignores_changes_of_stages_that_take_no_time():
+    regressions_ = benchmark.compare(_benchmark(0.004, 3.), _benchmark(0.012, 3.5))
+    assert regressions_ == [('crop@320x240', 'total', 3., 3.5)]
+
+
+def test_compare_flags_small_stages_above_the_floor():
+    regressions_ = benchmark.compare(_benchmark(0.1, 3.), _benchmark(0.2, 3.), min_difference_ms_=0.05)
+    assert regressions_ == [('crop@320x240', 'transform', 0.1, 0.2)]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Tests of helper.catalog_helper: the headers are read without decoding, and corrupt files are reported as unreadable
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- App modules ---
+from helper import catalog_helper
+
+
+def _jpeg_bytes() -> bytes:
+    image_ = np.random.default_rng(3).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    return cv2.imencode('.jpg', image_)[1].tobytes()
+
+
+def test_jpeg_header(tmp_path):
+    path_ = tmp_path / 'image.jpg'
+    path_.write_bytes(_jpeg_bytes())
+    header_ = catalog_helper.read_header(str(path_))
+    assert (header_['format'], header_['width'], header_['height'], header_['channels']) == ('jpeg', 64, 48, 3)
+
+
+def test_truncated_jpeg_is_unreadable(tmp_path):
+    data_ = _jpeg_bytes()
+    # Every truncation before the frame header, e.g. one ending in the 0xff of a marker
+    end_ = data_.index(b'\xff\xc0') + 9
+    for length_ in range(3, end_):
+        path_ = tmp_path / f'truncated_{length_}.jpg'
+        path_.write_bytes(data_[:length_])
+        assert catalog_helper.read_header(str(path_)) is None, length_
+
+
+def test_catalog_counts_truncated_jpeg(tmp_path):
+    (tmp_path / 'good.jpg').write_bytes(_jpeg_bytes())
+    (tmp_path / 'truncated.jpg').write_bytes(_jpeg_bytes()[:21] + b'\xff')
+    catalog_ = catalog_helper.open_catalog(str(tmp_path))
+    assert [relative_path_ for relative_path_, _ in catalog_.query()] == ['good.jpg']
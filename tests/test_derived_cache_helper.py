@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Tests of helper.derived_cache_helper: the total size of the entries and the eviction of the least recently used
+
+# --- Third Party Libraries ---
+# pytest: testing framework.
+import pytest
+
+# --- Python modules ---
+# os: sets the modification times, which order the entries to evict.
+import os
+
+# --- App modules ---
+from helper import derived_cache_helper
+
+
+def test_put_replacing_an_entry_counts_its_size_once(tmp_path):
+    cache_ = derived_cache_helper.DerivedCache(str(tmp_path))
+    key_ = cache_.key('0' * 32, 'operation')
+    for _ in range(3):
+        cache_.put(key_, b'x' * 100)
+    assert cache_.stats()['bytes'] == 100
+    cache_.put(key_, b'x' * 40)
+    assert cache_.stats()['bytes'] == 40
+    assert cache_.get(key_) == b'x' * 40
+
+
+def test_put_evicts_least_recently_used(tmp_path):
+    cache_ = derived_cache_helper.DerivedCache(str(tmp_path), max_bytes_=250)
+    keys_ = [cache_.key('0' * 32, f'operation {index_}') for index_ in range(3)]
+    for index_, key_ in enumerate(keys_[:2]):
+        cache_.put(key_, b'x' * 100)
+        os.utime(cache_.path(key_), ns=(index_ * 10 ** 9, index_ * 10 ** 9))
+    cache_.put(keys_[2], b'x' * 100)
+    assert cache_.get(keys_[0]) is None
+    assert cache_.get(keys_[2]) == b'x' * 100
+    assert cache_.stats()['bytes'] <= 250
+
+
+@pytest.mark.parametrize('parameters_', [{'scale': 0.5}, {'scale': 0.75}])
+def test_key_depends_on_the_parameters(parameters_):
+    assert derived_cache_helper.DerivedCache.key('0' * 32, 'operation', parameters_) != \
+        derived_cache_helper.DerivedCache.key('0' * 32, 'operation')
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Tests of helper.filter_helper: the tiled filters must match the whole-image ones
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+# pytest: testing framework.
+import pytest
+
+# --- App modules ---
+from helper import filter_helper
+
+
+def _image() -> np.ndarray:
+    # Noise, so every tile has edges across its borders
+    return np.random.default_rng(17).integers(0, 256, (613, 701, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize('filter_name_, parameters_', [
+    ('box', {'ksize_': 9}), ('integral_box', {'ksize_': 9}), ('gaussian', {'ksize_': 7}), ('median', {'ksize_': 5}),
+    ('sobel', {'ksize_': 1}), ('sobel', {'ksize_': 3}), ('sobel', {'ksize_': 7}),
+    ('laplacian', {'ksize_': 1}), ('laplacian', {'ksize_': 5})])
+def test_tiled_equals_whole(filter_name_, parameters_):
+    image_ = _image()
+    whole_ = filter_helper.apply(filter_name_, image_, **parameters_)
+    function_, halo_ = filter_helper.FILTERS_[filter_name_]
+    # Several threads, so the image is split in tiles whatever the number of threads of OpenCV
+    tiled_ = filter_helper.run_tiled(lambda tile_: function_(tile_, **parameters_), image_, halo_(**parameters_), 128,
+                                     workers_=4)
+    assert np.array_equal(whole_, tiled_)
+
+
+def test_single_threaded_opencv_filters_the_whole_image():
+    threads_ = cv2.getNumThreads()
+    shapes_ = []
+    cv2.setNumThreads(1)
+    try:
+        filter_helper.run_tiled(lambda tile_: shapes_.append(tile_.shape) or tile_, _image(), 4, 128)
+    finally:
+        cv2.setNumThreads(threads_)
+    assert shapes_ == [(613, 701, 3)]
+
+
+@pytest.mark.parametrize('ksize_', [1, 3, 9, 31])
+def test_integral_box_equals_blur(ksize_):
+    image_ = _image()
+    assert np.array_equal(filter_helper.integral_box(image_, ksize_), cv2.blur(image_, (ksize_, ksize_)))
+
+
+@pytest.mark.parametrize('ksize_', [0, 4, -3])
+def test_integral_box_rejects_even_kernel(ksize_):
+    with pytest.raises(ValueError):
+        filter_helper.integral_box(_image(), ksize_)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Tests of helper.hdr_helper: the exposure fusion is converted to 8 bits with its negative values clipped to black
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+
+# --- Python modules ---
+# os: library that allows access to functionalities dependent on the Operating System.
+import os
+
+# --- App modules ---
+from helper import hdr_helper
+
+
+def _exposures():
+    image_ = cv2.imread(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'images', 'tinified',
+                                     'new_zealand_coast.jpg'))
+    return hdr_helper.synthesize_exposures(image_, np.array([1 / 30, 0.25, 2.5], dtype=np.float32))
+
+
+def test_mertens_clips_negative_values():
+    images_ = _exposures()
+    fused_ = cv2.createMergeMertens(1., 1., 0.).process(images_)
+    assert (fused_ < 0).any()
+    expected_ = np.clip(fused_ * 255 + 0.5, 0, 255).astype(np.uint8)
+    image_, _ = hdr_helper.merge_mertens(images_, memory_cap_=1 << 40)
+    assert np.abs(image_.astype(np.int16) - expected_).max() <= 1
+    assert (image_[fused_ < 0] == 0).all()
+
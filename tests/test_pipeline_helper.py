@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# Tests of helper.pipeline_helper: a planned pipeline must give the image of its steps run one by one, when its crops
+#  come before its resize and its flips after it
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+# pytest: testing framework.
+import pytest
+
+# --- App modules ---
+from course import module_02, module_04
+from helper import pipeline_helper
+
+_SHAPES_ = [(480, 640, 3), (481, 643, 3), (1001, 777, 3), (333, 517)]
+
+
+def _image(shape_: tuple) -> np.ndarray:
+    return np.random.default_rng(sum(shape_)).integers(0, 256, shape_, dtype=np.uint8)
+
+
+@pytest.mark.parametrize('shape_', _SHAPES_)
+def test_crop_reduce_equals_steps(shape_):
+    image_ = _image(shape_)
+    expected_ = module_02.reduce(module_02.crop(image_, 0.05, 0.07, 0.03, 0.09), 0.75)
+    result_ = pipeline_helper.Pipeline().crop(0.05, 0.07, 0.03, 0.09).reduce(0.75).run(image_)
+    assert np.array_equal(result_, expected_)
+
+
+@pytest.mark.parametrize('shape_', _SHAPES_)
+def test_crop_enlarge_flip_brightness_equals_steps(shape_):
+    image_ = _image(shape_)
+    expected_ = module_02.enlarge(module_02.crop(image_, 0.1, 0.05, 0.05, 0.1), 0.3)
+    expected_ = module_04.change_brightness(cv2.flip(expected_, 1), 30)
+    result_ = pipeline_helper.Pipeline().crop(0.1, 0.05, 0.05, 0.1).enlarge(0.3).flip(1).brightness(30).run(image_)
+    assert np.array_equal(result_, expected_)
+
+
+@pytest.mark.parametrize('shape_', _SHAPES_)
+def test_run_into_destination(shape_):
+    image_ = _image(shape_)
+    pipeline_ = pipeline_helper.Pipeline().crop(0.05, 0.05, 0.05, 0.05).reduce(0.75).flip(1).brightness(30)
+    expected_ = pipeline_.run(image_)
+    dst_ = np.empty_like(expected_)
+    assert pipeline_.run(image_, dst_=dst_) is dst_
+    assert np.array_equal(dst_, expected_)
+
+
+def test_run_rejects_destination_that_does_not_fit():
+    image_ = _image((480, 640, 3))
+    pipeline_ = pipeline_helper.Pipeline().crop(0.05, 0.05, 0.05, 0.05).reduce(0.75).flip(1).brightness(30)
+    shape_ = pipeline_.output_shape(image_.shape)
+    for dst_ in (np.empty((shape_[0] + 1,) + shape_[1:], np.uint8), np.empty(shape_, np.float32)):
+        with pytest.raises(ValueError):
+            pipeline_.run(image_, dst_=dst_)
+
+
+@pytest.mark.parametrize('shape_', _SHAPES_)
+def test_reduce_into_destination_equals_reduce(shape_):
+    image_ = _image(shape_)
+    expected_ = module_02.reduce(image_, 0.75)
+    dst_ = np.empty_like(expected_)
+    assert module_02.reduce(image_, 0.75, dst_) is dst_
+    assert np.array_equal(dst_, expected_)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# Tests of helper.text_helper: the cached sprites write the same text as cv2.putText, and no slower than drawing it
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+import cv2
+# numpy: library for array processing for numbers, strings, records, and objects.
+import numpy as np
+# pytest: testing framework.
+import pytest
+
+# --- Python modules ---
+# time: provides various time-related functions.
+import time
+
+# --- App modules ---
+from helper import text_helper
+
+# Texts of the course: the label of module_03, a caption line of module_04, a small label, and a label cut by the
+#  borders of the image
+_TEXTS_ = {
+    'label': ('Apollo 11 Saturn V Launch, July 16, 1969', (50, 300), cv2.FONT_HERSHEY_DUPLEX, 1.1, 2),
+    'caption': ('The values which are already high, are becoming', (180, 280), cv2.FONT_HERSHEY_DUPLEX, 0.8, 1),
+    'small': ('car 3', (40, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1),
+    'clipped': ('Apollo 11 Saturn V Launch', (-30, 12), cv2.FONT_HERSHEY_DUPLEX, 1.1, 2),
+}
+
+# Border of the canvas of the expected texts
+_BORDER_ = 64
+
+
+def _image(channels_: int = 3) -> np.ndarray:
+    shape_ = (480, 640, channels_) if channels_ > 1 else (480, 640)
+    return np.random.default_rng(12).integers(0, 256, shape_, dtype=np.uint8)
+
+
+def _both(name_: str,
+          line_type_: int,
+          channels_: int = 3) -> tuple:
+    text_, org_, font_face_, font_scale_, thickness_ = _TEXTS_[name_]
+    color_ = (0, 255, 255) if channels_ > 1 else (200,)
+    # OpenCV clips the strokes at the borders of the image, which moves their pixels slightly, so the expected text is
+    #  drawn on a larger canvas and cropped
+    expected_ = cv2.copyMakeBorder(_image(channels_), _BORDER_, _BORDER_, _BORDER_, _BORDER_, cv2.BORDER_CONSTANT)
+    cv2.putText(expected_, text_, (org_[0] + _BORDER_, org_[1] + _BORDER_), font_face_, font_scale_, color_, thickness_,
+                line_type_)
+    expected_ = expected_[_BORDER_:-_BORDER_, _BORDER_:-_BORDER_]
+    image_ = text_helper.put_text(_image(channels_), text_, org_, font_face_, font_scale_, color_, thickness_,
+                                  line_type_)
+    return expected_, image_
+
+
+@pytest.mark.parametrize('name_', list(_TEXTS_))
+@pytest.mark.parametrize('channels_', [1, 3])
+def test_put_text_equals_put_text_of_opencv(name_, channels_):
+    expected_, image_ = _both(name_, cv2.LINE_8, channels_)
+    assert np.array_equal(expected_, image_)
+
+
+@pytest.mark.parametrize('name_', list(_TEXTS_))
+def test_antialiased_put_text_is_close_to_put_text_of_opencv(name_):
+    expected_, image_ = _both(name_, cv2.LINE_AA)
+    difference_ = np.abs(expected_.astype(np.int16) - image_)
+    # OpenCV blends the overlapping antialiased strokes one after the other, the sprite blends their union once
+    assert difference_.max() <= 8
+    assert (difference_ > 2).mean() < 0.001
+
+
+def test_small_text_is_drawn_directly():
+    text_helper.clear_cache()
+    _both('small', cv2.LINE_8)
+    assert text_helper.cache_stats()['entries'] == 0
+
+
+def _seconds(function_, repeat_: int = 200) -> float:
+    times_ = []
+    for _ in range(repeat_):
+        start_ = time.perf_counter()
+        function_()
+        times_.append(time.perf_counter() - start_)
+    return float(np.median(times_))
+
+
+@pytest.mark.parametrize('name_, line_type_', [('label', cv2.LINE_AA), ('caption', cv2.LINE_AA),
+                                               ('caption', cv2.LINE_8)])
+def test_cached_text_is_not_slower_than_drawing(name_, line_type_):
+    text_, org_, font_face_, font_scale_, thickness_ = _TEXTS_[name_]
+    image_ = _image()
+    arguments_ = (text_, org_, font_face_, font_scale_, (0, 255, 255), thickness_, line_type_)
+    text_helper.put_text(image_, *arguments_)
+    assert _seconds(lambda: text_helper.put_text(image_, *arguments_)) <= _seconds(lambda: cv2.putText(image_,
+                                                                                                        *arguments_))
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# Tests of helper.tracking_helper: the shapes of ShapesSource are followed, the stale tracks are dropped and the budget
+#  mode throttles the low-priority tracks
+
+# --- App modules ---
+from helper import tracking_helper
+
+
+def _tracker(source_, **options_):
+    tracker_ = tracking_helper.MultiTracker(**options_)
+    first_frame_ = source_.draw(0)
+    track_ids_ = {shape_: tracker_.add(first_frame_, box_) for shape_, box_ in source_.boxes(0).items()}
+    return tracker_, track_ids_
+
+
+def test_tracker_follows_the_shapes():
+    source_ = tracking_helper.ShapesSource()
+    tracker_, track_ids_ = _tracker(source_)
+    # The shapes of the default seed do not hide each other, so each one is found at its exact position
+    for index_ in range(1, 150):
+        tracked_ = tracker_.update(source_.draw(index_))
+        for shape_, box_ in source_.boxes(index_).items():
+            assert tracking_helper.iou(tracked_[track_ids_[shape_]][0], box_) == 1.
+    assert tracker_.report()['dropped'] == 0
+
+
+def test_tracker_drops_a_vanished_shape():
+    source_ = tracking_helper.ShapesSource(shapes_=3, vanish_={1: 20})
+    tracker_, track_ids_ = _tracker(source_, max_misses_=5)
+    for index_ in range(1, 40):
+        tracked_ = tracker_.update(source_.draw(index_))
+    assert track_ids_[1] not in tracked_
+    assert set(tracked_) == {track_ids_[0], track_ids_[2]}
+    assert tracker_.report()['dropped'] == 1
+
+
+def test_budget_mode_throttles_the_low_priority_tracks():
+    source_ = tracking_helper.ShapesSource(shapes_=4)
+    # A budget no frame can meet, so the stride goes up to its maximum
+    tracker_, _ = _tracker(source_, fps_budget_=1e6, max_stride_=4)
+    tracker_.add(source_.draw(0), source_.boxes(0)[0], priority_=1)
+    for index_ in range(1, 30):
+        tracker_.update(source_.draw(index_))
+    report_ = tracker_.report()
+    assert report_['stride'] == 4
+    assert report_['skipped'] > 0
+    # The high-priority track is updated on every frame
+    assert report_['updates'] >= 29
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Tests of helper.video_helper: the frames written by FrameWriter
+
+# --- Third Party Libraries ---
+# cv2: OpenCV library for computer vision, machine learning, and image processing.
+import cv2
+
+# --- App modules ---
+from helper import video_helper
+
+
+def test_frame_writer_reports_unwritable_video(tmp_path):
+    background_ = video_helper.synthetic_background(160, 120)
+    writer_ = video_helper.FrameWriter(str(tmp_path / 'missing' / 'video.avi'), queue_size_=2)
+    # More frames than the queue holds, so write() would block if the failed writer stopped draining it
+    for i_ in range(10):
+        writer_.write(video_helper.synthetic_frame(background_, i_))
+    writer_.close()
+    assert isinstance(writer_.error_, str)
+    assert writer_.frames_ == 0
+
+
+def test_synthesized_video_reads_back(tmp_path):
+    file_path_ = video_helper.synthesize_video(str(tmp_path / 'video.avi'), frames_=24, width_=160, height_=120)
+    capture_ = cv2.VideoCapture(file_path_)
+    frames_ = []
+    while True:
+        succeeded_, frame_ = capture_.read()
+        if not succeeded_:
+            break
+        frames_.append(frame_)
+    capture_.release()
+    assert len(frames_) == 24
+    assert all(frame_.shape == (120, 160, 3) for frame_ in frames_)
+    # The first frame is close to the one written, within the loss of the codec
+    background_ = video_helper.synthetic_background(160, 120)
+    assert cv2.PSNR(frames_[0], video_helper.synthetic_frame(background_, 0, 24)) > 25